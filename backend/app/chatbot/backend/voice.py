@@ -1,5 +1,12 @@
 # backend/voice.py
 import os
+import io
+import json
+import hashlib
+import itertools
+import subprocess
+import threading
+import time
 from pydub import AudioSegment
 import speech_recognition as sr
 from gtts import gTTS
@@ -10,32 +17,119 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def _ensure_wav(input_path: str) -> str:
+FAQS_FILE = Path(__file__).resolve().parent / "faqs.json"
+
+# Recognizer input format: 16 kHz mono 16-bit PCM
+TARGET_SAMPLE_RATE = 16000
+TARGET_SAMPLE_WIDTH = 2
+
+# --- TTS cache settings (audio files live in DATA_DIR, keyed by hash(text, lang)) ---
+TTS_LANGUAGES = ("en", "hi", "mr")
+TTS_CACHE_MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024)
+TTS_JANITOR_INTERVAL_S = float(os.getenv("TTS_JANITOR_INTERVAL_S", "300"))
+# legacy answer_<uuid>.mp3 files are swept by the janitor as well
+TTS_CACHE_PATTERNS = ("tts_*.mp3", "answer_*.mp3")
+
+_janitor_lock = threading.Lock()
+_janitor_thread = None
+
+
+def _iter_chunks(audio, chunk_size: int = 64 * 1024):
     """
-    Convert non-wav audio to wav using pydub (requires ffmpeg installed).
-    Returns path to wav file (may be same as input if already wav).
+    Yield raw bytes from an upload: a path, bytes, a file-like object
+    (e.g. UploadFile.file) or an iterable of byte chunks (streaming body).
     """
-    path = Path(input_path)
-    if path.suffix.lower() == ".wav":
-        return input_path
-    wav_path = str(path.with_suffix(".wav"))
-    try:
-        audio = AudioSegment.from_file(input_path)
-        audio.export(wav_path, format="wav")
-        return wav_path
-    except Exception:
-        # If conversion fails, return original path and let recognizer attempt
-        return input_path
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        yield bytes(audio)
+    elif isinstance(audio, (str, Path)):
+        with open(audio, "rb") as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+    elif hasattr(audio, "read"):
+        yield from iter(lambda: audio.read(chunk_size), b"")
+    else:
+        for chunk in audio:
+            if chunk:
+                yield bytes(chunk)
 
-def speech_to_text(audio_file_path: str) -> tuple:
+
+def _pcm_from_wav(data: bytes) -> bytes:
+    """Decode + resample a WAV buffer to 16 kHz mono 16-bit PCM without ffmpeg."""
+    segment = AudioSegment.from_file(io.BytesIO(data), format="wav")
+    segment = (
+        segment.set_frame_rate(TARGET_SAMPLE_RATE)
+        .set_channels(1)
+        .set_sample_width(TARGET_SAMPLE_WIDTH)
+    )
+    return segment.raw_data
+
+
+def _pcm_from_ffmpeg(chunks) -> bytes:
+    """
+    Pipe compressed audio (mp3/ogg/webm/...) through ffmpeg stdin -> stdout.
+    Chunks are fed as they arrive; nothing is written to disk.
+    """
+    cmd = [
+        AudioSegment.converter, "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE),
+        "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _feed():
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=_feed, name="ffmpeg-feed", daemon=True)
+    feeder.start()
+    pcm = proc.stdout.read()
+    err = proc.stderr.read()
+    proc.wait()
+    feeder.join()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {err.decode(errors='ignore').strip()}")
+    return pcm
+
+
+def _to_audio_data(audio) -> "sr.AudioData":
+    """
+    Convert an upload into recognizer-ready 16 kHz mono PCM, fully in memory.
+    WAV is decoded in-process; other formats are streamed through ffmpeg pipes.
+    """
+    chunks = _iter_chunks(audio)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= 12:
+            break
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        data = head + b"".join(chunks)
+        pcm = _pcm_from_wav(data)
+    else:
+        pcm = _pcm_from_ffmpeg(itertools.chain([head], chunks))
+
+    return sr.AudioData(pcm, TARGET_SAMPLE_RATE, TARGET_SAMPLE_WIDTH)
+
+
+def speech_to_text(audio) -> tuple:
     """
     Returns (transcribed_text, detected_lang) where detected_lang is 'en'/'hi'/'mr'.
+    `audio` may be a file path, uploaded bytes, a file-like object or an
+    iterable of byte chunks; it is decoded in memory (no intermediate files).
     Attempts Hindi then Marathi then English recognition via Google's STT.
     """
-    wav_path = _ensure_wav(audio_file_path)
+    audio_data = _to_audio_data(audio)
     recognizer = sr.Recognizer()
-    with sr.AudioFile(wav_path) as source:
-        audio_data = recognizer.record(source)
 
     # Try Hindi
     try:
@@ -68,32 +162,137 @@ def speech_to_text(audio_file_path: str) -> tuple:
     except Exception:
         return "", "en"
 
+def _tts_cache_path(text: str, lang: str) -> Path:
+    """Cache file for (text, lang); identical answers map to the same file."""
+    digest = hashlib.sha256(f"{lang}\x00{text}".encode("utf-8")).hexdigest()[:32]
+    return DATA_DIR / f"tts_{lang}_{digest}.mp3"
+
+
+def _synthesize(text: str, lang: str, file_path: Path) -> None:
+    """Render with gTTS into a temp file, then move it into place atomically."""
+    tmp_path = file_path.with_name(f".{file_path.stem}.{uuid.uuid4().hex}.part")
+    try:
+        gTTS(text=text, lang=lang).save(str(tmp_path))
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def evict_tts_cache(max_bytes: int = TTS_CACHE_MAX_BYTES) -> int:
+    """
+    Delete least-recently-used audio files until the cache fits in max_bytes.
+    Cache hits bump the file mtime, so oldest mtime = least recently used.
+    Returns the number of files removed.
+    """
+    entries = []
+    for pattern in TTS_CACHE_PATTERNS:
+        for path in DATA_DIR.glob(pattern):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+            removed += 1
+        except FileNotFoundError:
+            total -= size
+        except OSError as e:
+            print(f"[TTS Janitor] could not remove {path.name}: {e}")
+    return removed
+
+
+def _janitor_loop(interval_s: float):
+    while True:
+        try:
+            removed = evict_tts_cache()
+            if removed:
+                print(f"[TTS Janitor] evicted {removed} audio file(s)")
+        except Exception as e:
+            print(f"[TTS Janitor Error] {e}")
+        time.sleep(interval_s)
+
+
+def start_tts_janitor(interval_s: float = TTS_JANITOR_INTERVAL_S):
+    """Start the background eviction thread once per process."""
+    global _janitor_thread
+    with _janitor_lock:
+        if _janitor_thread is None or not _janitor_thread.is_alive():
+            _janitor_thread = threading.Thread(
+                target=_janitor_loop, args=(interval_s,), name="tts-janitor", daemon=True
+            )
+            _janitor_thread.start()
+
+
 def text_to_speech(text: str, lang: str = "en") -> str:
     """
     Convert text to speech. Saves file in data/ and returns filepath (relative to project).
     lang expected: 'en', 'hi', 'mr'
     Note: gTTS supports 'hi' and 'mr' languages in many environments.
+    Audio is cached by hash(text, lang): repeated answers reuse the existing file.
     """
     if not text:
         text = "Sorry, I couldn't generate a voice response."
 
+    start_tts_janitor()
+
     # Map lang codes for gTTS
     lang_map = {"en": "en", "hi": "hi", "mr": "mr"}
     tts_lang = lang_map.get(lang, "en")
 
-    file_name = f"answer_{uuid.uuid4().hex}.mp3"
-    file_path = DATA_DIR / file_name
-
-    try:
-        tts = gTTS(text=text, lang=tts_lang)
-        tts.save(str(file_path))
-        return str(file_path.name)  # return filename only - app returns /audio/{filename}
-    except Exception as e:
-        # fallback: try english
+    for candidate in dict.fromkeys((tts_lang, "en")):
+        file_path = _tts_cache_path(text, candidate)
+        if file_path.exists():
+            # Cache hit: bump mtime so the janitor treats it as recently used
+            try:
+                os.utime(file_path)
+            except OSError:
+                pass
+            return str(file_path.name)  # return filename only - app returns /audio/{filename}
         try:
-            tts = gTTS(text=text, lang="en")
-            tts.save(str(file_path))
+            _synthesize(text, candidate, file_path)
             return str(file_path.name)
         except Exception:
-            # if all fail, return empty
-            return ""
+            # fallback: try english
+            continue
+
+    # if all fail, return empty
+    return ""
+
+
+def pregenerate_faq_audio(languages=TTS_LANGUAGES) -> int:
+    """
+    Build-time step: render every FAQ answer in each supported language
+    so FAQ hits are served from the cache. Returns number of files created.
+    """
+    with open(FAQS_FILE, "r", encoding="utf-8") as f:
+        faqs = json.load(f)
+
+    created = 0
+    for faq in faqs:
+        for lang in languages:
+            answer = faq.get(f"answer_{lang}")
+            if not answer:
+                continue
+            file_path = _tts_cache_path(answer, lang)
+            if file_path.exists():
+                continue
+            try:
+                _synthesize(answer, lang, file_path)
+                created += 1
+            except Exception as e:
+                print(f"❌ TTS failed for FAQ answer ({lang}): {e}")
+    return created
+
+
+if __name__ == "__main__":
+    n = pregenerate_faq_audio()
+    print(f"✅ Pre-generated {n} FAQ audio file(s) in {DATA_DIR}")
@@ -25,6 +25,9 @@ from app.routers.simulator import router as simulator
 
 # Translator
 from app.services.translator_service import translate_text
+from app.ml import batcher, explanations, model_pool, model_shards, prediction_cache
+from app.services import forecast_service, snapshot_service
+from app.utils import http_cache
 
 app = FastAPI(title="AgriTwin Backend", version="0.1.0")
 
@@ -69,7 +72,40 @@ async def translation_middleware(request: Request, call_next):
 # --- Health check ---
 @app.get("/health")
 def health():
-    return {"status": "ok", "service": "AgriTwin Backend"}
+    return {
+        "status": "ok",
+        "service": "AgriTwin Backend",
+        "snapshots": snapshot_service.get_stats(),
+        "http_cache": http_cache.get_stats(),
+    }
+
+
+@app.get("/health/ml")
+def health_ml():
+    """Yield-model micro-batcher metrics, prediction-cache hit ratio, loaded shards, explanation store."""
+    return {
+        "status": "ok",
+        "batcher": batcher.get_metrics(),
+        "prediction_cache": prediction_cache.get_stats(),
+        "model_shards": model_shards.get_stats(),
+        "explanations": explanations.get_stats(),
+        "model_pool": model_pool.get_stats(),
+    }
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Model worker processes (MODEL_POOL_WORKERS) load the model before the first request
+    model_pool.warm_up()
+    # SHAP explanations for all saved profiles, refreshed every EXPLAIN_REFRESH_SECONDS
+    explanations.start_refresh(forecast_service.refresh_explanations)
+    # Per-profile forecast / advisor snapshots: missing ones now, all of them nightly
+    snapshot_service.start_scheduler()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    model_pool.shutdown()
 
 # --- Routers ---
 app.include_router(crop_router)
@@ -0,0 +1,195 @@
+# app/ml/backtest.py
+"""
+Historical backtest of the serving yield model.
+
+    python -m app.ml.backtest [--data CSV] [--from-year Y] [--to-year Y] [--crops Rice,Wheat]
+                              [--test-only] [--workers N] [--chunk-rows 50000]
+
+Replays every historical (State, District, Crop, Crop_Year, Season) row of
+the dataset through the model exactly as serving would (same feature spec,
+YIELD_MODEL_BACKEND / YIELD_MODEL_VARIANT / YIELD_MODEL_SHARDS), in chunks
+spread over a process pool; each worker loads the model once and receives
+plain numpy arrays. Errors are aggregated per district, crop and year with
+grouped pandas reductions.
+
+--test-only keeps only train_yield's holdout rows (same split), so the
+numbers are out-of-sample as long as the dataset has not changed since
+training. The JSON report goes to artifacts/backtest/backtest_<timestamp>.json.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.ml import features
+
+BACKTEST_DIR = Path(__file__).resolve().parent / "artifacts" / "backtest"
+CHUNK_ROWS = int(os.getenv("BACKTEST_CHUNK_ROWS", "50000"))
+WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+GROUPS = {"district": ["State", "District"], "crop": ["Crop"], "year": ["Crop_Year"], "season": ["Season"]}
+
+
+def _init_worker():
+    # load the serving model once per process (first call loads and memoizes it)
+    from app.ml import predict_yield
+    predict_yield._numpy_backend()
+
+
+def _predict_chunk(chunk: tuple) -> np.ndarray:
+    from app.ml import predict_yield
+    return predict_yield._predict_model(*chunk)
+
+
+def predict_all(num: np.ndarray, cat: np.ndarray, workers: int = WORKERS, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """Uncached predictions for every encoded row, chunked across `workers` processes."""
+    bounds = range(0, len(num), chunk_rows)
+    chunks = [(num[i:i + chunk_rows], cat[i:i + chunk_rows]) for i in bounds]
+    if workers <= 1 or len(chunks) == 1:
+        _init_worker()
+        return np.concatenate([_predict_chunk(c) for c in chunks])
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker) as pool:
+        return np.concatenate(list(pool.map(_predict_chunk, chunks)))
+
+
+def error_table(frame: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Per-group n, MAE, RMSE, bias, MAPE (rows with actual > 0) and mean actual, worst RMSE first."""
+    g = frame.groupby(keys, observed=True, sort=False)
+    out = g.agg(
+        n=("err", "size"),
+        mae=("abs_err", "mean"),
+        rmse=("sq_err", "mean"),
+        bias=("err", "mean"),
+        mape=("ape", "mean"),
+        actual=("actual", "mean"),
+    )
+    out["rmse"] = np.sqrt(out["rmse"])
+    out["mape"] = out["mape"] * 100
+    return out.round(4).sort_values("rmse", ascending=False).reset_index()
+
+
+def _overall(frame: pd.DataFrame) -> dict:
+    y, err = frame["actual"].to_numpy(), frame["err"].to_numpy()
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    return {
+        "rows": int(len(frame)),
+        "mae": round(float(np.abs(err).mean()), 4),
+        "rmse": round(float(np.sqrt((err ** 2).mean())), 4),
+        "bias": round(float(err.mean()), 4),
+        "mape": round(float(frame["ape"].mean() * 100), 2),
+        "r2": round(1 - float((err ** 2).sum()) / ss_tot, 4) if ss_tot else None,
+    }
+
+
+def run(
+    data_path=None,
+    *,
+    from_year: int = None,
+    to_year: int = None,
+    crops: list = None,
+    test_only: bool = False,
+    workers: int = WORKERS,
+    chunk_rows: int = CHUNK_ROWS,
+    weather_store: bool = True,
+) -> dict:
+    from app.ml import predict_yield, train_yield
+
+    started = time.perf_counter()
+    meta = train_yield.read_meta()
+    X, y = train_yield.prepare_training_frame(
+        data_path or meta.get("data_path") or train_yield.DATA_PATH,
+        train_yield.model_context(meta),
+        weather_store=weather_store and meta.get("weather_store", True),
+    )
+    keep = np.ones(len(X), dtype=bool)
+    if test_only:
+        from sklearn.model_selection import train_test_split
+        _, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+        keep[:] = False
+        keep[test_idx] = True
+    if from_year is not None:
+        keep &= (X["Crop_Year"] >= from_year).to_numpy()
+    if to_year is not None:
+        keep &= (X["Crop_Year"] <= to_year).to_numpy()
+    if crops:
+        wanted = {c.strip().casefold() for c in crops}
+        keep &= X["Crop"].astype(str).str.strip().str.casefold().isin(wanted).to_numpy()
+    X, y = X[keep], y[keep].to_numpy(dtype=float)
+    if not len(X):
+        raise RuntimeError("❌ No rows left to backtest after filtering")
+    loaded = time.perf_counter()
+
+    num, cat = features.encode_frame(X)
+    pred = predict_all(num, cat, workers=workers, chunk_rows=chunk_rows)
+    predicted = time.perf_counter()
+
+    # 🔹 Per-row errors, then grouped reductions
+    err = pred - y
+    frame = pd.DataFrame({
+        "State": X["State"].to_numpy(), "District": X["District"].to_numpy(),
+        "Crop": X["Crop"].to_numpy(), "Season": X["Season"].to_numpy(),
+        "Crop_Year": X["Crop_Year"].to_numpy().astype("int32"),
+        "actual": y, "err": err, "abs_err": np.abs(err), "sq_err": err ** 2,
+        "ape": np.where(y > 0, np.abs(err) / np.where(y > 0, y, 1.0), np.nan),
+    })
+    tables = {name: error_table(frame, keys) for name, keys in GROUPS.items()}
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model": {"backend": predict_yield.MODEL_BACKEND, "variant": predict_yield.MODEL_VARIANT or "full",
+                  "shards": predict_yield.model_shards.enabled(), "trained_at": meta.get("trained_at")},
+        "filters": {"from_year": from_year, "to_year": to_year, "crops": crops, "test_only": test_only},
+        "overall": _overall(frame),
+        "timing": {
+            "load_seconds": round(loaded - started, 1),
+            "predict_seconds": round(predicted - loaded, 2),
+            "rows_per_second": round(len(X) / max(predicted - loaded, 1e-9)),
+            "workers": workers,
+            "total_seconds": round(time.perf_counter() - started, 1),
+        },
+        **{f"by_{name}": t.to_dict(orient="records") for name, t in tables.items()},
+    }
+    BACKTEST_DIR.mkdir(parents=True, exist_ok=True)
+    out = BACKTEST_DIR / f"backtest_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, separators=(",", ":"), default=str)
+
+    o, t = report["overall"], report["timing"]
+    print(f"\n✅ Backtest on {o['rows']:,} rows: MAE {o['mae']:.2f} | RMSE {o['rmse']:.2f} | "
+          f"bias {o['bias']:+.2f} | R² {o['r2']}")
+    print(f"⏱️ predict {t['predict_seconds']} s ({t['rows_per_second']:,} rows/s, {workers} workers)")
+    for name in ("year", "crop", "district"):
+        print(f"\nWorst by {name}:")
+        print(tables[name].head(5).to_string(index=False))
+    print(f"\n💾 Report -> {out}")
+    report["path"] = str(out)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backtest the serving yield model on historical rows")
+    ap.add_argument("--data", type=Path, help="crop dataset CSV (default: the one the model was trained on)")
+    ap.add_argument("--from-year", type=int)
+    ap.add_argument("--to-year", type=int)
+    ap.add_argument("--crops", help="comma-separated crops to include")
+    ap.add_argument("--test-only", action="store_true", help="only train_yield's holdout rows (out-of-sample)")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="prediction processes")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows per prediction chunk")
+    ap.add_argument("--no-weather-store", action="store_true", help="skip the seasonal weather join")
+    args = ap.parse_args()
+
+    run(
+        args.data,
+        from_year=args.from_year,
+        to_year=args.to_year,
+        crops=args.crops.split(",") if args.crops else None,
+        test_only=args.test_only,
+        workers=args.workers,
+        chunk_rows=args.chunk_rows,
+        weather_store=not args.no_weather_store,
+    )
@@ -0,0 +1,184 @@
+# app/ml/batcher.py
+"""
+Micro-batching for single-row yield predictions.
+
+Concurrent callers (FastAPI runs sync endpoints in a thread pool) submit one
+feature row each; a background worker collects rows arriving within
+YIELD_BATCH_WINDOW_MS of the first one, or until YIELD_BATCH_MAX rows,
+runs one model.predict on the stacked rows and resolves every caller's
+Future. If the stacked call fails, the rows are retried one by one so only
+the bad row's caller gets the error. Callers wait at most
+YIELD_BATCH_TIMEOUT_SECONDS. Set YIELD_BATCHING=0 to predict inline instead.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+BATCHING_ENABLED = os.getenv("YIELD_BATCHING", "1") != "0"
+BATCH_WINDOW_MS = float(os.getenv("YIELD_BATCH_WINDOW_MS", "3"))
+MAX_BATCH = int(os.getenv("YIELD_BATCH_MAX", "64"))
+RESULT_TIMEOUT_SECONDS = float(os.getenv("YIELD_BATCH_TIMEOUT_SECONDS", "30"))
+
+# Batch-size histogram buckets (upper bounds) and rolling window for delay stats
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+DELAY_SAMPLES = 2000
+
+_queue: "queue.Queue" = queue.Queue()
+_worker_lock = threading.Lock()
+_worker = None
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "requests": 0,
+    "batches": 0,
+    "errors": 0,
+    "fallbacks": 0,
+    "timeouts": 0,
+    "size_hist": {b: 0 for b in SIZE_BUCKETS + (float("inf"),)},
+    "queue_delay_ms": deque(maxlen=DELAY_SAMPLES),
+    "predict_ms": deque(maxlen=DELAY_SAMPLES),
+}
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="yield-batcher", daemon=True)
+            _worker.start()
+
+
+def submit(row: dict) -> Future:
+    """Queue one feature row (see predict_yield.feature_row); the Future resolves to its yield."""
+    fut: Future = Future()
+    _ensure_worker()
+    _queue.put((row, fut, time.perf_counter()))
+    return fut
+
+
+def _timeout_error() -> TimeoutError:
+    with _metrics_lock:
+        _metrics["timeouts"] += 1
+    return TimeoutError(
+        f"❌ Yield batcher gave no result within {RESULT_TIMEOUT_SECONDS:g} s "
+        f"({_queue.qsize()} rows queued); is the yield-batcher thread stuck?"
+    )
+
+
+def predict(row: dict) -> float:
+    """submit(row) and wait for its yield, at most RESULT_TIMEOUT_SECONDS."""
+    try:
+        return submit(row).result(timeout=RESULT_TIMEOUT_SECONDS)
+    except FutureTimeout:
+        raise _timeout_error() from None
+
+
+async def predict_async(row: dict) -> float:
+    """predict() for the event loop: the Future is awaited, no thread waits on it."""
+    try:
+        # shield: a timeout must not cancel the Future the worker will still resolve
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(submit(row))), RESULT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise _timeout_error() from None
+
+
+def _collect() -> list:
+    """Block for the first item, then gather more until the window closes or the batch is full."""
+    items = [_queue.get()]
+    deadline = time.perf_counter() + BATCH_WINDOW_MS / 1000
+    while len(items) < MAX_BATCH:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        try:
+            items.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return items
+
+
+def _run():
+    from app.ml import predict_yield
+
+    while True:
+        items = _collect()
+        started = time.perf_counter()
+        try:
+            preds = predict_yield._predict_rows([row for row, _, _ in items])
+            for (_, fut, _), y in zip(items, preds):
+                fut.set_result(float(y))
+            failed, fallback = 0, False
+        except Exception as e:
+            if len(items) == 1:
+                items[0][1].set_exception(e)
+                failed, fallback = 1, False
+            else:
+                failed, fallback = _run_one_by_one(items, predict_yield._predict_rows), True
+        _record(items, started, time.perf_counter(), failed, fallback)
+
+
+def _run_one_by_one(items: list, predict_rows) -> int:
+    """The stacked call failed: predict each row alone so only bad rows fail. Returns rows failed."""
+    failed = 0
+    for row, fut, _ in items:
+        try:
+            fut.set_result(float(predict_rows([row])[0]))
+        except Exception as e:
+            fut.set_exception(e)
+            failed += 1
+    return failed
+
+
+def _record(items: list, started: float, finished: float, failed: int, fallback: bool = False):
+    size = len(items)
+    with _metrics_lock:
+        _metrics["requests"] += size
+        _metrics["batches"] += 1
+        _metrics["errors"] += failed
+        _metrics["fallbacks"] += int(fallback)
+        bucket = next((b for b in SIZE_BUCKETS if size <= b), float("inf"))
+        _metrics["size_hist"][bucket] += 1
+        _metrics["queue_delay_ms"].extend((started - t) * 1000 for _, _, t in items)
+        _metrics["predict_ms"].append((finished - started) * 1000)
+
+
+def _summary(samples) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    arr = np.fromiter(samples, dtype=float)
+    p50, p95 = np.percentile(arr, [50, 95])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "max": round(float(arr.max()), 3)}
+
+
+def get_metrics() -> dict:
+    """Batch-size distribution and queueing/predict latency (rolling window) for /health/ml."""
+    with _metrics_lock:
+        hist = dict(_metrics["size_hist"])
+        delays = list(_metrics["queue_delay_ms"])
+        predicts = list(_metrics["predict_ms"])
+        requests, batches, errors = _metrics["requests"], _metrics["batches"], _metrics["errors"]
+        fallbacks, timeouts = _metrics["fallbacks"], _metrics["timeouts"]
+    return {
+        "enabled": BATCHING_ENABLED,
+        "window_ms": BATCH_WINDOW_MS,
+        "max_batch": MAX_BATCH,
+        "requests": requests,
+        "batches": batches,
+        "errors": errors,
+        "row_by_row_fallbacks": fallbacks,
+        "timeouts": timeouts,
+        "timeout_seconds": RESULT_TIMEOUT_SECONDS,
+        "mean_batch_size": round(requests / batches, 2) if batches else None,
+        "batch_size_hist": {("inf" if b == float("inf") else f"<={b}"): n for b, n in hist.items()},
+        "queue_delay_ms": _summary(delays),
+        "predict_ms": _summary(predicts),
+        "queued": _queue.qsize(),
+    }
@@ -0,0 +1,219 @@
+# app/ml/compact_model.py
+"""
+Smaller serving variants of the yield model.
+
+    python -m app.ml.compact_model [--data CSV] [--variants pruned,borders,distilled]
+                                   [--tolerance 0.01] [--border-count 32] [--distill-depth 6]
+
+Starting from the trained yield_model.pkl, each variant is written next to it
+as yield_model.<variant>.pkl + .npz:
+
+- pruned:    the full model cut (CatBoost shrink) to the fewest trees whose
+             holdout RMSE is within --tolerance of the full model's
+- borders:   retrained with a --border-count float grid (default 32 vs 254)
+             and early stopping
+- distilled: a --distill-depth model trained on the full model's predictions
+
+The report (artifacts/yield_model.compact.json) gives, per variant and for
+the full model: holdout accuracy and its delta, tree count, .pkl/.npz size,
+load time and numpy per-row latency. The holdout is train_yield's test split.
+The full model early-stopped on it and the pruning point is chosen on it, so
+those two numbers are slightly optimistic. The retrained variants early-stop
+on a separate eval split carved out of the training rows and never see it. Serve a variant with
+YIELD_MODEL_VARIANT=<variant> (see predict_yield.py).
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.ml import features, numpy_model
+from app.ml.features import CAT_COLS
+from app.ml.predict_yield import ARTIFACTS_DIR, model_paths
+
+REPORT_PATH = ARTIFACTS_DIR / "yield_model.compact.json"
+VARIANTS = ("pruned", "borders", "distilled")
+TOLERANCE = float(os.getenv("YIELD_COMPACT_TOLERANCE", "0.01"))   # relative RMSE allowed for pruning
+BORDER_COUNT = int(os.getenv("YIELD_COMPACT_BORDERS", "32"))
+DISTILL_DEPTH = int(os.getenv("YIELD_DISTILL_DEPTH", "6"))
+LATENCY_REPS = 200
+
+
+def numpy_latency(m: dict, num: np.ndarray, cat: np.ndarray, reps: int = LATENCY_REPS) -> dict:
+    """1-row latency (ms, mean of `reps`) and per-row cost of one batch call (µs) for a loaded numpy model."""
+    numpy_model.predict(m, num[:1], cat[:1])   # warm-up
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        numpy_model.predict(m, num[:1], cat[:1])
+    row_ms = (time.perf_counter() - t0) * 1000 / reps
+    t0 = time.perf_counter()
+    numpy_model.predict(m, num, cat)
+    batch_row_us = (time.perf_counter() - t0) * 1e6 / len(num)
+    return {"row_latency_ms": round(row_ms, 4), "batch_row_us": round(batch_row_us, 2)}
+
+
+def _save_variant(model, X, variant: str) -> tuple:
+    pkl_path, npz_path = model_paths(variant)
+    tmp = pkl_path.with_name(pkl_path.name + ".part")
+    joblib.dump(model, tmp)
+    os.replace(tmp, pkl_path)
+    # export last: in auto mode an .npz older than its .pkl is treated as stale
+    numpy_model.export_model(model, X, npz_path)
+    print(f"💾 Variant '{variant}' saved at: {pkl_path}")
+    return pkl_path, npz_path
+
+
+def _serving_stats(pkl_path: Path, npz_path: Path, X_test) -> dict:
+    t0 = time.perf_counter()
+    joblib.load(pkl_path)
+    pkl_load_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    m = numpy_model.load_model(npz_path)
+    npz_load_ms = (time.perf_counter() - t0) * 1000
+
+    num, cat = features.encode_frame(X_test.iloc[:1000])
+    return {
+        "pkl_bytes": pkl_path.stat().st_size,
+        "npz_bytes": npz_path.stat().st_size,
+        "pkl_load_ms": round(pkl_load_ms, 1),
+        "npz_load_ms": round(npz_load_ms, 1),
+        **numpy_latency(m, num, cat),
+    }
+
+
+def _prune_point(model, X_test, y_test, tolerance: float) -> int:
+    """Fewest trees whose holdout RMSE is within `tolerance` of the full model's."""
+    from catboost import Pool
+
+    curve = np.asarray(model.eval_metrics(Pool(X_test, y_test, cat_features=CAT_COLS), ["RMSE"])["RMSE"])
+    target = curve[-1] * (1 + tolerance)
+    return int(np.flatnonzero(curve <= target)[0]) + 1
+
+
+def compact(
+    data_path=None,
+    *,
+    variants=VARIANTS,
+    tolerance: float = TOLERANCE,
+    border_count: int = BORDER_COUNT,
+    distill_depth: int = DISTILL_DEPTH,
+    thread_count: int = None,
+    train_dir: Path = None,
+) -> dict:
+    """Build the requested variants from the current full model; returns the report dict."""
+    from catboost import CatBoostRegressor
+    from sklearn.model_selection import train_test_split
+    from app.ml import train_yield
+
+    base_pkl, base_npz = model_paths()
+    if not base_pkl.exists():
+        raise RuntimeError("❌ Model not trained. Run train_yield.py first.")
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"Unknown variants {sorted(unknown)}; choose from {VARIANTS}")
+
+    thread_count = train_yield.THREAD_COUNT if thread_count is None else thread_count
+    train_dir = train_dir or train_yield.TRAIN_DIR
+    meta = train_yield.read_meta()
+    params = {**train_yield.PARAMS, **meta.get("params", {})}
+
+    X, y = train_yield.prepare_training_frame(
+        data_path or meta.get("data_path") or train_yield.DATA_PATH,
+        train_yield.model_context(meta),
+        weather_store=meta.get("weather_store", True),
+    )
+    # same split as train_yield; its X_test was the full model's early-stopping set, so the
+    # retrained variants early-stop on their own eval split instead and never see X_test
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_fit, X_eval, y_fit, y_eval = train_test_split(X_train, y_train, test_size=0.1, random_state=42)
+
+    full = joblib.load(base_pkl)
+    if not base_npz.exists():
+        numpy_model.export_model(full, X, base_npz)
+    baseline = train_yield._metrics(y_test, full.predict(X_test))
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "holdout_rows": int(len(X_test)),
+        "eval_rows": int(len(X_eval)),
+        "holdout_note": ("train_yield's test split: early-stopping set of the full model and "
+                         "the pruning point; unseen by the borders and distilled variants"),
+        "full": {"trees": int(full.tree_count_), "depth": params.get("depth"), **baseline,
+                 **_serving_stats(base_pkl, base_npz, X_test)},
+        "variants": {},
+    }
+
+    def fit(extra: dict, target_fit, target_eval):
+        model = CatBoostRegressor(**{**params, **extra}, thread_count=thread_count, train_dir=str(train_dir))
+        model.fit(X_fit, target_fit, eval_set=(X_eval, target_eval), cat_features=CAT_COLS)
+        return model
+
+    for variant in variants:
+        started = time.perf_counter()
+        if variant == "pruned":
+            trees = _prune_point(full, X_test, y_test, tolerance)
+            model = full.copy()
+            model.shrink(ntree_end=trees)
+            settings = {"tolerance": tolerance}
+        elif variant == "borders":
+            model = fit({"border_count": border_count}, y_fit, y_eval)
+            settings = {"border_count": border_count}
+        else:  # distilled: learn the full model's function with shallower trees
+            model = fit({"depth": distill_depth}, full.predict(X_fit), full.predict(X_eval))
+            settings = {"depth": distill_depth}
+
+        metrics = train_yield._metrics(y_test, model.predict(X_test))
+        pkl_path, npz_path = _save_variant(model, X, variant)
+        stats = _serving_stats(pkl_path, npz_path, X_test)
+        report["variants"][variant] = {
+            **settings,
+            "trees": int(model.tree_count_),
+            **metrics,
+            "rmse_delta": round(metrics["rmse"] - baseline["rmse"], 4),
+            "rmse_delta_pct": round(100 * (metrics["rmse"] / baseline["rmse"] - 1), 2),
+            **stats,
+            "latency_speedup": round(report["full"]["row_latency_ms"] / stats["row_latency_ms"], 2),
+            "build_seconds": round(time.perf_counter() - started, 1),
+        }
+
+    tmp = REPORT_PATH.with_name(REPORT_PATH.name + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, REPORT_PATH)
+
+    print(f"\n{'model':<10} {'trees':>5} {'rmse':>9} {'Δ%':>6} {'npz KB':>7} {'pkl KB':>7} "
+          f"{'load ms':>8} {'1-row ms':>9} {'batch µs/row':>12}")
+    for name, r in [("full", report["full"]), *report["variants"].items()]:
+        print(f"{name:<10} {r['trees']:>5} {r['rmse']:>9.4f} {r.get('rmse_delta_pct', 0.0):>6.2f} "
+              f"{r['npz_bytes'] / 1024:>7.0f} {r['pkl_bytes'] / 1024:>7.0f} {r['npz_load_ms']:>8.1f} "
+              f"{r['row_latency_ms']:>9.3f} {r['batch_row_us']:>12.1f}")
+    print(f"💾 Report -> {REPORT_PATH}  (serve with YIELD_MODEL_VARIANT=<variant>)")
+    return report
+
+
+if __name__ == "__main__":
+    from app.ml import train_yield
+
+    ap = argparse.ArgumentParser(description="Build compact serving variants of the yield model")
+    ap.add_argument("--data", type=Path, help="crop dataset CSV (default: the one the model was trained on)")
+    ap.add_argument("--variants", default=",".join(VARIANTS), help="comma-separated subset of " + ",".join(VARIANTS))
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE, help="relative holdout RMSE allowed when pruning")
+    ap.add_argument("--border-count", type=int, default=BORDER_COUNT, help="float border grid of 'borders'")
+    ap.add_argument("--distill-depth", type=int, default=DISTILL_DEPTH, help="tree depth of 'distilled'")
+    ap.add_argument("--threads", type=int, default=train_yield.THREAD_COUNT, help="CatBoost thread_count")
+    ap.add_argument("--train-dir", type=Path, default=train_yield.TRAIN_DIR, help="CatBoost train_dir (logs)")
+    args = ap.parse_args()
+
+    compact(
+        args.data,
+        variants=[v.strip() for v in args.variants.split(",") if v.strip()],
+        tolerance=args.tolerance,
+        border_count=args.border_count,
+        distill_depth=args.distill_depth,
+        thread_count=args.threads,
+        train_dir=args.train_dir,
+    )
@@ -0,0 +1,260 @@
+# app/ml/explanations.py
+"""
+Why is the yield forecast what it is? CatBoost SHAP values per feature row.
+
+Explanations are computed in batches (one get_feature_importance call for
+many rows) and kept by (model version, feature hash) - the hash is taken on
+the same quantized row the prediction cache uses - in memory and in
+artifacts/explanations.json, so they survive restarts and are dropped
+automatically when the model changes.
+
+- store(num, cat)       batch-compute and keep explanations (background job)
+- lookup(num, cat)      stored explanation of one row, or None
+- explain(num, cat)     lookup, else compute on demand within EXPLAIN_BUDGET_MS;
+                        past the budget it returns {"status": "pending"} and the
+                        computation finishes (and is stored) in the background;
+                        a row already being computed is waited on, not resubmitted
+- start_refresh(job)    run `job` now and then every EXPLAIN_REFRESH_SECONDS
+
+SHAP needs the CatBoost .pkl; numpy-only deployments get {"status": "unavailable"}.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from app.ml import features, prediction_cache
+
+STORE_PATH = Path(__file__).resolve().parent / "artifacts" / "explanations.json"
+TOP_K = int(os.getenv("EXPLAIN_TOP_K", "5"))
+BUDGET_MS = float(os.getenv("EXPLAIN_BUDGET_MS", "250"))
+MAX_ENTRIES = int(os.getenv("EXPLAIN_MAX_ENTRIES", "10000"))
+REFRESH_SECONDS = float(os.getenv("EXPLAIN_REFRESH_SECONDS", "21600"))   # 6 h; 0 = no background job
+
+# 🔹 Farmer-facing names of the model features
+FEATURE_LABELS = {
+    "State": "State",
+    "District": "District",
+    "Crop": "Crop",
+    "Season": "Season",
+    "Crop_Year": "Crop year",
+    "Area": "Farm area",
+    "Production": "Past production",
+    "rainfall_7d_total": "Rainfall (last 7 days)",
+    "temp_7d_avg": "Temperature (7-day avg)",
+    "humidity_7d_avg": "Humidity (7-day avg)",
+    "soil_ph": "Soil pH",
+    "soil_soc": "Soil organic carbon",
+    "soil_sand": "Sand content",
+    "soil_silt": "Silt content",
+    "soil_clay": "Clay content",
+}
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, dict]" = OrderedDict()
+_inflight: Dict[str, Future] = {}         # "version:hash" -> on-demand computation of that row
+_persist_lock = threading.Lock()          # explain worker and refresh thread both persist
+_state = {"loaded": False, "computed": 0, "hits": 0, "misses": 0, "pending": 0, "last_refresh": None}
+# one worker: SHAP batches run one at a time, off the request threads
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+_refresh_thread = None
+
+
+def model_key() -> str:
+    from app.ml.predict_yield import model_version
+    return hashlib.sha1(repr(model_version()).encode()).hexdigest()[:12]
+
+
+def feature_hashes(num: np.ndarray, cat: np.ndarray) -> list:
+    q = prediction_cache.quantize(num)
+    return [hashlib.sha1(repr((a, b)).encode()).hexdigest()[:16] for a, b in zip(q.tolist(), cat.tolist())]
+
+
+# ---------- Store ----------
+def _load():
+    if _state["loaded"]:
+        return
+    _state["loaded"] = True
+    if STORE_PATH.exists():
+        try:
+            with open(STORE_PATH, "r", encoding="utf-8") as f:
+                _entries.update(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Could not read {STORE_PATH.name}: {e}")
+
+
+def _persist():
+    # one writer at a time, each through its own temp file; the snapshot is taken
+    # inside the lock so the last file written is also the newest state
+    with _persist_lock:
+        with _lock:
+            snapshot = dict(_entries)
+        STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=STORE_PATH.parent,
+                                         prefix=STORE_PATH.name, suffix=".part", delete=False) as f:
+            json.dump(snapshot, f)
+        try:
+            os.replace(f.name, STORE_PATH)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+
+def _shap(num: np.ndarray, cat: np.ndarray, version: str, hashes: list) -> list:
+    """One SHAP batch -> explanation dicts (top TOP_K factors by |contribution|)."""
+    from catboost import Pool
+    from app.ml.predict_yield import _ensure_model
+
+    model = _ensure_model()
+    df = features.to_frame(num, cat)[list(model.feature_names_)]
+    shap = model.get_feature_importance(Pool(df, cat_features=features.CAT_COLS), type="ShapValues")
+    names = list(df.columns)
+    values = df.to_numpy(dtype=object)
+    now = datetime.now().isoformat(timespec="seconds")
+
+    out = []
+    for i, row in enumerate(shap):
+        contrib, base = row[:-1], float(row[-1])
+        top = np.argsort(-np.abs(contrib))[:TOP_K]
+        out.append({
+            "feature_hash": hashes[i],
+            "model_version": version,
+            "computed_at": now,
+            "base_value": round(base, 4),
+            "prediction": round(base + float(contrib.sum()), 4),
+            "factors": [
+                {
+                    "feature": names[j],
+                    "label": FEATURE_LABELS.get(names[j], names[j]),
+                    "value": values[i, j] if isinstance(values[i, j], str) else round(float(values[i, j]), 3),
+                    "contribution": round(float(contrib[j]), 4),
+                    "effect": "raises" if contrib[j] > 0 else "lowers",
+                }
+                for j in top if contrib[j] != 0
+            ],
+        })
+    return out
+
+
+def store(num: np.ndarray, cat: np.ndarray, persist: bool = True) -> list:
+    """Explanations for every row; only rows not stored for the current model are computed (one batch)."""
+    version = model_key()
+    hashes = feature_hashes(num, cat)
+    with _lock:
+        _load()
+        found = {h: _entries.get(f"{version}:{h}") for h in hashes}
+    todo = {}
+    for i, h in enumerate(hashes):
+        if found[h] is None:
+            todo.setdefault(h, i)
+
+    if todo:
+        idx = list(todo.values())
+        q = prediction_cache.quantize(num[idx])   # explain the row the cached prediction was made for
+        for e in _shap(q, cat[idx], version, list(todo)):
+            found[e["feature_hash"]] = e
+        with _lock:
+            for h in todo:
+                _entries[f"{version}:{h}"] = found[h]
+                _entries.move_to_end(f"{version}:{h}")
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+            _state["computed"] += len(todo)
+        if persist:
+            _persist()
+    return [found[h] for h in hashes]
+
+
+def lookup(num: np.ndarray, cat: np.ndarray) -> Optional[dict]:
+    """Stored explanation of the first row for the current model, or None."""
+    key = f"{model_key()}:{feature_hashes(num[:1], cat[:1])[0]}"
+    with _lock:
+        _load()
+        hit = _entries.get(key)
+        _state["hits" if hit else "misses"] += 1
+        return hit
+
+
+def _submit_one(num: np.ndarray, cat: np.ndarray) -> Future:
+    """store() of one row on the worker; joins the computation already running for it."""
+    key = f"{model_key()}:{feature_hashes(num, cat)[0]}"
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = _inflight[key] = _executor.submit(store, num, cat)
+    # outside _lock: an already finished future runs the callback right here
+    future.add_done_callback(lambda _: _forget(key))
+    return future
+
+
+def _forget(key: str):
+    with _lock:
+        _inflight.pop(key, None)
+
+
+def explain(num: np.ndarray, cat: np.ndarray, budget_ms: float = BUDGET_MS) -> dict:
+    """Explanation of one encoded row: stored, computed within `budget_ms`, or {"status": "pending"}."""
+    try:
+        hit = lookup(num, cat)
+        if hit is not None:
+            return {"status": "ready", **hit}
+        future = _submit_one(num[:1], cat[:1])
+        try:
+            return {"status": "ready", **future.result(timeout=budget_ms / 1000)[0]}
+        except FutureTimeout:
+            with _lock:
+                _state["pending"] += 1
+            return {"status": "pending", "retry_after_ms": max(int(budget_ms), 100)}
+    except Exception as e:   # e.g. no CatBoost .pkl (numpy-only serving); never fail the forecast
+        return {"status": "unavailable", "detail": str(e)}
+
+
+# ---------- Background refresh ----------
+def start_refresh(job: Callable[[], int], interval: float = REFRESH_SECONDS):
+    """Run `job` (returns rows explained) in a daemon thread now and every `interval` seconds."""
+    global _refresh_thread
+    if interval <= 0 or (_refresh_thread is not None and _refresh_thread.is_alive()):
+        return
+
+    def _loop():
+        while True:
+            started = time.perf_counter()
+            try:
+                n = job()
+                _state["last_refresh"] = {
+                    "at": datetime.now().isoformat(timespec="seconds"),
+                    "rows": n,
+                    "seconds": round(time.perf_counter() - started, 2),
+                }
+                print(f"✅ Explanations refreshed for {n} rows in {_state['last_refresh']['seconds']} s")
+            except Exception as e:
+                print(f"❌ Explanation refresh failed: {e}")
+            time.sleep(interval)
+
+    _refresh_thread = threading.Thread(target=_loop, name="explain-refresh", daemon=True)
+    _refresh_thread.start()
+
+
+def get_stats() -> dict:
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "max_entries": MAX_ENTRIES,
+            "computed": _state["computed"],
+            "hits": _state["hits"],
+            "misses": _state["misses"],
+            "pending": _state["pending"],
+            "in_flight": len(_inflight),
+            "budget_ms": BUDGET_MS,
+            "last_refresh": _state["last_refresh"],
+        }
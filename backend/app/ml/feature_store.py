@@ -0,0 +1,243 @@
+# app/ml/feature_store.py
+"""
+Seasonal weather features for training, from a local historical archive.
+
+The archive (WEATHER_ARCHIVE_DIR/*.csv) holds daily rows per district:
+    State, District, date, temperature_C, humidity_pct, rainfall_mm
+(fetch_weather's column names; `humidity_%` and -999 gaps are accepted too).
+
+build() computes, per (State, District, Crop_Year, Season), the seasonal
+mean of the same 7-day windows inference uses - rainfall_7d_total,
+temp_7d_avg, humidity_7d_avg - with one groupby-rolling pass, and stores
+them in artifacts/features/weather_seasonal.parquet. A manifest of
+per-(district, year) input hashes makes reruns incremental: only crop years
+whose daily inputs (or neighbouring years, via Rabi / 7-day lookback)
+changed are recomputed.
+
+    python -m app.ml.feature_store [--archive DIR] [--full]
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ML_DIR = Path(__file__).resolve().parent
+WEATHER_ARCHIVE_DIR = Path(os.getenv("WEATHER_ARCHIVE_DIR", ML_DIR / "data" / "weather_archive"))
+STORE_DIR = ML_DIR / "artifacts" / "features"
+STORE_PATH = STORE_DIR / "weather_seasonal.parquet"
+MANIFEST_PATH = STORE_DIR / "weather_seasonal.manifest.json"
+
+KEYS = ["State", "District", "Crop_Year", "Season"]
+WEATHER_COLS = ["rainfall_7d_total", "temp_7d_avg", "humidity_7d_avg"]
+WINDOW_DAYS = 7
+MIN_COVERAGE = 0.6      # fraction of a season's days that need a full 7-day window
+
+# 🔹 Season -> (first month, last month). Seasons that wrap the new year
+# (Rabi, Winter) run into the next calendar year of the same crop year.
+SEASON_MONTHS = {
+    "Kharif": (6, 10),
+    "Autumn": (9, 11),
+    "Rabi": (11, 3),
+    "Winter": (12, 2),
+    "Summer": (3, 6),
+    "Whole Year": (1, 12),
+}
+# Bump when the aggregation itself changes: forces a full rebuild
+STORE_VERSION = hashlib.sha1(json.dumps([SEASON_MONTHS, WINDOW_DAYS, MIN_COVERAGE]).encode()).hexdigest()[:12]
+
+
+def _norm(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip().str.casefold()
+
+
+# ---------- Archive ----------
+def load_archive(archive_dir: Path = WEATHER_ARCHIVE_DIR) -> pd.DataFrame:
+    """All daily archive rows, normalized: keys casefolded, -999 -> NaN, sorted by district and date."""
+    files = sorted(Path(archive_dir).glob("*.csv"))
+    if not files:
+        raise FileNotFoundError(f"❌ No weather archive CSVs in {archive_dir}")
+
+    frames = []
+    for f in files:
+        df = pd.read_csv(f).rename(columns={"humidity_%": "humidity_pct"})
+        missing = {"State", "District", "date", "temperature_C", "humidity_pct", "rainfall_mm"} - set(df.columns)
+        if missing:
+            print(f"❌ {f.name}: missing {sorted(missing)}, skipped")
+            continue
+        frames.append(df[["State", "District", "date", "temperature_C", "humidity_pct", "rainfall_mm"]])
+    if not frames:
+        raise RuntimeError(f"❌ No usable weather archive files in {archive_dir}")
+
+    df = pd.concat(frames, ignore_index=True)
+    df["State"], df["District"] = _norm(df["State"]), _norm(df["District"])
+    df["date"] = pd.to_datetime(df["date"])
+    for c in ("temperature_C", "humidity_pct", "rainfall_mm"):
+        df[c] = df[c].astype("float32").where(lambda v: v > -999)
+    # later files win on duplicate days
+    df = df.drop_duplicates(["State", "District", "date"], keep="last")
+    return df.sort_values(["State", "District", "date"], ignore_index=True)
+
+
+def input_hashes(daily: pd.DataFrame) -> pd.Series:
+    """Content hash per (State, District, calendar year) of the daily rows."""
+    row_hash = pd.util.hash_pandas_object(daily, index=False).to_numpy()
+    key = [daily["State"], daily["District"], daily["date"].dt.year.rename("year")]
+    # order-independent within a group; rows are unique per day anyway
+    return pd.Series(row_hash, index=daily.index).groupby(key).agg(
+        lambda h: hashlib.sha1(np.sort(h.to_numpy()).tobytes()).hexdigest()[:16]
+    )
+
+
+# ---------- Aggregation ----------
+def _crop_year_and_season(dates: pd.Series) -> pd.DataFrame:
+    """Long frame (row index, Crop_Year, Season) - one day can belong to several seasons."""
+    month, year = dates.dt.month.to_numpy(), dates.dt.year.to_numpy()
+    parts = []
+    for season, (start, end) in SEASON_MONTHS.items():
+        if start <= end:
+            mask = (month >= start) & (month <= end)
+            crop_year = year
+        else:  # wraps: Jan..end belongs to the previous crop year
+            mask = (month >= start) | (month <= end)
+            crop_year = np.where(month >= start, year, year - 1)
+        idx = np.flatnonzero(mask)
+        parts.append(pd.DataFrame({"row": idx, "Crop_Year": crop_year[idx], "Season": season}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def seasonal_aggregates(daily: pd.DataFrame) -> pd.DataFrame:
+    """(State, District, Crop_Year, Season) -> seasonal means of the 7-day window features."""
+    # 7-day windows per district (time-based, so archive gaps don't stretch a window)
+    rolled = (
+        daily.set_index("date")
+        .groupby(["State", "District"], sort=False)[["rainfall_mm", "temperature_C", "humidity_pct"]]
+        .rolling(f"{WINDOW_DAYS}D", min_periods=WINDOW_DAYS)
+        .agg({"rainfall_mm": "sum", "temperature_C": "mean", "humidity_pct": "mean"})
+        .reset_index()
+    )
+    windows = pd.DataFrame({
+        "State": rolled["State"], "District": rolled["District"],
+        "rainfall_7d_total": rolled["rainfall_mm"],
+        "temp_7d_avg": rolled["temperature_C"],
+        "humidity_7d_avg": rolled["humidity_pct"],
+    })
+
+    seasons = _crop_year_and_season(rolled["date"])
+    long = windows.iloc[seasons["row"].to_numpy()].reset_index(drop=True)
+    long["Crop_Year"], long["Season"] = seasons["Crop_Year"].to_numpy(), seasons["Season"].to_numpy()
+
+    out = long.groupby(KEYS, sort=False).agg(
+        rainfall_7d_total=("rainfall_7d_total", "mean"),
+        temp_7d_avg=("temp_7d_avg", "mean"),
+        humidity_7d_avg=("humidity_7d_avg", "mean"),
+        n_windows=("rainfall_7d_total", "count"),
+        n_days=("rainfall_7d_total", "size"),
+    ).reset_index()
+
+    # Drop seasons the archive only partly covers (e.g. the current, unfinished year)
+    start, end = out["Season"].map(lambda s: SEASON_MONTHS[s][0]), out["Season"].map(lambda s: SEASON_MONTHS[s][1])
+    season_days = ((end - start) % 12 + 1) * 30.4
+    out = out[out["n_windows"] >= MIN_COVERAGE * season_days].drop(columns="n_days")
+    for c in WEATHER_COLS:
+        out[c] = out[c].round(2).astype("float32")
+    out["Crop_Year"] = out["Crop_Year"].astype("int32")
+    return out.reset_index(drop=True)
+
+
+# ---------- Store ----------
+def _read_manifest() -> dict:
+    if not MANIFEST_PATH.exists():
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _atomic_write(write, path: Path):
+    tmp = path.with_name(path.name + ".part")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def build(archive_dir: Path = WEATHER_ARCHIVE_DIR, full: bool = False) -> dict:
+    """Refresh the Parquet store from the archive; returns counts of what was (re)computed."""
+    daily = load_archive(archive_dir)
+    hashes = input_hashes(daily)
+    current = {f"{s}|{d}|{y}": h for (s, d, y), h in hashes.items()}
+
+    manifest = _read_manifest()
+    rebuild = full or manifest.get("version") != STORE_VERSION or not STORE_PATH.exists()
+    previous = {} if rebuild else manifest.get("inputs", {})
+    changed = {k for k in current.keys() | previous.keys() if current.get(k) != previous.get(k)}
+
+    if not rebuild and not changed:
+        print(f"✅ Weather feature store up to date ({STORE_PATH.name})")
+        return {"rebuilt": False, "changed_inputs": 0, "recomputed_keys": 0}
+
+    # A changed district-year touches crop years y-1 (Rabi / Winter tail) .. y+1 (7-day lookback)
+    dirty = set()
+    for k in changed:
+        s, d, y = k.rsplit("|", 2)
+        dirty.update((s, d, int(y) + dy) for dy in (-1, 0, 1))
+
+    if rebuild:
+        fresh = seasonal_aggregates(daily)
+        store = fresh
+    else:
+        dirty_frame = pd.DataFrame(sorted(dirty), columns=["State", "District", "Crop_Year"])
+        # inputs a dirty crop year can read: calendar years Y-1 .. Y+1 of its district
+        need = dirty_frame.assign(**{"year": dirty_frame["Crop_Year"]})
+        need = pd.concat([need.assign(year=need["year"] + dy) for dy in (-1, 0, 1)])[["State", "District", "year"]]
+        sub = daily.assign(year=daily["date"].dt.year).merge(need.drop_duplicates(), on=["State", "District", "year"])
+        fresh = seasonal_aggregates(sub.drop(columns="year"))
+        fresh = fresh.merge(dirty_frame, on=["State", "District", "Crop_Year"])
+
+        old = pd.read_parquet(STORE_PATH)
+        keep = old.merge(dirty_frame, on=["State", "District", "Crop_Year"], how="left", indicator=True)
+        store = pd.concat([keep[keep["_merge"] == "left_only"].drop(columns="_merge"), fresh], ignore_index=True)
+
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    store = store.sort_values(KEYS, ignore_index=True)
+    _atomic_write(lambda p: store.to_parquet(p, index=False), STORE_PATH)
+    _atomic_write(
+        lambda p: p.write_text(json.dumps({"version": STORE_VERSION, "inputs": current}, indent=1), encoding="utf-8"),
+        MANIFEST_PATH,
+    )
+    print(f"💾 Weather feature store: {len(store):,} seasons ({len(fresh):,} recomputed, "
+          f"{len(changed):,} district-years changed) -> {STORE_PATH}")
+    return {"rebuilt": rebuild, "changed_inputs": len(changed), "recomputed_keys": len(fresh)}
+
+
+def join_weather(df: pd.DataFrame, store_path: Path = None) -> pd.DataFrame:
+    """
+    Overwrite the weather columns of training rows (State, District,
+    Crop_Year, Season) with the stored seasonal aggregates where present;
+    other rows keep their current values. Returns a new frame.
+    """
+    store = pd.read_parquet(store_path or STORE_PATH, columns=KEYS + WEATHER_COLS)
+    keys = pd.DataFrame({
+        "State": _norm(df["State"]).to_numpy(),
+        "District": _norm(df["District"]).to_numpy(),
+        "Crop_Year": pd.to_numeric(df["Crop_Year"], errors="coerce").fillna(-1).astype("int32").to_numpy(),
+        "Season": df["Season"].astype(str).str.strip().to_numpy(),
+    })
+    matched = keys.merge(store, on=KEYS, how="left")   # left merge keeps row order
+    hit = matched["rainfall_7d_total"].notna().to_numpy()
+
+    out = df.copy()
+    for c in WEATHER_COLS:
+        base = out[c].to_numpy(dtype="float32") if c in out else np.full(len(out), np.nan, dtype="float32")
+        out[c] = np.where(hit, matched[c].to_numpy(dtype="float32"), base)
+    print(f"🔗 Seasonal weather joined for {hit.sum():,} / {len(out):,} rows")
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the seasonal weather feature store (Parquet)")
+    ap.add_argument("--archive", type=Path, default=WEATHER_ARCHIVE_DIR, help="folder of daily weather CSVs")
+    ap.add_argument("--full", action="store_true", help="recompute everything")
+    args = ap.parse_args()
+    build(args.archive, full=args.full)
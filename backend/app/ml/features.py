@@ -0,0 +1,203 @@
+# app/ml/features.py
+"""
+Feature spec for the yield model, shared by train_yield.py and predict_yield.py.
+
+FEATURE_SPEC fixes the column order, each column's role (categorical or
+numeric), its default and where its value comes from:
+  * "data"    - the crop record (dataset row at training, call inputs at inference)
+  * "profile" - the active farm profile (state / district)
+  * "weather" - fetch_weather_summary() output
+  * "soil"    - summarize_soil() output
+
+The compiled encoder turns feature dicts, frames or raw profile/weather/soil
+dicts straight into the model layout: a float matrix of the numeric columns
+and a string matrix of the categorical ones, both in spec order. Missing
+keys, None and NaN all take the column default, at training and inference.
+"""
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+CAT, NUM = "cat", "num"
+
+# 🔹 (column, role, default, source, source key) - order is the model's column order
+FEATURE_SPEC = [
+    ("State", CAT, "Unknown", "data", "state"),
+    ("District", CAT, "Unknown", "data", "district"),
+    ("Crop", CAT, "Unknown", "data", "crop"),
+    ("Crop_Year", NUM, 0.0, "data", "crop_year"),
+    ("Season", CAT, "Unknown", "data", "season"),
+    ("Area", NUM, 0.0, "data", "area"),
+    ("Production", NUM, 0.0, "data", "production"),
+    ("state_profile", CAT, "Unknown", "profile", "state"),
+    ("district_profile", CAT, "Unknown", "profile", "district"),
+    ("rainfall_7d_total", NUM, 0.0, "weather", "rainfall_7d_total"),
+    ("temp_7d_avg", NUM, 0.0, "weather", "temp_7d_avg"),
+    ("humidity_7d_avg", NUM, 0.0, "weather", "humidity_7d_avg"),
+    ("soil_ph", NUM, 7.0, "soil", "pH"),
+    ("soil_soc", NUM, 0.5, "soil", "organic_carbon_pct"),
+    ("soil_sand", NUM, 33.0, "soil", "sand_pct"),
+    ("soil_silt", NUM, 33.0, "soil", "silt_pct"),
+    ("soil_clay", NUM, 34.0, "soil", "clay_pct"),
+]
+
+Encoded = Tuple[np.ndarray, np.ndarray]
+
+
+def compile_encoder(spec: list = FEATURE_SPEC) -> dict:
+    """Precompute column lists, defaults and per-source key maps for a spec."""
+    names = [f[0] for f in spec]
+    if len(set(names)) != len(names):
+        raise ValueError("❌ Duplicate column in feature spec")
+    for name, role, *_ in spec:
+        if role not in (CAT, NUM):
+            raise ValueError(f"❌ Unknown role '{role}' for column '{name}'")
+    cat = [f for f in spec if f[1] == CAT]
+    num = [f for f in spec if f[1] == NUM]
+    return {
+        "names": names,
+        "cat_cols": [f[0] for f in cat],
+        "num_cols": [f[0] for f in num],
+        "cat_defaults": [f[2] for f in cat],
+        "num_defaults": np.array([f[2] for f in num], dtype=float),
+        "cat_sources": [(f[3], f[4]) for f in cat],
+        "num_sources": [(f[3], f[4]) for f in num],
+    }
+
+
+ENCODER = compile_encoder()
+FEATURE_NAMES: List[str] = ENCODER["names"]
+CAT_COLS: List[str] = ENCODER["cat_cols"]
+NUM_COLS: List[str] = ENCODER["num_cols"]
+
+
+def _missing(v) -> bool:
+    return v is None or (isinstance(v, float) and v != v)
+
+
+def _fill_num(num: np.ndarray, enc: dict) -> np.ndarray:
+    nan = np.isnan(num)
+    if nan.any():
+        num[nan] = np.broadcast_to(enc["num_defaults"], num.shape)[nan]
+    return num
+
+
+def encode_rows(rows: List[dict], enc: dict = ENCODER) -> Encoded:
+    """Feature dicts (column name -> value, as feature_row) -> (num [n, n_num], cat [n, n_cat])."""
+    num = np.array([[r.get(c) for c in enc["num_cols"]] for r in rows], dtype=float)
+    cat = np.array(
+        [[d if _missing(r.get(c)) else str(r[c]) for c, d in zip(enc["cat_cols"], enc["cat_defaults"])]
+         for r in rows],
+        dtype=object,
+    )
+    return _fill_num(num.reshape(len(rows), -1), enc), cat.reshape(len(rows), -1)
+
+
+def encode_frame(df: pd.DataFrame, enc: dict = ENCODER) -> Encoded:
+    """Frame with the spec columns (extra columns are ignored) -> (num, cat)."""
+    num = df[enc["num_cols"]].to_numpy(dtype=float, copy=True)
+    cat = np.empty((len(df), len(enc["cat_cols"])), dtype=object)
+    for j, (c, d) in enumerate(zip(enc["cat_cols"], enc["cat_defaults"])):
+        cat[:, j] = df[c].fillna(d).astype(str).to_numpy(dtype=object)
+    return _fill_num(num, enc), cat
+
+
+def encode_inputs(
+    data: Union[dict, List[dict]],
+    weather: Union[dict, List[dict]],
+    soil: Union[dict, List[dict]],
+    profile: Union[dict, List[dict], None] = None,
+    enc: dict = ENCODER,
+) -> Encoded:
+    """
+    Raw inputs -> (num, cat). Each argument is one dict or a list of dicts;
+    single dicts are shared by every row. `data` uses feature_row's keyword
+    names; `profile` defaults to the data's own state / district.
+    """
+    lists = [x for x in (data, weather, soil, profile) if isinstance(x, list)]
+    n = len(lists[0]) if lists else 1
+    if any(len(x) != n for x in lists):
+        raise ValueError("❌ data / weather / soil / profile lists must have the same length")
+
+    def rows(x):
+        return x if isinstance(x, list) else [x] * n
+
+    sources = {"data": rows(data), "weather": rows(weather), "soil": rows(soil)}
+    sources["profile"] = rows(profile) if profile is not None else sources["data"]
+
+    num = np.array([[sources[s][i].get(k) for s, k in enc["num_sources"]] for i in range(n)], dtype=float)
+    cat = np.array(
+        [[d if _missing(v) else str(v)
+          for (s, k), d in zip(enc["cat_sources"], enc["cat_defaults"])
+          for v in (sources[s][i].get(k),)]
+         for i in range(n)],
+        dtype=object,
+    )
+    return _fill_num(num.reshape(n, -1), enc), cat.reshape(n, -1)
+
+
+def context_columns(profile: dict, weather: dict, soil: dict, enc: dict = ENCODER) -> Dict[str, object]:
+    """Values of the profile / weather / soil columns (training adds these to every dataset row)."""
+    sources = {"profile": profile, "weather": weather, "soil": soil}
+    out = {}
+    for c, (s, k), d in zip(enc["cat_cols"], enc["cat_sources"], enc["cat_defaults"]):
+        if s in sources:
+            v = sources[s].get(k)
+            out[c] = d if _missing(v) else str(v)
+    for c, (s, k), d in zip(enc["num_cols"], enc["num_sources"], enc["num_defaults"]):
+        if s in sources:
+            v = sources[s].get(k)
+            out[c] = float(d) if _missing(v) else float(v)
+    return out
+
+
+def compact_frame(df: pd.DataFrame, enc: dict = ENCODER) -> pd.DataFrame:
+    """
+    Training-sized variant of to_frame(encode_frame(df)): same values and
+    column order, but categoricals stay `category` and numerics are float32
+    (CatBoost quantizes floats as float32 anyway).
+    """
+    cols = {}
+    for c, d in zip(enc["num_cols"], enc["num_defaults"]):
+        cols[c] = df[c].astype(np.float32).fillna(np.float32(d))
+    for c, d in zip(enc["cat_cols"], enc["cat_defaults"]):
+        col = df[c]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = col.cat.rename_categories([str(v) for v in col.cat.categories])
+            if col.isna().any():
+                col = (col.cat.add_categories(d) if d not in col.cat.categories else col).fillna(d)
+        else:
+            col = col.fillna(d).astype(str).astype("category")
+        cols[c] = col
+    return pd.DataFrame({c: cols[c] for c in enc["names"]})
+
+
+def to_frame(num: np.ndarray, cat: np.ndarray, enc: dict = ENCODER) -> pd.DataFrame:
+    """(num, cat) -> DataFrame in spec column order (what CatBoost is trained on)."""
+    cols = {c: num[:, j] for j, c in enumerate(enc["num_cols"])}
+    cols.update({c: cat[:, j] for j, c in enumerate(enc["cat_cols"])})
+    return pd.DataFrame({c: cols[c] for c in enc["names"]})
+
+
+def feature_row(
+    *,
+    state: str,
+    district: str,
+    crop: str,
+    season: str,
+    crop_year: int,
+    area: float,
+    production: float,
+    weather: dict,
+    soil: dict
+) -> dict:
+    """Model feature dict for one set of inputs (see predict_yield.predict_row)."""
+    data = {
+        "state": state, "district": district, "crop": crop, "season": season,
+        "crop_year": crop_year, "area": area, "production": production,
+    }
+    num, cat = encode_inputs(data, weather, soil)
+    row = dict(zip(NUM_COLS, num[0].tolist()))
+    row.update(zip(CAT_COLS, cat[0].tolist()))
+    return {c: row[c] for c in FEATURE_NAMES}
@@ -1,6 +1,10 @@
 # app/ml/inference.py
+import asyncio
+import os
+from functools import partial
 import joblib
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 # Import services
@@ -8,17 +12,28 @@ from app.services.profile_service import get_active_profile
 from app.services.weather_service import fetch_weather_summary, fetch_weekly_series
 from app.services.soil_service import summarize_soil
 from app.services.irrigation_service import calculate_irrigation
-from app.ml.predict_yield import predict_row
+from app.ml.predict_yield import MODEL_PATH, predict_row, predict_row_async, feature_row, predict_frame
 
-from app.models.pydantic_schemas import WhatIfRequest
-
-MODEL_PATH = Path(__file__).resolve().parents[0] / "artifacts" / "yield_model.pkl"
+from app.models.pydantic_schemas import WhatIfRequest, WhatIfSweepRequest
+from app.utils.fields import select, wants
 
 # Load trained model (predict_row will also ensure model exists via _ensure_model)
 if not MODEL_PATH.exists():
     # We don't crash here since predict_row does its own check; but we log for clarity
     print("⚠ Model path not present at inference.py level; predict_row will check model.")
 
+# Scenario sweep: override -> model feature column, and post-hoc delay axes (weeks)
+SWEEP_MODEL_AXES = {
+    "rainfall_mm": "rainfall_7d_total",
+    "temp_c": "temp_7d_avg",
+    "humidity_pct": "humidity_7d_avg",
+    "soil_pH": "soil_ph",
+}
+SWEEP_DELAY_AXES = ("sowing_delay", "irrigation_delay")
+MAX_SWEEP_SCENARIOS = int(os.getenv("SIMULATOR_MAX_SCENARIOS", "50000"))
+# Top-level parts of a what-if result, selectable with fields= on /simulator/simulate
+WHAT_IF_FIELDS = ("predicted_yield", "weather", "soil", "irrigation", "growth_curve", "input_overrides")
+
 
 def predict_yield():
     """
@@ -67,42 +82,88 @@ def predict_yield():
     }
 
 
-def what_if_yield(request: WhatIfRequest):
-    ...
-    # Predict baseline
-    predicted = predict_row(
+def _scenario_context(crop=None, pincode=None, area_ha=None, fetch: bool = True) -> dict:
+    """
+    Resolve crop / area / pincode (request values win over the active profile)
+    and fetch current weather and soil once for a what-if run (unless fetch=False).
+    """
+    profile = get_active_profile()
+    p = profile or {}
+    crop = crop or p.get("crop") or p.get("primary_crop") or "rice"
+    area = area_ha or p.get("farmArea") or p.get("farm_area") or 1.0
+    pincode = pincode or p.get("location") or p.get("pincode")
+
+    weather, soil = {}, {}
+    if pincode and fetch:
+        try:
+            weather = dict(fetch_weather_summary(pincode))
+        except Exception as e:
+            print(f"❌ Weather unavailable for {pincode}: {e}")
+        try:
+            soil = dict(summarize_soil(pincode))
+        except Exception as e:
+            print(f"❌ Soil unavailable for {pincode}: {e}")
+
+    return {"profile": profile, "crop": crop, "area": float(area), "pincode": pincode,
+            "weather": weather, "soil": soil}
+
+
+def delay_penalty(sowing_delay, irrigation_delay):
+    """Multiplicative yield penalty for sowing/irrigation delays (weeks); works on arrays."""
+    return np.maximum(0.2, 1 - 0.05 * np.asarray(sowing_delay) - 0.03 * np.asarray(irrigation_delay))
+
+
+def _what_if_inputs(request: WhatIfRequest, ctx: dict) -> dict:
+    """predict_row arguments for a what-if request (slider overrides applied to ctx's weather/soil)."""
+    profile, weather, soil = ctx["profile"], ctx["weather"], ctx["soil"]
+
+    # Apply slider overrides
+    if request.rainfall_mm is not None:
+        weather["rainfall_7d_total"] = request.rainfall_mm
+    if request.temp_c is not None:
+        weather["temp_7d_avg"] = request.temp_c
+    if request.humidity_pct is not None:
+        weather["humidity_7d_avg"] = request.humidity_pct
+    if request.soil_pH is not None:
+        soil["pH"] = request.soil_pH
+
+    return dict(
         state=(profile.get("state") if profile else "Unknown"),
         district=(profile.get("district") if profile else "Unknown"),
-        crop=crop,
+        crop=ctx["crop"],
         season=request.season or "Kharif",
         crop_year=2024,
-        area=area,
+        area=ctx["area"],
         production=0.0,
         weather=weather,
         soil=soil,
     )
 
-    # ✅ Post-hoc adjustments using penalty factors
-    sowing_delay = request.sowing_delay or 0
-    irrigation_delay = request.irrigation_delay or 0
-
-    # Apply multiplicative penalties instead of flat subtraction
-    delay_penalty = 1 - (0.05 * sowing_delay) - (0.03 * irrigation_delay)
-    delay_penalty = max(0.2, delay_penalty)  # ensure yield doesn’t go negative/unrealistic
 
-    adjusted_predicted = float(predicted) * delay_penalty
-
-    # Compute irrigation
+def _what_if_irrigation(crop, area, pincode):
     try:
         from app.models.pydantic_schemas import IrrigationProfile
         irrigation_profile = IrrigationProfile(crop=crop, farmArea=area, location=pincode or "000000")
-        irrigation = calculate_irrigation(irrigation_profile)
+        return calculate_irrigation(irrigation_profile)
     except Exception as e:
-        irrigation = {"error": f"Could not compute irrigation: {str(e)}"}
+        return {"error": f"Could not compute irrigation: {str(e)}"}
+
+
+def _what_if_result(request: WhatIfRequest, predicted, weather: dict, soil: dict, irrigation, fields=None) -> dict:
+    out = {"weather": weather, "soil": soil, "irrigation": irrigation, "input_overrides": request.dict(by_alias=True)}
+    if not wants(fields, "predicted_yield", "growth_curve"):
+        return select({k: out.get(k) for k in WHAT_IF_FIELDS if k in out}, fields)
+
+    # ✅ Post-hoc adjustments using penalty factors
+    sowing_delay = request.sowing_delay or 0
+    irrigation_delay = request.irrigation_delay or 0
+
+    # Apply multiplicative penalties instead of flat subtraction (floored at 0.2)
+    adjusted_predicted = float(predicted) * float(delay_penalty(sowing_delay, irrigation_delay))
 
     # ✅ Dynamic Growth curve
     import math, random
-    weeks = 10
+    weeks = 10 if wants(fields, "growth_curve") else 0
     growth_curve = []
     for i in range(1, weeks + 1):
         frac = 1 / (1 + math.exp(-0.8 * (i - weeks / 2)))  # logistic curve
@@ -111,11 +172,115 @@ def what_if_yield(request: WhatIfRequest):
         val = round(max(0.0, val), 2)
         growth_curve.append({"week": f"Week {i}", "yield": val})
 
+    out.update(predicted_yield=round(adjusted_predicted, 2), growth_curve=growth_curve)
+    return select({k: out[k] for k in WHAT_IF_FIELDS}, fields)
+
+
+def what_if_yield(request: WhatIfRequest, fields=None):
+    """What-if result; with `fields` (WHAT_IF_FIELDS) only those parts are computed."""
+    need_model = wants(fields, "predicted_yield", "growth_curve")
+    ctx = _scenario_context(request.crop, request.pincode, request.area_ha,
+                            fetch=need_model or wants(fields, "weather", "soil"))
+    inputs = _what_if_inputs(request, ctx)
+
+    # Predict baseline
+    predicted = predict_row(**inputs) if need_model else None
+
+    # Compute irrigation
+    irrigation = None
+    if wants(fields, "irrigation"):
+        irrigation = _what_if_irrigation(ctx["crop"], ctx["area"], ctx["pincode"])
+    return _what_if_result(request, predicted, ctx["weather"], ctx["soil"], irrigation, fields)
+
+
+async def _skipped():
+    return None
+
+
+async def what_if_yield_async(request: WhatIfRequest, fields=None):
+    """what_if_yield for async endpoints: the model call and irrigation run concurrently, off the event loop."""
+    loop = asyncio.get_running_loop()
+    need_model = wants(fields, "predicted_yield", "growth_curve")
+    ctx = await loop.run_in_executor(None, partial(
+        _scenario_context, request.crop, request.pincode, request.area_ha,
+        fetch=need_model or wants(fields, "weather", "soil"),
+    ))
+    inputs = _what_if_inputs(request, ctx)
+    predicted, irrigation = await asyncio.gather(
+        predict_row_async(**inputs) if need_model else _skipped(),
+        loop.run_in_executor(None, _what_if_irrigation, ctx["crop"], ctx["area"], ctx["pincode"])
+        if wants(fields, "irrigation") else _skipped(),
+    )
+    return _what_if_result(request, predicted, ctx["weather"], ctx["soil"], irrigation, fields)
+
+
+def _axis_values(axis, default: float) -> np.ndarray:
+    if axis is None:
+        return np.array([default], dtype=float)
+    if axis.values:
+        return np.asarray(axis.values, dtype=float)
+    if axis.start is None or axis.stop is None:
+        raise ValueError("Sweep axis needs either 'values' or 'start' and 'stop'")
+    return np.linspace(axis.start, axis.stop, axis.steps)
+
+
+def what_if_sweep(request: WhatIfSweepRequest) -> dict:
+    """
+    Expand the swept overrides into a scenario grid and score it with one
+    batched model call. Weather/soil axes go through the model; delay axes
+    are applied afterwards as a broadcast penalty, so the model only sees
+    the weather x soil sub-grid.
+
+    Returns a response surface: `yield` is a nested list indexed in
+    `axis_order`, with the axis coordinates in `axes`.
+    """
+    ctx = _scenario_context(request.crop, request.pincode, request.area_ha)
+    base = feature_row(
+        state=(ctx["profile"].get("state") if ctx["profile"] else "Unknown"),
+        district=(ctx["profile"].get("district") if ctx["profile"] else "Unknown"),
+        crop=ctx["crop"],
+        season=request.season or "Kharif",
+        crop_year=2024,
+        area=ctx["area"],
+        production=0.0,
+        weather=ctx["weather"],
+        soil=ctx["soil"],
+    )
+
+    axes = {name: _axis_values(getattr(request, name), base[col]) for name, col in SWEEP_MODEL_AXES.items()}
+    axes.update({name: _axis_values(getattr(request, name), 0.0) for name in SWEEP_DELAY_AXES})
+    shape = tuple(len(v) for v in axes.values())
+    n_scenarios = int(np.prod(shape))
+    if n_scenarios > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Sweep has {n_scenarios} scenarios; limit is {MAX_SWEEP_SCENARIOS}")
+
+    # One model row per weather/soil combination
+    grids = np.meshgrid(*(axes[name] for name in SWEEP_MODEL_AXES), indexing="ij")
+    n_rows = grids[0].size
+    df = pd.DataFrame([base]).iloc[np.zeros(n_rows, dtype=int)].reset_index(drop=True)
+    for col, grid in zip(SWEEP_MODEL_AXES.values(), grids):
+        df[col] = grid.ravel()
+    model_yield = predict_frame(df).reshape(grids[0].shape)
+
+    # Broadcast delay penalties over the last two axes
+    penalty = delay_penalty(axes["sowing_delay"][:, None], axes["irrigation_delay"][None, :])
+    surface = np.round(model_yield[..., None, None] * penalty, 2)
+
+    best = np.unravel_index(int(np.argmax(surface)), surface.shape)
     return {
-        "predicted_yield": round(adjusted_predicted, 2),
-        "weather": weather,
-        "soil": soil,
-        "irrigation": irrigation,
-        "growth_curve": growth_curve,
-        "input_overrides": request.dict(by_alias=True)
+        "crop": ctx["crop"],
+        "area_ha": ctx["area"],
+        "season": request.season or "Kharif",
+        "weather": ctx["weather"],
+        "soil": ctx["soil"],
+        "axis_order": list(axes),
+        "axes": {name: np.round(v, 3).tolist() for name, v in axes.items()},
+        "shape": list(shape),
+        "yield": surface.tolist(),
+        "best": {
+            "predicted_yield": float(surface[best]),
+            **{name: float(axes[name][i]) for name, i in zip(axes, best)},
+        },
+        "scenarios": n_scenarios,
+        "model_rows": n_rows,
     }
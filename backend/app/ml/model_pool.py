@@ -0,0 +1,186 @@
+# app/ml/model_pool.py
+"""
+Process pool for CPU-bound yield-model work.
+
+With MODEL_POOL_WORKERS > 0, every uncached model call (predict_yield,
+micro-batches, Monte Carlo / sweep grids) runs in worker processes instead
+of the API process, so heavy batches no longer hold the GIL that request
+handling needs. Each worker loads the model once (initializer) and gets
+its rows as plain numpy buffers (float64 features + fixed-width unicode
+categoricals); large batches are split into one chunk per worker.
+
+CatBoost thread_count is coordinated with the pool size: every worker (and
+the API process) predicts with MODEL_POOL_THREADS threads, by default
+cpu_count // workers, so workers x threads never exceeds the cores.
+
+Env:
+  MODEL_POOL_WORKERS     worker processes (0 = predict in-process, the default)
+  MODEL_POOL_THREADS     CatBoost threads per worker (default: cores // workers)
+  MODEL_POOL_MIN_CHUNK   smallest chunk a batch is split into
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+POOL_WORKERS = int(os.getenv("MODEL_POOL_WORKERS", "0"))
+CPU_COUNT = os.cpu_count() or 1
+WORKER_THREADS = int(os.getenv("MODEL_POOL_THREADS", str(max(1, CPU_COUNT // max(POOL_WORKERS, 1)))))
+MIN_CHUNK = int(os.getenv("MODEL_POOL_MIN_CHUNK", "2048"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "chunks": 0, "rows": 0, "busy_ms": 0.0, "restarts": 0}
+
+
+def enabled() -> bool:
+    return POOL_WORKERS > 0
+
+
+# ---------- Worker side ----------
+def _init_worker(threads: int, model_path, numpy_model_path):
+    from app.ml import predict_yield
+
+    predict_yield.PREDICT_THREADS = threads
+    # the artifacts the API process serves, not whatever this process's env resolves to
+    predict_yield.MODEL_PATH, predict_yield.NUMPY_MODEL_PATH = model_path, numpy_model_path
+    # load once per process: numpy export if it serves, else the CatBoost .pkl
+    if predict_yield._numpy_backend() is None and predict_yield.MODEL_PATH.exists():
+        predict_yield._ensure_model()
+
+
+def _predict_buffers(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    from app.ml import predict_yield
+    return predict_yield._predict_model(num, cat.astype(object))
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# ---------- API side ----------
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from app.ml import predict_yield
+
+            predict_yield.PREDICT_THREADS = WORKER_THREADS   # in-process fallbacks share the budget
+            _pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),   # no forking of server threads
+                initializer=_init_worker,
+                initargs=(WORKER_THREADS, predict_yield.MODEL_PATH, predict_yield.NUMPY_MODEL_PATH),
+            )
+        return _pool
+
+
+def _restart(broken: ProcessPoolExecutor):
+    """Drop the pool that broke; a no-op when another caller already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is not broken:
+            return   # shutting down the fresh pool would cancel its callers' futures
+        broken.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    with _stats_lock:
+        _stats["restarts"] += 1
+
+
+def warm_up():
+    """Start every worker (and load its model) ahead of the first request."""
+    if enabled():
+        pool = _get_pool()
+        for f in [pool.submit(_ping) for _ in range(POOL_WORKERS)]:
+            f.result()
+
+
+def _submit(pool: ProcessPoolExecutor, num: np.ndarray, cat: np.ndarray) -> list:
+    """One pool Future per chunk of the encoded rows."""
+    n = len(num)
+    size = max(MIN_CHUNK, math.ceil(n / POOL_WORKERS))
+    # compact buffers: contiguous float64 and fixed-width unicode instead of Python objects
+    num = np.ascontiguousarray(num, dtype=np.float64)
+    cat = np.asarray(cat).astype(str)
+    return [pool.submit(_predict_buffers, num[i:i + size], cat[i:i + size]) for i in range(0, n, size)]
+
+
+def _record(n: int, chunks: int, started: float):
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["chunks"] += chunks
+        _stats["rows"] += n
+        _stats["busy_ms"] += (time.perf_counter() - started) * 1000
+
+
+def predict(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    """Uncached model predictions for encoded rows, computed in the worker processes."""
+    if len(num) == 0:
+        return np.empty(0)
+    started = time.perf_counter()
+    for attempt in (0, 1):
+        pool = _get_pool()
+        try:
+            futures = _submit(pool, num, cat)
+            out = np.concatenate([f.result() for f in futures])
+            break
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM): start a fresh pool and retry once
+            print("❌ Model pool broken; restarting")
+            _restart(pool)
+            if attempt:
+                raise
+    _record(len(num), len(futures), started)
+    return out
+
+
+async def predict_async(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    """predict() for the event loop: the pool's futures are awaited, no thread waits on them."""
+    if len(num) == 0:
+        return np.empty(0)
+    started = time.perf_counter()
+    for attempt in (0, 1):
+        pool = _get_pool()
+        try:
+            futures = _submit(pool, num, cat)
+            out = np.concatenate(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures)))
+            break
+        except BrokenProcessPool:
+            print("❌ Model pool broken; restarting")
+            _restart(pool)
+            if attempt:
+                raise
+    _record(len(num), len(futures), started)
+    return out
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def get_stats() -> dict:
+    with _stats_lock:
+        calls = _stats["calls"]
+        return {
+            "enabled": enabled(),
+            "workers": POOL_WORKERS,
+            "threads_per_worker": WORKER_THREADS,
+            "cpu_count": CPU_COUNT,
+            "started": _pool is not None,
+            "calls": calls,
+            "chunks": _stats["chunks"],
+            "rows": _stats["rows"],
+            "avg_call_ms": round(_stats["busy_ms"] / calls, 2) if calls else None,
+            "restarts": _stats["restarts"],
+        }
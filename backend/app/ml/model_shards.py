@@ -0,0 +1,262 @@
+# app/ml/model_shards.py
+"""
+Per-crop yield model shards.
+
+    python -m app.ml.model_shards [--data CSV] [--groups JSON] [--min-rows 2000]
+                                  [--threads N] [--train-dir DIR]
+
+Training fits one CatBoost model per crop (or per crop group from --groups,
+a JSON {"group": ["Rice", "Wheat", ...]}) with train_yield's parameters and
+train/test split, and exports each as a numpy model to artifacts/shards/.
+Crops with fewer than --min-rows rows get no shard and keep using the global
+yield_model (which must already exist; it is the fallback). The manifest
+records, per shard, holdout accuracy and numpy per-row latency of the shard
+next to the global model's on the same rows.
+
+Serving (YIELD_MODEL_SHARDS=1): predict_yield routes rows by Crop. Shards
+load on first use and the least recently used ones are unloaded when the
+loaded arrays exceed YIELD_SHARD_MEMORY_MB.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app.ml import numpy_model
+from app.ml.features import CAT_COLS
+
+SHARD_DIR = Path(__file__).resolve().parent / "artifacts" / "shards"
+MANIFEST_PATH = SHARD_DIR / "manifest.json"
+
+SHARDS_ENABLED = os.getenv("YIELD_MODEL_SHARDS", "0") == "1"
+MEMORY_BUDGET_MB = float(os.getenv("YIELD_SHARD_MEMORY_MB", "256"))
+MIN_ROWS = int(os.getenv("YIELD_SHARD_MIN_ROWS", "2000"))
+
+_CROP = CAT_COLS.index("Crop")
+_lock = threading.Lock()
+_loaded: "OrderedDict[str, dict]" = OrderedDict()
+_state = {"stamp": None, "manifest": None, "bytes": 0, "loads": 0, "evictions": 0, "rows": {}}
+
+
+def crop_key(crop) -> str:
+    return str(crop).strip().casefold()
+
+
+def _file_name(shard: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", shard.casefold()).strip("_") + ".npz"
+
+
+def model_nbytes(m: dict) -> int:
+    return sum(v.nbytes for v in m.values() if isinstance(v, np.ndarray))
+
+
+# ---------- Serving ----------
+def manifest_stamp():
+    try:
+        st = MANIFEST_PATH.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _manifest():
+    """Current manifest (None when there are no shards); a rewritten manifest unloads every shard."""
+    stamp = manifest_stamp()
+    if _state["stamp"] != stamp:
+        manifest = None
+        if stamp is not None:
+            with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        _loaded.clear()
+        _state.update(stamp=stamp, manifest=manifest, bytes=0)
+    return _state["manifest"]
+
+
+def _get_shard(name: str, manifest: dict) -> dict:
+    """Loaded shard model; loads it and evicts least recently used ones over the memory budget."""
+    m = _loaded.get(name)
+    if m is not None:
+        _loaded.move_to_end(name)
+        return m
+    m = numpy_model.load_model(SHARD_DIR / manifest["shards"][name]["file"])
+    _loaded[name] = m
+    _state["bytes"] += model_nbytes(m)
+    _state["loads"] += 1
+    budget = MEMORY_BUDGET_MB * 1024 * 1024
+    while _state["bytes"] > budget and len(_loaded) > 1:
+        _, old = _loaded.popitem(last=False)
+        _state["bytes"] -= model_nbytes(old)
+        _state["evictions"] += 1
+    return m
+
+
+def enabled() -> bool:
+    return SHARDS_ENABLED and manifest_stamp() is not None
+
+
+def predict(num: np.ndarray, cat: np.ndarray, fallback: Callable) -> np.ndarray:
+    """Route encoded rows to their crop's shard; rows without one go to fallback(num, cat)."""
+    out = np.empty(len(num))
+    rest = []
+    with _lock:
+        manifest = _manifest()
+        routes = manifest["crops"] if manifest else {}
+        groups = {}
+        for i, crop in enumerate(cat[:, _CROP].tolist()):
+            groups.setdefault(routes.get(crop_key(crop)), []).append(i)
+        for shard, rows in groups.items():
+            if shard is None:
+                rest = rows
+                continue
+            idx = np.asarray(rows)
+            out[idx] = numpy_model.predict(_get_shard(shard, manifest), num[idx], cat[idx])
+            _state["rows"][shard] = _state["rows"].get(shard, 0) + len(rows)
+    if rest:
+        idx = np.asarray(rest)
+        out[idx] = fallback(num[idx], cat[idx])
+    return out
+
+
+def get_stats() -> dict:
+    with _lock:
+        manifest = _manifest() if SHARDS_ENABLED else None
+        return {
+            "enabled": SHARDS_ENABLED,
+            "shards": len(manifest["shards"]) if manifest else 0,
+            "loaded": list(_loaded),
+            "loaded_mb": round(_state["bytes"] / 1024 / 1024, 1),
+            "memory_budget_mb": MEMORY_BUDGET_MB,
+            "loads": _state["loads"],
+            "evictions": _state["evictions"],
+            "rows": dict(_state["rows"]),
+        }
+
+
+# ---------- Training ----------
+def build(
+    data_path=None,
+    *,
+    groups: dict = None,
+    min_rows: int = MIN_ROWS,
+    thread_count: int = None,
+    train_dir: Path = None,
+) -> dict:
+    """Train and export one shard per crop / crop group; returns the manifest."""
+    import joblib
+    from catboost import CatBoostRegressor
+    from sklearn.model_selection import train_test_split
+    from app.ml import features, train_yield
+    from app.ml.compact_model import numpy_latency
+    from app.ml.predict_yield import model_paths
+
+    global_pkl, global_npz = model_paths()
+    if not global_pkl.exists():
+        raise RuntimeError("❌ Global model not trained (it is the shard fallback). Run train_yield.py first.")
+    thread_count = train_yield.THREAD_COUNT if thread_count is None else thread_count
+    train_dir = train_dir or train_yield.TRAIN_DIR
+    meta = train_yield.read_meta()
+    params = {**train_yield.PARAMS, **meta.get("params", {}), "verbose": 0}
+
+    X, y = train_yield.prepare_training_frame(
+        data_path or meta.get("data_path") or train_yield.DATA_PATH,
+        train_yield.model_context(meta),
+        weather_store=meta.get("weather_store", True),
+    )
+    # train_yield's split, so no shard (and not the global model) has seen the holdout rows
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    is_test = np.zeros(len(X), dtype=bool)
+    is_test[test_idx] = True
+
+    # 🔹 crop -> shard name (a group, or the crop itself)
+    group_of = {crop_key(c): g for g, crops in (groups or {}).items() for c in crops}
+    keys = X["Crop"].astype(str).map(crop_key).to_numpy()
+    shard_of_row = np.array([group_of.get(k, k) for k in keys], dtype=object)
+    names, counts = np.unique(shard_of_row, return_counts=True)
+    shard_names = [n for n, c in zip(names, counts) if c >= min_rows]
+
+    full = joblib.load(global_pkl)
+    full_np = numpy_model.load_model(global_npz)
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+    shards, crops = {}, {}
+    for name in shard_names:
+        rows = shard_of_row == name
+        X_tr, y_tr = X[rows & ~is_test], y[rows & ~is_test]
+        X_te, y_te = X[rows & is_test], y[rows & is_test]
+        if len(X_te) == 0:
+            continue
+
+        started = time.perf_counter()
+        model = CatBoostRegressor(**params, thread_count=thread_count, train_dir=str(train_dir))
+        model.fit(X_tr, y_tr, eval_set=(X_te, y_te), cat_features=CAT_COLS)
+        fit_seconds = time.perf_counter() - started
+        path = numpy_model.export_model(model, X[rows], SHARD_DIR / _file_name(name))
+        m = numpy_model.load_model(path)
+
+        num, cat = features.encode_frame(X_te.iloc[:1000])
+        shards[name] = {
+            "file": path.name,
+            "crops": sorted({k for k in np.unique(keys[rows])}),
+            "rows": int(rows.sum()),
+            "trees": int(model.tree_count_),
+            "npz_bytes": path.stat().st_size,
+            "memory_bytes": model_nbytes(m),
+            "fit_seconds": round(fit_seconds, 1),
+            "shard": {**train_yield._metrics(y_te, model.predict(X_te)), **numpy_latency(m, num, cat)},
+            "global": {**train_yield._metrics(y_te, full.predict(X_te)), **numpy_latency(full_np, num, cat)},
+        }
+        crops.update({k: name for k in shards[name]["crops"]})
+
+    covered = np.isin(shard_of_row, list(shards))
+    manifest = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "min_rows": min_rows,
+        "groups": groups or {},
+        "fallback_rows": int((~covered).sum()),
+        "global": {"npz_bytes": global_npz.stat().st_size, "memory_bytes": model_nbytes(full_np)},
+        "crops": crops,
+        "shards": shards,
+    }
+    # drop shard files that are no longer referenced
+    for f in SHARD_DIR.glob("*.npz"):
+        if f.name not in {s["file"] for s in shards.values()}:
+            f.unlink()
+    tmp = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+    print(f"\n{'shard':<16} {'rows':>8} {'trees':>5} {'KB':>6} {'rmse':>9} {'global':>9} "
+          f"{'1-row ms':>9} {'global':>7}")
+    for name, s in shards.items():
+        print(f"{name:<16} {s['rows']:>8,} {s['trees']:>5} {s['memory_bytes'] / 1024:>6.0f} "
+              f"{s['shard']['rmse']:>9.4f} {s['global']['rmse']:>9.4f} "
+              f"{s['shard']['row_latency_ms']:>9.3f} {s['global']['row_latency_ms']:>7.3f}")
+    print(f"💾 {len(shards)} shards -> {SHARD_DIR} | {manifest['fallback_rows']:,} rows use the global model "
+          f"(serve with YIELD_MODEL_SHARDS=1)")
+    return manifest
+
+
+if __name__ == "__main__":
+    from app.ml import train_yield
+
+    ap = argparse.ArgumentParser(description="Train per-crop yield model shards")
+    ap.add_argument("--data", type=Path, help="crop dataset CSV (default: the one the global model was trained on)")
+    ap.add_argument("--groups", type=Path, help='JSON {"group": ["Rice", "Wheat"], ...} (default: one shard per crop)')
+    ap.add_argument("--min-rows", type=int, default=MIN_ROWS, help="smaller crops/groups use the global model")
+    ap.add_argument("--threads", type=int, default=train_yield.THREAD_COUNT, help="CatBoost thread_count")
+    ap.add_argument("--train-dir", type=Path, default=train_yield.TRAIN_DIR, help="CatBoost train_dir (logs)")
+    args = ap.parse_args()
+
+    groups = None
+    if args.groups:
+        with open(args.groups, "r", encoding="utf-8") as f:
+            groups = json.load(f)
+    build(args.data, groups=groups, min_rows=args.min_rows, thread_count=args.threads, train_dir=args.train_dir)
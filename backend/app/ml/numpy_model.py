@@ -0,0 +1,419 @@
+# app/ml/numpy_model.py
+"""
+Pure-NumPy evaluator for the CatBoost yield model.
+
+export_model() dumps the trained model's oblivious trees, float borders, the
+{category value -> hash} vocabulary and the CTR (target statistics) tables
+into one compressed .npz; load_model() + predict() score feature matrices
+with numpy alone, so serving does not need to import catboost.
+
+Evaluation follows CatBoost's own python export:
+  * every float / one-hot / CTR feature is quantized once into a small bin
+    index; a tree split is `bin >= threshold` (or `bin == value` for one-hot)
+  * categorical strings map to CatBoost's 32-bit hashes through the exported
+    vocabulary; unseen values get the same sentinel CatBoost's exporter uses
+  * each CTR projection hashes its categorical values, binarized float
+    conditions and one-hot equalities into one uint64, looks it up in the
+    learn-time table and turns the counts into (ctr + shift) * scale with
+    the ctr's prior
+  * leaf indices are built one depth level at a time for all trees at once
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+NUMPY_MODEL_PATH = Path(__file__).resolve().parent / "artifacts" / "yield_model.npz"
+
+UNKNOWN_CAT_HASH = 0x7FFFFFFF          # CatBoost python export: hash of an unseen category
+NO_HASH = 2 ** 40                       # padding for one-hot values (never a 32-bit hash)
+EMPTY_SLOT = 0xFFFFFFFFFFFFFFFF         # empty bucket marker in CatBoost's CTR hash maps
+MAGIC_MULT = np.uint64(0x4906BA494954CB65)
+ROW_CHUNK = 4096                        # rows per evaluation chunk (bounds temp memory)
+SMALL_BATCH = 64                        # below this, plain dict lookups beat factorize
+
+ELEM_PAD, ELEM_CAT, ELEM_FLOAT, ELEM_EXACT = 0, 1, 2, 3
+CTR_TYPES = ("Borders", "Buckets", "Counter", "FeatureFreq")
+
+
+# ---------- Export (needs catboost) ----------
+def _signed32(v) -> int:
+    """CatBoost hashes are ui32 in some dumps and i32 in others; normalize to i32."""
+    return ((int(v) + 2 ** 31) % 2 ** 32) - 2 ** 31
+
+
+def _padded(rows: list, width: int, fill, dtype) -> np.ndarray:
+    out = np.full((len(rows), max(width, 1)), fill, dtype=dtype)
+    for i, r in enumerate(rows):
+        out[i, :len(r)] = r
+    return out
+
+
+def _compile(spec: dict, feature_names: list) -> Dict[str, np.ndarray]:
+    """Flatten CatBoost's JSON model dump into numpy arrays + a small JSON header."""
+    info = spec["features_info"]
+    float_feats = sorted(info.get("float_features", []), key=lambda f: f["feature_index"])
+    cat_feats = sorted(info.get("categorical_features", []), key=lambda f: f["feature_index"])
+    onehot_feats = [c for c in cat_feats if c.get("values")]
+    ctr_feats = info.get("ctrs", [])
+    n_float, n_onehot, n_ctr = len(float_feats), len(onehot_feats), len(ctr_feats)
+
+    # Quantized column layout: [float bins | one-hot codes | ctr bins | constant 0]
+    # Trees refer to CatBoost's global split_index (float borders, one-hot
+    # values, then ctr borders, in that order); map each to (column, threshold, eq)
+    split_col, split_thr, split_eq = [], [], []
+    for j, f in enumerate(float_feats):
+        for b in range(len(f.get("borders", []))):
+            split_col.append(j); split_thr.append(b + 1); split_eq.append(False)
+    for j, c in enumerate(onehot_feats):
+        for v in range(len(c["values"])):
+            split_col.append(n_float + j); split_thr.append(v + 1); split_eq.append(True)
+    for k, c in enumerate(ctr_feats):
+        for b in range(len(c.get("borders", []))):
+            split_col.append(n_float + n_onehot + k); split_thr.append(b + 1); split_eq.append(False)
+    zero_col = n_float + n_onehot + n_ctr
+
+    # CTR tables, one per projection (shared by ctrs that differ only in prior/type)
+    proj_index, proj_elems, tables = {}, [], []
+    ctr_rows = []
+    for c in ctr_feats:
+        if c["ctr_type"] not in CTR_TYPES:
+            raise NotImplementedError(f"❌ CTR type '{c['ctr_type']}' is not supported by the numpy evaluator")
+        key = c["identifier"]
+        if key not in proj_index:
+            cats, floats, exact = [], [], []
+            for e in c["elements"]:
+                if e["combination_element"] == "cat_feature_value":
+                    cats.append((ELEM_CAT, e["cat_feature_index"], 0.0))
+                elif e["combination_element"] == "float_feature":
+                    floats.append((ELEM_FLOAT, e["float_feature_index"], e["border"]))
+                elif e["combination_element"] == "cat_feature_exact_value":
+                    # one-hot condition `hash == value` (int32 hash, exact as float)
+                    exact.append((ELEM_EXACT, e["cat_feature_index"], float(_signed32(e["value"]))))
+                else:
+                    raise NotImplementedError(f"❌ CTR element '{e['combination_element']}' is not supported")
+
+            data = spec["ctr_data"][key]
+            stride, flat = data["hash_stride"], data["hash_map"]
+            entries = [
+                (int(flat[i]), flat[i + 1:i + stride]) for i in range(0, len(flat), stride)
+                if int(flat[i]) != EMPTY_SLOT
+            ]
+            entries.sort(key=lambda e: e[0])
+            proj_index[key] = len(proj_elems)
+            proj_elems.append(cats + floats + exact)  # CatBoost's hashing order: cats, floats, one-hot
+            tables.append((entries, stride - 1, data.get("counter_denominator", 0)))
+        ctr_rows.append((proj_index[key], c))
+
+    width = max((t[1] for t in tables), default=1)
+    table_offset = np.zeros(len(tables) + 1, dtype=np.int64)
+    for p, (entries, _, _) in enumerate(tables):
+        table_offset[p + 1] = table_offset[p] + len(entries)
+    table_hash = np.zeros(int(table_offset[-1]), dtype=np.uint64)
+    table_stats = np.zeros((int(table_offset[-1]), width))
+    for p, (entries, n_stats, _) in enumerate(tables):
+        for i, (h, st) in enumerate(entries):
+            table_hash[table_offset[p] + i] = h
+            table_stats[table_offset[p] + i, :n_stats] = st
+
+    # Per-ctr linear read-out of the bucket stats: good = s . good_w, total = s . total_w (+ const)
+    good_w, total_w, total_const = np.zeros((n_ctr, width)), np.zeros((n_ctr, width)), np.zeros(n_ctr)
+    for k, (p, c) in enumerate(ctr_rows):
+        n_stats, idx = tables[p][1], c.get("target_border_idx", 0)
+        if c["ctr_type"] == "Borders":
+            good_w[k, idx + 1:n_stats] = 1; total_w[k, :n_stats] = 1
+        elif c["ctr_type"] == "Buckets":
+            good_w[k, idx] = 1; total_w[k, :n_stats] = 1
+        else:  # Counter / FeatureFreq: count over the table's denominator
+            good_w[k, 0] = 1; total_const[k] = tables[p][2]
+
+    # Trees, padded to the max depth with an always-false split on the zero column
+    trees = spec["oblivious_trees"]
+    depth = max((len(t["splits"]) for t in trees), default=0)
+    tree_col = np.full((len(trees), depth), zero_col, dtype=np.int32)
+    # bins fit uint8 unless a feature has more than 255 borders / one-hot values
+    bin_dtype = np.uint8 if max(split_thr, default=0) < 256 else np.uint16
+    tree_thr = np.ones((len(trees), depth), dtype=bin_dtype)
+    tree_eq = np.zeros((len(trees), depth), dtype=bool)
+    leaf_values = np.zeros((len(trees), 1 << depth))
+    for t_idx, t in enumerate(trees):
+        for d, s in enumerate(t["splits"]):
+            i = s["split_index"]
+            tree_col[t_idx, d], tree_thr[t_idx, d], tree_eq[t_idx, d] = split_col[i], split_thr[i], split_eq[i]
+        leaf_values[t_idx, :len(t["leaf_values"])] = t["leaf_values"]
+
+    scale, bias = spec.get("scale_and_bias", [1.0, [0.0]])
+    bias = bias[0] if isinstance(bias, list) else bias
+
+    vocab = info.get("cat_features_hash", [])
+    header = {
+        "feature_names": feature_names,
+        "float_features": [
+            {"name": f.get("feature_name") or feature_names[f["flat_feature_index"]],
+             "nan_as_true": f.get("nan_value_treatment") == "AsTrue"}
+            for f in float_feats
+        ],
+        "cat_features": [c.get("feature_name") or feature_names[c["flat_feature_index"]] for c in cat_feats],
+        "onehot_features": [c["feature_index"] for c in onehot_feats],
+        "scale": scale,
+        "bias": bias,
+    }
+    max_elems = max((len(e) for e in proj_elems), default=0)
+    return {
+        "header": np.array(json.dumps(header)),
+        "vocab_values": np.array([v["value"] for v in vocab], dtype=str),
+        "vocab_hashes": np.array([_signed32(v["hash"]) for v in vocab], dtype=np.int64),
+        "float_borders": _padded([f.get("borders", []) for f in float_feats],
+                                 max((len(f.get("borders", [])) for f in float_feats), default=0), np.inf, float),
+        "onehot_values": _padded([[_signed32(v) for v in c["values"]] for c in onehot_feats],
+                                 max((len(c["values"]) for c in onehot_feats), default=0), NO_HASH, np.int64),
+        "proj_kind": _padded([[e[0] for e in el] for el in proj_elems], max_elems, ELEM_PAD, np.int8),
+        "proj_index": _padded([[e[1] for e in el] for el in proj_elems], max_elems, 0, np.int32),
+        "proj_border": _padded([[e[2] for e in el] for el in proj_elems], max_elems, 0.0, float),
+        "table_offset": table_offset,
+        "table_hash": table_hash,
+        "table_stats": table_stats,
+        "ctr_proj": np.array([p for p, _ in ctr_rows], dtype=np.int32),
+        "ctr_good_w": good_w,
+        "ctr_total_w": total_w,
+        "ctr_total_const": total_const,
+        "ctr_prior": np.array([[c["prior_numerator"], c["prior_denomerator"]] for _, c in ctr_rows], dtype=float).reshape(-1, 2),
+        "ctr_shift_scale": np.array([[c["shift"], c["scale"]] for _, c in ctr_rows], dtype=float).reshape(-1, 2),
+        "ctr_borders": _padded([c.get("borders", []) for c in ctr_feats],
+                               max((len(c.get("borders", [])) for c in ctr_feats), default=0), np.inf, float),
+        "tree_col": tree_col,
+        "tree_thr": tree_thr,
+        "tree_eq": tree_eq,
+        "leaf_values": leaf_values,
+    }
+
+
+def export_model(model, X: pd.DataFrame, path: Path = NUMPY_MODEL_PATH) -> Path:
+    """
+    Dump a fitted CatBoostRegressor to `path` (.npz). `X` must be (a sample of)
+    the training frame: CatBoost keeps only hashes, so the category vocabulary
+    comes from the values seen there.
+    """
+    from catboost import Pool
+
+    feature_names = list(model.feature_names_)
+    cat_cols = [feature_names[i] for i in model.get_cat_feature_indices()]
+    X = X[feature_names].copy()
+    for c in cat_cols:
+        X[c] = X[c].fillna("Unknown").astype(str)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "model.json"
+        model.save_model(str(json_path), format="json", pool=Pool(X, cat_features=cat_cols))
+        with open(json_path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+
+    arrays = _compile(spec, feature_names)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".part.npz")
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    print(f"💾 NumPy model exported: {path} ({path.stat().st_size / 1024:.0f} KB)")
+    return path
+
+
+# ---------- Serving (numpy only) ----------
+def _ctr_entry_bins(m: dict):
+    """
+    A CTR value depends only on which table entry a row hits, so quantize
+    every (ctr, entry) pair once: flat bins, one segment per ctr of
+    len(table) + 1 slots (last slot = not found, i.e. prior only).
+    """
+    offsets, stats = m["table_offset"], m["table_stats"]
+    prior, shift_scale, borders = m["ctr_prior"], m["ctr_shift_scale"], m["ctr_borders"]
+    segments, base, size = [], [], 0
+    for k, p in enumerate(m["ctr_proj"]):
+        s = np.vstack([stats[offsets[p]:offsets[p + 1]], np.zeros((1, stats.shape[1]))])
+        good = s @ m["ctr_good_w"][k]
+        total = s @ m["ctr_total_w"][k] + m["ctr_total_const"][k] * (np.arange(len(s)) < len(s) - 1)
+        ctr = ((good + prior[k, 0]) / (total + prior[k, 1]) + shift_scale[k, 0]) * shift_scale[k, 1]
+        base.append(size)
+        segments.append(np.searchsorted(borders[k], ctr, side="left").astype(m["tree_thr"].dtype))  # borders < ctr
+        size += len(ctr)
+    flat = np.concatenate(segments) if segments else np.zeros(0, dtype=m["tree_thr"].dtype)
+    return flat, np.array(base, dtype=np.int64)
+
+
+def load_model(path: Path = NUMPY_MODEL_PATH) -> dict:
+    with np.load(path, allow_pickle=False) as z:
+        m = {k: z[k] for k in z.files}
+    m["header"] = json.loads(str(m["header"]))
+    m["vocab"] = dict(zip(m["vocab_values"].tolist(), m["vocab_hashes"].tolist()))
+
+    # Derived lookup arrays (not stored)
+    n_trees, depth = m["tree_col"].shape
+    m["leaf_flat"] = m["leaf_values"].ravel()
+    m["leaf_offset"] = (np.arange(n_trees) << depth).astype(np.int64)
+    m["any_eq"] = bool(m["tree_eq"].any())
+    m["ctr_bins"], m["ctr_bin_base"] = _ctr_entry_bins(m)
+
+    # One global lookup for all CTR tables: key = hash ^ salt(projection), sorted.
+    # Exact as long as the salted keys are unique (checked here; else per-table search)
+    offsets = m["table_offset"]
+    entry_proj = np.repeat(np.arange(len(offsets) - 1, dtype=np.uint64), np.diff(offsets))
+    with np.errstate(over="ignore"):
+        key = m["table_hash"] ^ (entry_proj * MAGIC_MULT)
+    order = np.argsort(key, kind="stable")
+    m["lookup_key"], m["lookup_pos"] = key[order], order
+    m["lookup_unique"] = bool(len(key) == 0 or (np.diff(m["lookup_key"]) != 0).all())
+    kind = m["proj_kind"]
+    m["elem_steps"] = [
+        (np.flatnonzero(kind[:, e] != ELEM_PAD), np.flatnonzero(kind[:, e] == ELEM_CAT),
+         np.flatnonzero(kind[:, e] == ELEM_FLOAT), np.flatnonzero(kind[:, e] == ELEM_EXACT))
+        for e in range(kind.shape[1])
+    ]
+    return m
+
+
+def _hash_cats(m: dict, cat_values: np.ndarray) -> np.ndarray:
+    """[n, n_cat] strings -> CatBoost cat hashes as int64 (sign-extended, as in the python export)."""
+    vocab = m["vocab"]
+    n, n_cat = cat_values.shape
+    out = np.empty((n, n_cat), dtype=np.int64)
+    for j in range(n_cat):
+        col = cat_values[:, j]
+        if n <= SMALL_BATCH:
+            out[:, j] = [vocab.get(str(v), UNKNOWN_CAT_HASH) for v in col]
+        else:
+            codes, uniques = pd.factorize(col)
+            lut = np.array([vocab.get(str(u), UNKNOWN_CAT_HASH) for u in uniques] + [UNKNOWN_CAT_HASH], dtype=np.int64)
+            out[:, j] = lut[codes]
+    return out
+
+
+def _ctr_bins(m: dict, xt: np.ndarray, cat_t: np.ndarray) -> np.ndarray:
+    """[n_ctrs, n] quantized CTR features for one chunk (inputs are feature-major: [feature, row])."""
+    n = xt.shape[1]
+    n_proj = len(m["table_offset"]) - 1
+    elem_index, border = m["proj_index"], m["proj_border"]
+    cat_u64 = cat_t.view(np.uint64)
+
+    # Hash every projection at once, one element position at a time
+    h = np.zeros((n_proj, n), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for e, (active, cats, floats, exact) in enumerate(m["elem_steps"]):
+            vals = np.zeros((n_proj, n), dtype=np.uint64)
+            if len(cats):
+                vals[cats] = cat_u64[elem_index[cats, e]]
+            if len(floats):
+                vals[floats] = xt[elem_index[floats, e]] > border[floats, e][:, None]
+            if len(exact):
+                vals[exact] = cat_t[elem_index[exact, e]] == border[exact, e][:, None]
+            if len(active) == n_proj:
+                h = MAGIC_MULT * (h + MAGIC_MULT * vals)
+            else:
+                h[active] = MAGIC_MULT * (h[active] + MAGIC_MULT * vals[active])
+
+    # Table lookup: table_hash[pos] == h where found
+    table_hash = m["table_hash"]
+    if m["lookup_unique"] and len(table_hash):
+        with np.errstate(over="ignore"):
+            key = h ^ (np.arange(n_proj, dtype=np.uint64) * MAGIC_MULT)[:, None]
+        i = np.minimum(np.searchsorted(m["lookup_key"], key), len(table_hash) - 1)
+        pos = m["lookup_pos"][i]
+        found = m["lookup_key"][i] == key
+    else:
+        offsets = m["table_offset"]
+        pos = np.zeros((n_proj, n), dtype=np.int64)
+        found = np.zeros((n_proj, n), dtype=bool)
+        for p in range(n_proj):
+            lo, hi = offsets[p], offsets[p + 1]
+            if hi == lo:
+                continue
+            i = np.minimum(np.searchsorted(table_hash[lo:hi], h[p]), hi - lo - 1)
+            pos[p] = lo + i
+            found[p] = table_hash[lo + i] == h[p]
+
+    # Per-table slot (misses take the extra slot at the end), then the precomputed bin per ctr
+    offsets = m["table_offset"]
+    slot = np.where(found, pos - offsets[:-1, None], np.diff(offsets)[:, None])
+    return m["ctr_bins"][m["ctr_bin_base"][:, None] + slot[m["ctr_proj"]]]
+
+
+def _quantize(m: dict, xt: np.ndarray, cat_t: np.ndarray) -> np.ndarray:
+    """[float bins | one-hot codes | ctr bins | 0] x rows bin matrix the tree splits index into."""
+    n_float, n = xt.shape
+    onehot = m["header"]["onehot_features"]
+    n_ctr = len(m["ctr_proj"])
+    q = np.zeros((n_float + len(onehot) + n_ctr + 1, n), dtype=m["tree_thr"].dtype)
+
+    borders = m["float_borders"]
+    for j in range(n_float):
+        q[j] = np.searchsorted(borders[j], xt[j], side="left")   # number of borders < x
+    for j, c in enumerate(onehot):
+        match = cat_t[c][:, None] == m["onehot_values"][j]
+        q[n_float + j] = np.where(match.any(axis=1), match.argmax(axis=1) + 1, 0)
+    if n_ctr:
+        q[n_float + len(onehot):-1] = _ctr_bins(m, xt, cat_t)
+    return q
+
+
+def _predict_chunk(m: dict, xt: np.ndarray, cat_t: np.ndarray) -> np.ndarray:
+    q = _quantize(m, xt, cat_t)
+    tree_col, tree_thr, tree_eq = m["tree_col"], m["tree_thr"], m["tree_eq"]
+    leaf = np.zeros((tree_col.shape[0], xt.shape[1]), dtype=np.int64)
+    for d in range(tree_col.shape[1]):
+        b = q[tree_col[:, d]]                                 # [trees, n]
+        bit = b >= tree_thr[:, d, None]
+        if m["any_eq"]:
+            bit = np.where(tree_eq[:, d, None], b == tree_thr[:, d, None], bit)
+        leaf |= bit.astype(np.int64) << d
+    leaf += m["leaf_offset"][:, None]
+    return m["leaf_flat"][leaf].sum(axis=0)
+
+
+def predict(m: dict, float_X, cat_X) -> np.ndarray:
+    """
+    Score rows given as a float matrix [n, n_float] and a categorical matrix
+    [n, n_cat], both in the model's float/cat feature order (see header).
+    """
+    header = m["header"]
+    x = np.array(float_X, dtype=float, copy=True).reshape(-1, len(header["float_features"]))
+    n = len(x)
+    for j, f in enumerate(header["float_features"]):
+        nan = np.isnan(x[:, j])
+        if nan.any():
+            x[nan, j] = np.inf if f["nan_as_true"] else -np.inf
+    if header["cat_features"]:
+        cat_hash = _hash_cats(m, np.asarray(cat_X, dtype=object).reshape(n, -1))
+    else:
+        cat_hash = np.zeros((n, 0), dtype=np.int64)
+
+    # feature-major layout: every per-feature gather below selects contiguous rows
+    xt, cat_t = np.ascontiguousarray(x.T), np.ascontiguousarray(cat_hash.T)
+    total = np.empty(n)
+    for start in range(0, n, ROW_CHUNK):
+        sl = slice(start, start + ROW_CHUNK)
+        total[sl] = _predict_chunk(m, np.ascontiguousarray(xt[:, sl]), np.ascontiguousarray(cat_t[:, sl]))
+    return header["scale"] * total + header["bias"]
+
+
+def predict_frame(m: dict, df: pd.DataFrame) -> np.ndarray:
+    """Score a DataFrame with the model's column names (as predict_yield.feature_row)."""
+    header = m["header"]
+    float_X = df[[f["name"] for f in header["float_features"]]].to_numpy(dtype=float)
+    cat_X = df[header["cat_features"]].fillna("Unknown").astype(str).to_numpy(dtype=object)
+    return predict(m, float_X, cat_X)
+
+
+if __name__ == "__main__":
+    import argparse
+    import joblib
+
+    ap = argparse.ArgumentParser(description="Export the CatBoost yield model to a numpy .npz")
+    ap.add_argument("--model", default=str(Path(__file__).resolve().parent / "artifacts" / "yield_model.pkl"))
+    ap.add_argument("--data", required=True, help="CSV with the training feature columns (for the category vocabulary)")
+    ap.add_argument("--out", default=str(NUMPY_MODEL_PATH))
+    args = ap.parse_args()
+
+    export_model(joblib.load(args.model), pd.read_csv(args.data), Path(args.out))
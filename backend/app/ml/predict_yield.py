@@ -1,17 +1,143 @@
+import asyncio
+import os
+from functools import partial
 from pathlib import Path
 import joblib
+import numpy as np
 import pandas as pd
 
+from app.ml import batcher, features, model_pool, model_shards, numpy_model, prediction_cache
+from app.ml.features import CAT_COLS, NUM_COLS, feature_row  # re-exported for callers
+
+ARTIFACTS_DIR = Path(__file__).resolve().parent / "artifacts"
+
+# Serving variant written by compact_model.py (e.g. pruned / borders / distilled); empty = full model
+MODEL_VARIANT = os.getenv("YIELD_MODEL_VARIANT", "").strip()
+
+
+def model_paths(variant: str = "") -> tuple:
+    """(.pkl, .npz) artifact paths of a model variant ("" = the full training artifact)."""
+    stem = f"yield_model.{variant}" if variant else "yield_model"
+    return ARTIFACTS_DIR / f"{stem}.pkl", ARTIFACTS_DIR / f"{stem}.npz"
+
+
 # Path to trained model
-MODEL_PATH = Path(__file__).resolve().parent / "artifacts" / "yield_model.pkl"
+MODEL_PATH, NUMPY_MODEL_PATH = model_paths(MODEL_VARIANT)
+
+# auto = numpy export (yield_model.npz) when present and not older than the .pkl
+MODEL_BACKEND = os.getenv("YIELD_MODEL_BACKEND", "auto")  # auto | numpy | catboost
+_numpy_model = {"version": None, "model": None}
+_catboost_model = {"version": None, "model": None}
+
+# CatBoost predict threads (-1 = all cores); model_pool lowers it to its per-worker share
+PREDICT_THREADS = int(os.getenv("YIELD_PREDICT_THREADS", "-1"))
 
 def _ensure_model():
     """
-    Ensure that a trained model exists and load it.
+    Ensure that a trained model exists and load it (reloaded only when the .pkl changes).
     """
     if not MODEL_PATH.exists():
+        if MODEL_VARIANT:
+            raise RuntimeError(f"❌ Model variant '{MODEL_VARIANT}' not found. Run compact_model.py first.")
         raise RuntimeError("❌ Model not trained. Run train_yield.py first.")
-    return joblib.load(MODEL_PATH)
+    version = _artifact_stamp(MODEL_PATH)
+    if _catboost_model["version"] != version:
+        _catboost_model.update(version=version, model=joblib.load(MODEL_PATH))
+    return _catboost_model["model"]
+
+
+def _numpy_backend():
+    """The exported numpy model if it should serve this call, else None (use CatBoost)."""
+    if MODEL_BACKEND == "catboost" or not NUMPY_MODEL_PATH.exists():
+        return None
+    st = NUMPY_MODEL_PATH.stat()
+    if MODEL_BACKEND == "auto" and MODEL_PATH.exists() and MODEL_PATH.stat().st_mtime_ns > st.st_mtime_ns:
+        return None  # export is stale; retrained .pkl wins
+    version = (st.st_mtime_ns, st.st_size)
+    if _numpy_model["version"] != version:
+        _numpy_model.update(version=version, model=numpy_model.load_model(NUMPY_MODEL_PATH))
+    return _numpy_model["model"]
+
+
+def _numpy_layout_ok(m: dict) -> bool:
+    """True when the exported model's float/cat order is the feature spec's (so arrays pass straight through)."""
+    header = m["header"]
+    return [f["name"] for f in header["float_features"]] == NUM_COLS and header["cat_features"] == CAT_COLS
+
+
+def _artifact_stamp(path: Path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def model_version() -> tuple:
+    """Changes whenever a model artifact is rewritten (used to invalidate the prediction cache)."""
+    shards = model_shards.manifest_stamp() if model_shards.SHARDS_ENABLED else None
+    return (MODEL_BACKEND, MODEL_VARIANT, _artifact_stamp(MODEL_PATH), _artifact_stamp(NUMPY_MODEL_PATH), shards)
+
+
+def _predict_global(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    np_model = _numpy_backend()
+    if np_model is not None and _numpy_layout_ok(np_model):
+        return numpy_model.predict(np_model, num, cat)
+    df = features.to_frame(num, cat)
+    if np_model is not None:
+        return numpy_model.predict_frame(np_model, df)
+    return np.asarray(_ensure_model().predict(df, thread_count=PREDICT_THREADS), dtype=float)
+
+
+def _predict_model(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    """Model call in this process (what model_pool workers run)."""
+    # Per-crop shards (YIELD_MODEL_SHARDS=1) first; crops without a shard use the global model
+    if model_shards.enabled():
+        return model_shards.predict(num, cat, _predict_global)
+    return _predict_global(num, cat)
+
+
+def _predict_uncached(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    # MODEL_POOL_WORKERS > 0: model work runs in worker processes, off this process's GIL
+    if model_pool.enabled():
+        return model_pool.predict(num, cat)
+    return _predict_model(num, cat)
+
+
+def predict_arrays(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    """
+    Predict from encoded features (see features.encode_*): numeric [n, n_num],
+    categorical [n, n_cat]. Small batches go through the prediction cache.
+    """
+    return prediction_cache.predict(num, cat, _predict_uncached, model_version())
+
+
+def _predict_rows(rows: list) -> np.ndarray:
+    """Batcher entry point: rows were already looked up in the cache by predict_row."""
+    return _predict_uncached(*features.encode_rows(rows))
+
+
+def _batch_row(num: np.ndarray, cat: np.ndarray) -> dict:
+    row = dict(zip(NUM_COLS, num[0].tolist()))
+    row.update(zip(CAT_COLS, cat[0].tolist()))
+    return row
+
+
+def _predict_batched(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    return np.array([batcher.predict(_batch_row(num, cat))])
+
+
+async def _predict_batched_async(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    return np.array([await batcher.predict_async(_batch_row(num, cat))])
+
+
+def predict_frame(df: pd.DataFrame) -> np.ndarray:
+    """
+    Predict yield for every row of a feature DataFrame (columns as in
+    feature_row) with a single model call. With MODEL_POOL_WORKERS > 0 large
+    batches are split across the model pool's processes.
+    """
+    return predict_arrays(*features.encode_frame(df))
 
 
 def predict_row(
@@ -42,41 +168,36 @@ def predict_row(
     soil : dict
         Must contain pH, organic_carbon_pct, sand_pct, silt_pct, clay_pct
     """
+    row = feature_row(
+        state=state, district=district, crop=crop, season=season,
+        crop_year=crop_year, area=area, production=production,
+        weather=weather, soil=soil,
+    )
+    num, cat = features.encode_rows([row])
+    # Cache first; concurrent misses are stacked into one model.predict (app/ml/batcher.py)
+    predict_fn = _predict_batched if batcher.BATCHING_ENABLED else _predict_uncached
+    return float(prediction_cache.predict(num, cat, predict_fn, model_version())[0])
+
+
+# ---------- Async wrappers (await from async endpoints without blocking the event loop) ----------
+# With the model pool, misses await the pool's (or batcher's) futures directly, so no
+# thread is held per request; the in-process model still needs a thread to run on.
+async def predict_arrays_async(num: np.ndarray, cat: np.ndarray) -> np.ndarray:
+    if not model_pool.enabled():
+        return await asyncio.get_running_loop().run_in_executor(None, predict_arrays, num, cat)
+    return await prediction_cache.predict_async(num, cat, model_pool.predict_async, model_version())
+
+
+async def predict_frame_async(df: pd.DataFrame) -> np.ndarray:
+    if not model_pool.enabled():
+        return await asyncio.get_running_loop().run_in_executor(None, predict_frame, df)
+    return await predict_arrays_async(*features.encode_frame(df))
+
 
-    model = _ensure_model()
-
-    row = {
-        "State": state,
-        "District": district,
-        "Crop": crop,
-        "Crop_Year": crop_year,
-        "Season": season,
-        "Area": area,
-        "Production": production,
-        "state_profile": state,
-        "district_profile": district,
-        "rainfall_7d_total": weather.get("rainfall_7d_total", 0.0),
-        "temp_7d_avg": weather.get("temp_7d_avg", 0.0),
-        "humidity_7d_avg": weather.get("humidity_7d_avg", 0.0),
-        "soil_ph": soil.get("pH", 7.0),
-        "soil_soc": soil.get("organic_carbon_pct", 0.5),
-        "soil_sand": soil.get("sand_pct", 33.0),
-        "soil_silt": soil.get("silt_pct", 33.0),
-        "soil_clay": soil.get("clay_pct", 34.0),
-    }
-
-    # Convert row into DataFrame
-    df = pd.DataFrame([row])
-
-    # 🔹 Keep preprocessing consistent with training
-    cat_cols = ["State", "District", "Crop", "Season", "state_profile", "district_profile"]
-    for c in cat_cols:
-        df[c] = df[c].fillna("Unknown").astype(str)
-
-    num_cols = [c for c in df.columns if c not in cat_cols]
-    for c in num_cols:
-        df[c] = df[c].fillna(0)
-
-    # Predict
-    y_pred = model.predict(df)[0]
-    return float(y_pred)
+async def predict_row_async(**inputs) -> float:
+    """predict_row for async callers (same keyword arguments)."""
+    if not model_pool.enabled():
+        return await asyncio.get_running_loop().run_in_executor(None, partial(predict_row, **inputs))
+    num, cat = features.encode_rows([feature_row(**inputs)])
+    predict_fn = _predict_batched_async if batcher.BATCHING_ENABLED else model_pool.predict_async
+    return float((await prediction_cache.predict_async(num, cat, predict_fn, model_version()))[0])
@@ -0,0 +1,163 @@
+# app/ml/prediction_cache.py
+"""
+LRU cache of yield predictions keyed by the encoded feature vector.
+
+Numeric features are snapped to a grid (QUANTUM, e.g. 0.1 °C, 1 mm) before
+both the lookup and the model call, so a cached value is exactly what the
+model returns for the snapped row - independent of which caller filled it.
+The cache is cleared whenever the model version (artifact mtime/size) changes.
+
+Env:
+  YIELD_CACHE_SIZE        max entries (0 disables the cache)
+  YIELD_CACHE_MAX_BATCH   larger batches (Monte Carlo etc.) bypass the cache
+  YIELD_CACHE_QUANTUM     per-column overrides, e.g. "temp_7d_avg=0.5,rainfall_7d_total=5"
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from app.ml.features import NUM_COLS
+
+CACHE_SIZE = int(os.getenv("YIELD_CACHE_SIZE", "20000"))
+CACHE_MAX_BATCH = int(os.getenv("YIELD_CACHE_MAX_BATCH", "2048"))
+
+# 🔹 Grid step per numeric column (0 = exact value)
+QUANTUM = {
+    "Crop_Year": 1.0,
+    "Area": 0.01,               # ha
+    "Production": 0.1,
+    "rainfall_7d_total": 1.0,   # mm
+    "temp_7d_avg": 0.1,         # °C
+    "humidity_7d_avg": 1.0,     # %
+    "soil_ph": 0.05,
+    "soil_soc": 0.01,           # %
+    "soil_sand": 0.5,           # %
+    "soil_silt": 0.5,
+    "soil_clay": 0.5,
+}
+
+
+def _parse_quantum(spec: str) -> dict:
+    out = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        col, _, step = part.partition("=")
+        if col.strip() not in NUM_COLS:
+            print(f"❌ YIELD_CACHE_QUANTUM: unknown column '{col.strip()}' ignored")
+            continue
+        out[col.strip()] = float(step)
+    return out
+
+
+QUANTUM.update(_parse_quantum(os.getenv("YIELD_CACHE_QUANTUM", "")))
+_steps = np.array([QUANTUM.get(c, 0.0) for c in NUM_COLS], dtype=float)
+
+_lock = threading.Lock()
+_entries: "OrderedDict[tuple, float]" = OrderedDict()
+_state = {"version": None, "hits": 0, "misses": 0, "bypassed": 0, "invalidations": 0}
+
+
+def quantize(num: np.ndarray) -> np.ndarray:
+    """Snap numeric features ([n, n_num] in NUM_COLS order) to the QUANTUM grid."""
+    snapped = np.where(_steps > 0, np.round(num / np.where(_steps > 0, _steps, 1.0)) * _steps, num)
+    return snapped + 0.0  # normalize -0.0 so it keys like 0.0
+
+
+def _check_version(version):
+    if _state["version"] != version:
+        if _state["version"] is not None:
+            _state["invalidations"] += 1
+        _entries.clear()
+        _state["version"] = version
+
+
+def _bypass(n: int) -> bool:
+    if CACHE_SIZE <= 0 or n > CACHE_MAX_BATCH:
+        with _lock:
+            _state["bypassed"] += n
+        return True
+    return False
+
+
+def _lookup(num: np.ndarray, cat: np.ndarray, version) -> tuple:
+    """(out, snapped num, misses): cached values filled into out, missed keys -> their row indices."""
+    n = len(num)
+    q = quantize(num)
+    keys = [(*a, *b) for a, b in zip(q.tolist(), cat.tolist())]
+    out = np.empty(n)
+    miss_rows = {}
+    with _lock:
+        _check_version(version)
+        for i, k in enumerate(keys):
+            y = _entries.get(k)
+            if y is None:
+                miss_rows.setdefault(k, []).append(i)
+            else:
+                _entries.move_to_end(k)
+                out[i] = y
+        _state["hits"] += n - sum(len(v) for v in miss_rows.values())
+        _state["misses"] += sum(len(v) for v in miss_rows.values())
+    return out, q, miss_rows
+
+
+def _fill(out: np.ndarray, miss_rows: dict, preds, version):
+    preds = np.asarray(preds, dtype=float)
+    with _lock:
+        stale = _state["version"] != version  # model changed mid-call: don't store
+        for (k, rows), y in zip(miss_rows.items(), preds.tolist()):
+            out[rows] = y
+            if not stale:
+                _entries[k] = y
+        while len(_entries) > CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def predict(num: np.ndarray, cat: np.ndarray, predict_fn: Callable, version) -> np.ndarray:
+    """
+    Cached predict_fn(num, cat) for encoded rows. Misses are de-duplicated and
+    scored in one predict_fn call on the snapped rows. `version` identifies
+    the model; a new value clears the cache.
+    """
+    if _bypass(len(num)):
+        return predict_fn(num, cat)
+    out, q, miss_rows = _lookup(num, cat, version)
+    if miss_rows:
+        first = [rows[0] for rows in miss_rows.values()]
+        _fill(out, miss_rows, predict_fn(q[first], cat[first]), version)
+    return out
+
+
+async def predict_async(num: np.ndarray, cat: np.ndarray, predict_fn: Callable, version) -> np.ndarray:
+    """predict() with a coroutine predict_fn (misses are awaited, not run on a thread)."""
+    if _bypass(len(num)):
+        return await predict_fn(num, cat)
+    out, q, miss_rows = _lookup(num, cat, version)
+    if miss_rows:
+        first = [rows[0] for rows in miss_rows.values()]
+        _fill(out, miss_rows, await predict_fn(q[first], cat[first]), version)
+    return out
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def get_stats() -> dict:
+    """Entry count, hit ratio and invalidations for /health/ml."""
+    with _lock:
+        hits, misses = _state["hits"], _state["misses"]
+        return {
+            "enabled": CACHE_SIZE > 0,
+            "size": len(_entries),
+            "max_size": CACHE_SIZE,
+            "max_batch": CACHE_MAX_BATCH,
+            "hits": hits,
+            "misses": misses,
+            "bypassed_rows": _state["bypassed"],
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "invalidations": _state["invalidations"],
+            "quantum": {c: s for c, s in QUANTUM.items() if s > 0},
+        }
@@ -0,0 +1,26 @@
+# app/ml/tests/test_backtest.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml import backtest
+
+
+def test_error_table_groups_and_orders_by_rmse():
+    actual = np.array([10.0, 20.0, 10.0, 0.0])
+    pred = np.array([12.0, 18.0, 10.0, 1.0])
+    err = pred - actual
+    frame = pd.DataFrame({
+        "Crop": ["rice", "rice", "wheat", "wheat"],
+        "actual": actual, "err": err, "abs_err": np.abs(err), "sq_err": err ** 2,
+        "ape": np.where(actual > 0, np.abs(err) / np.where(actual > 0, actual, 1.0), np.nan),
+    })
+    table = backtest.error_table(frame, ["Crop"])
+
+    assert table["Crop"].tolist() == ["rice", "wheat"]
+    rice = table.iloc[0]
+    assert rice["n"] == 2 and rice["rmse"] == pytest.approx(2.0) and rice["bias"] == pytest.approx(0.0)
+    assert rice["mape"] == pytest.approx(15.0)
+    wheat = table.iloc[1]
+    assert wheat["mape"] == pytest.approx(0.0)   # zero-yield row is left out of MAPE
+    assert wheat["rmse"] == pytest.approx(np.sqrt(0.5), abs=1e-4)
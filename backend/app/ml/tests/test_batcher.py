@@ -0,0 +1,40 @@
+# app/ml/tests/test_batcher.py
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.ml import batcher, predict_yield
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    batches = []
+
+    def _predict_rows(rows):
+        batches.append(len(rows))
+        if any(r.get("bad") for r in rows):
+            raise ValueError("bad row")
+        return np.array([r["x"] * 2.0 for r in rows])
+
+    monkeypatch.setattr(predict_yield, "_predict_rows", _predict_rows)
+    monkeypatch.setattr(batcher, "BATCH_WINDOW_MS", 200)
+    return batches
+
+
+def test_bad_row_only_fails_its_own_caller(fake_model):
+    futures = [batcher.submit({"x": float(i), "bad": i == 2}) for i in range(5)]
+    for i, fut in enumerate(futures):
+        if i == 2:
+            with pytest.raises(ValueError, match="bad row"):
+                fut.result(timeout=5)
+        else:
+            assert fut.result(timeout=5) == i * 2.0
+    assert fake_model == [5, 1, 1, 1, 1, 1]   # one stacked call, then row by row
+
+
+def test_predict_times_out_instead_of_hanging(monkeypatch):
+    monkeypatch.setattr(batcher, "submit", lambda row: Future())   # never resolved
+    monkeypatch.setattr(batcher, "RESULT_TIMEOUT_SECONDS", 0.05)
+    with pytest.raises(TimeoutError, match="no result within"):
+        batcher.predict({"x": 1.0})
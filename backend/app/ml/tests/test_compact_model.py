@@ -0,0 +1,25 @@
+# app/ml/tests/test_compact_model.py
+import pytest
+
+pytest.importorskip("catboost")
+
+from app.ml import compact_model, predict_yield
+from app.ml.tests.test_numpy_model import _frame, _target
+
+
+def test_auto_backend_serves_variant_export(tmp_path, monkeypatch):
+    from catboost import CatBoostRegressor
+
+    paths = (tmp_path / "yield_model.pruned.pkl", tmp_path / "yield_model.pruned.npz")
+    monkeypatch.setattr(compact_model, "model_paths", lambda variant="": paths)
+    monkeypatch.setattr(predict_yield, "MODEL_PATH", paths[0])
+    monkeypatch.setattr(predict_yield, "NUMPY_MODEL_PATH", paths[1])
+    monkeypatch.setattr(predict_yield, "MODEL_BACKEND", "auto")
+    monkeypatch.setattr(predict_yield, "_numpy_model", {"version": None, "model": None})
+
+    X = _frame(300)
+    model = CatBoostRegressor(iterations=20, depth=3, verbose=0, allow_writing_files=False)
+    model.fit(X, _target(X), cat_features=predict_yield.CAT_COLS)
+    compact_model._save_variant(model, X, "pruned")
+
+    assert predict_yield._numpy_backend() is not None
@@ -0,0 +1,81 @@
+# app/ml/tests/test_explanations.py
+import threading
+
+import numpy as np
+import pytest
+
+from app.ml import explanations
+from app.ml.features import encode_rows, feature_row
+
+
+@pytest.fixture
+def fake_shap(tmp_path, monkeypatch):
+    calls, gate = [], threading.Event()
+    gate.set()
+
+    def _shap(num, cat, version, hashes):
+        gate.wait(5)
+        calls.append(len(num))
+        return [{"feature_hash": h, "model_version": version, "factors": []} for h in hashes]
+
+    monkeypatch.setattr(explanations, "_shap", _shap)
+    monkeypatch.setattr(explanations, "model_key", lambda: "v1")
+    monkeypatch.setattr(explanations, "STORE_PATH", tmp_path / "explanations.json")
+    explanations._entries.clear()
+    explanations._state["loaded"] = False
+    return calls, gate
+
+
+def _rows(*crops):
+    return encode_rows([
+        feature_row(state="Maharashtra", district="Pune", crop=c, season="Kharif", crop_year=2024,
+                    area=2.0, production=0.0, weather={"temp_7d_avg": 28.04}, soil={})
+        for c in crops
+    ])
+
+
+def test_store_computes_each_row_once_per_model(fake_shap):
+    calls, _ = fake_shap
+    num, cat = _rows("Rice", "Wheat", "Rice")
+    out = explanations.store(num, cat)
+    assert calls == [2] and out[0] is out[2]
+
+    # same rows (up to the cache quantum) are not recomputed
+    num[:, :] = np.round(num, 6)
+    explanations.store(num, cat)
+    assert calls == [2]
+    assert explanations.lookup(*_rows("Wheat"))["feature_hash"] == out[1]["feature_hash"]
+    assert explanations.STORE_PATH.exists()
+
+
+def test_explain_returns_pending_past_budget_then_ready(fake_shap):
+    _, gate = fake_shap
+    gate.clear()
+    assert explanations.explain(*_rows("Maize"), budget_ms=20)["status"] == "pending"
+    gate.set()
+    explanations._executor.submit(lambda: None).result(5)   # background computation done
+    assert explanations.explain(*_rows("Maize"), budget_ms=20)["status"] == "ready"
+
+
+def test_timed_out_row_is_computed_once(fake_shap):
+    calls, gate = fake_shap
+    gate.clear()
+    for _ in range(3):
+        assert explanations.explain(*_rows("Cotton"), budget_ms=10)["status"] == "pending"
+    assert len(explanations._inflight) == 1
+    gate.set()
+    explanations._executor.submit(lambda: None).result(5)
+    assert calls == [1] and not explanations._inflight
+
+
+def test_concurrent_persists_leave_a_valid_file(fake_shap):
+    import json
+
+    num, cat = _rows("Rice", "Wheat", "Maize", "Cotton")
+    threads = [threading.Thread(target=explanations.store, args=(num[i:i + 1], cat[i:i + 1])) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(json.loads(explanations.STORE_PATH.read_text())) == 4
+    assert not list(explanations.STORE_PATH.parent.glob("*.part"))
@@ -0,0 +1,85 @@
+# app/ml/tests/test_feature_store.py
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.ml import feature_store
+
+
+def _archive(tmp_path, districts=("Pune", "Nashik"), years=(2001, 2002, 2003), seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{years[0]}-01-01", f"{years[-1]}-12-31", freq="D")
+    folder = tmp_path / "archive"
+    folder.mkdir(exist_ok=True)
+    for d in districts:
+        pd.DataFrame({
+            "State": "Maharashtra", "District": d, "date": dates.strftime("%Y-%m-%d"),
+            "temperature_C": rng.uniform(15, 38, len(dates)).round(2),
+            "humidity_pct": rng.uniform(30, 95, len(dates)).round(2),
+            "rainfall_mm": rng.gamma(0.6, 8, len(dates)).round(2),
+        }).to_csv(folder / f"{d}.csv", index=False)
+    return folder
+
+
+@pytest.fixture(autouse=True)
+def store_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_store, "STORE_DIR", tmp_path / "features")
+    monkeypatch.setattr(feature_store, "STORE_PATH", tmp_path / "features" / "weather.parquet")
+    monkeypatch.setattr(feature_store, "MANIFEST_PATH", tmp_path / "features" / "manifest.json")
+
+
+def _store():
+    return pd.read_parquet(feature_store.STORE_PATH).sort_values(feature_store.KEYS, ignore_index=True)
+
+
+def test_seasonal_means_of_7_day_windows(tmp_path):
+    folder = _archive(tmp_path)
+    feature_store.build(folder)
+
+    daily = pd.read_csv(folder / "Pune.csv", parse_dates=["date"]).set_index("date")
+    rain7 = daily["rainfall_mm"].rolling("7D", min_periods=7).sum()
+    expected = rain7["2002-06-01":"2002-10-31"].mean()
+
+    row = _store().query("District == 'pune' and Crop_Year == 2002 and Season == 'Kharif'")
+    assert row["rainfall_7d_total"].item() == pytest.approx(expected, abs=0.01)
+
+    # Rabi 2002 runs Nov 2002 - Mar 2003; the archive's last Rabi (2003) is incomplete and dropped
+    rabi = _store().query("District == 'pune' and Season == 'Rabi'")["Crop_Year"].tolist()
+    assert rabi == [2001, 2002]
+
+
+def test_rerun_recomputes_only_changed_district_years(tmp_path):
+    folder = _archive(tmp_path)
+    assert feature_store.build(folder)["rebuilt"]
+    assert feature_store.build(folder)["recomputed_keys"] == 0
+
+    # change one Nashik year
+    path = folder / "Nashik.csv"
+    df = pd.read_csv(path)
+    df.loc[df["date"].str.startswith("2003"), "rainfall_mm"] += 5
+    df.to_csv(path, index=False)
+
+    stats = feature_store.build(folder)
+    assert not stats["rebuilt"] and stats["changed_inputs"] == 1
+    incremental = _store()
+
+    feature_store.build(folder, full=True)
+    pd.testing.assert_frame_equal(incremental, _store())
+    assert stats["recomputed_keys"] < len(incremental) / 2
+
+
+def test_join_overwrites_matched_rows_only(tmp_path):
+    feature_store.build(_archive(tmp_path))
+    rows = pd.DataFrame({
+        "State": ["MAHARASHTRA ", "Maharashtra", "Kerala"],
+        "District": ["PUNE", "Nashik", "Idukki"],
+        "Crop_Year": np.array([2002, 1990, 2002], dtype="float32"),
+        "Season": ["Kharif     ", "Kharif", "Kharif"],
+        "rainfall_7d_total": 1.0, "temp_7d_avg": 2.0, "humidity_7d_avg": 3.0,
+    })
+    out = feature_store.join_weather(rows)
+    assert out["rainfall_7d_total"].iloc[0] != 1.0
+    assert out["rainfall_7d_total"].iloc[1:].tolist() == [1.0, 1.0]
+    assert list(out.index) == list(rows.index)
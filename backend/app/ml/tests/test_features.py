@@ -0,0 +1,88 @@
+# app/ml/tests/test_features.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml import features
+from app.ml.features import CAT_COLS, FEATURE_NAMES, NUM_COLS
+
+PROFILE = {"state": "Maharashtra", "district": "Pune"}
+WEATHER = {"rainfall_7d_total": 42.5, "temp_7d_avg": 28.1, "humidity_7d_avg": 71.0}
+SOIL = {"pH": 6.4, "organic_carbon_pct": 0.8, "sand_pct": 40.0, "silt_pct": None}  # no clay, no silt value
+
+RECORDS = [
+    {"state": "Maharashtra", "district": "Pune", "crop": "rice", "season": "Kharif",
+     "crop_year": 2019, "area": 12.5, "production": 30.0},
+    {"state": "Maharashtra", "district": "Pune", "crop": None, "season": "Rabi",
+     "crop_year": 2020, "area": float("nan"), "production": 0.0},
+]
+
+
+def _training_frame() -> pd.DataFrame:
+    """Dataset rows as train_yield.py sees them: raw CSV columns + context columns."""
+    df = pd.DataFrame({
+        "State": [r["state"] for r in RECORDS],
+        "District": [r["district"] for r in RECORDS],
+        "Crop": [r["crop"] for r in RECORDS],
+        "Crop_Year": [r["crop_year"] for r in RECORDS],
+        "Season": [r["season"] for r in RECORDS],
+        "Area": [r["area"] for r in RECORDS],
+        "Production": [r["production"] for r in RECORDS],
+        "Yield": [2.4, 1.1],
+    })
+    for col, value in features.context_columns(PROFILE, WEATHER, SOIL).items():
+        df[col] = value
+    return df
+
+
+def _assert_same(a, b):
+    np.testing.assert_array_equal(a[0], b[0])
+    assert a[1].tolist() == b[1].tolist()
+
+
+def test_training_and_inference_encode_identically():
+    trained = features.encode_frame(_training_frame())
+    rows = [features.feature_row(**r, weather=WEATHER, soil=SOIL) for r in RECORDS]
+
+    _assert_same(trained, features.encode_rows(rows))
+    _assert_same(trained, features.encode_inputs(RECORDS, WEATHER, SOIL, profile=PROFILE))
+    _assert_same(trained, features.encode_frame(pd.DataFrame(rows)))
+
+    # frame round trip keeps the spec column order
+    df = features.to_frame(*trained)
+    assert list(df.columns) == FEATURE_NAMES
+    _assert_same(trained, features.encode_frame(df))
+
+
+def test_defaults_fill_missing_none_and_nan():
+    num, cat = features.encode_frame(_training_frame())
+    value = dict(zip(NUM_COLS, num[1]))
+    assert value["soil_clay"] == 34.0          # key missing
+    assert value["soil_silt"] == 33.0          # None
+    assert value["Area"] == 0.0                # NaN
+    assert value["soil_ph"] == 6.4
+    assert dict(zip(CAT_COLS, cat[1]))["Crop"] == "Unknown"
+
+    num, _ = features.encode_inputs(RECORDS[0], {}, {})
+    value = dict(zip(NUM_COLS, num[0]))
+    assert value["soil_ph"] == 7.0 and value["soil_sand"] == 33.0
+
+
+def test_encode_inputs_broadcasts_and_checks_lengths():
+    num, cat = features.encode_inputs(RECORDS[0], [WEATHER, {**WEATHER, "temp_7d_avg": 30.0}], SOIL)
+    assert num.shape == (2, len(NUM_COLS)) and cat.shape == (2, len(CAT_COLS))
+    assert num[:, NUM_COLS.index("temp_7d_avg")].tolist() == [28.1, 30.0]
+
+    with pytest.raises(ValueError):
+        features.encode_inputs(RECORDS, [WEATHER] * 3, SOIL)
+
+
+def test_compact_training_frame_matches_encoder():
+    df = _training_frame()
+    df["State"] = df["State"].astype("category")
+    compact = features.compact_frame(df)
+    num, cat = features.encode_frame(df)
+
+    assert list(compact.columns) == FEATURE_NAMES
+    np.testing.assert_array_equal(compact[NUM_COLS].to_numpy(), num.astype(np.float32))
+    assert compact[CAT_COLS].astype(str).to_numpy().tolist() == cat.tolist()
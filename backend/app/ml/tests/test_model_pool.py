@@ -0,0 +1,83 @@
+# app/ml/tests/test_model_pool.py
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("catboost")
+
+from app.ml import features, model_pool, predict_yield
+from app.ml.tests.test_numpy_model import _frame, _target
+
+
+@pytest.fixture(scope="module")
+def model_file(tmp_path_factory):
+    import joblib
+    from catboost import CatBoostRegressor
+
+    X = _frame(400)
+    model = CatBoostRegressor(iterations=30, depth=4, verbose=0, allow_writing_files=False)
+    model.fit(X, _target(X), cat_features=predict_yield.CAT_COLS)
+    path = tmp_path_factory.mktemp("pool") / "yield_model.pkl"
+    joblib.dump(model, path)
+    return path
+
+
+@pytest.fixture
+def pool(model_file, monkeypatch):
+    # no .npz next to the .pkl, so workers and this process both predict with CatBoost
+    monkeypatch.setattr(predict_yield, "MODEL_PATH", model_file)
+    monkeypatch.setattr(predict_yield, "NUMPY_MODEL_PATH", model_file.with_suffix(".npz"))
+    monkeypatch.setattr(predict_yield, "_catboost_model", {"version": None, "model": None})
+    monkeypatch.setattr(predict_yield, "PREDICT_THREADS", 1)
+    monkeypatch.setattr(model_pool, "POOL_WORKERS", 2)
+    monkeypatch.setattr(model_pool, "WORKER_THREADS", 1)
+    monkeypatch.setattr(model_pool, "MIN_CHUNK", 16)
+    model_pool.shutdown()
+    yield model_pool
+    model_pool.shutdown()
+
+
+def _rows(n: int):
+    return features.encode_frame(_frame(n, seed=3))
+
+
+def test_chunked_pool_predictions_match_in_process(pool):
+    num, cat = _rows(101)
+    assert cat.dtype == object                            # sent as fixed-width unicode, rebuilt as object
+    expected = predict_yield._predict_model(num, cat)
+
+    assert len(pool._submit(pool._get_pool(), num, cat)) == 2   # one chunk per worker
+    np.testing.assert_allclose(pool.predict(num, cat), expected)
+    np.testing.assert_allclose(pool.predict(num[:5], cat[:5]), expected[:5])   # below MIN_CHUNK: one chunk
+
+
+def test_async_gathers_every_chunk(pool, monkeypatch):
+    monkeypatch.setattr(pool, "MIN_CHUNK", 8)
+    num, cat = _rows(50)
+    expected = predict_yield._predict_model(num, cat)
+    out = asyncio.run(pool.predict_async(num, cat))
+    np.testing.assert_allclose(out, expected)
+
+
+def test_broken_pool_is_restarted_and_retried(pool):
+    num, cat = _rows(40)
+    expected = predict_yield._predict_model(num, cat)
+    pool.warm_up()
+    broken = pool._pool
+    restarts = pool.get_stats()["restarts"]
+    next(iter(broken._processes.values())).kill()
+
+    np.testing.assert_allclose(pool.predict(num, cat), expected)
+    assert pool._pool is not broken
+    assert pool.get_stats()["restarts"] == restarts + 1
+
+
+def test_late_restart_keeps_the_fresh_pool(pool):
+    broken = pool._get_pool()
+    pool._restart(broken)
+    fresh = pool._get_pool()
+    pool._restart(broken)                                # a second caller that saw the same breakage
+    assert pool._pool is fresh
+    num, cat = _rows(20)
+    np.testing.assert_allclose(pool.predict(num, cat), predict_yield._predict_model(num, cat))
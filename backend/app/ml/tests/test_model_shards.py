@@ -0,0 +1,53 @@
+# app/ml/tests/test_model_shards.py
+import json
+
+import numpy as np
+import pytest
+
+from app.ml import model_shards, numpy_model
+from app.ml.features import CAT_COLS, NUM_COLS
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    manifest = {
+        "crops": {"rice": "cereals", "wheat": "cereals", "cotton": "cotton", "maize": "maize"},
+        "shards": {name: {"file": f"{name}.npz"} for name in ("cereals", "cotton", "maize")},
+    }
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    values = {"cereals.npz": 1.0, "cotton.npz": 2.0, "maize.npz": 3.0}
+    # 1 MB of arrays per shard; "prediction" is the shard's id value
+    monkeypatch.setattr(numpy_model, "load_model",
+                        lambda path: {"w": np.zeros(MB, dtype=np.uint8), "value": values[path.name]})
+    monkeypatch.setattr(numpy_model, "predict", lambda m, num, cat: np.full(len(num), m["value"]))
+    monkeypatch.setattr(model_shards, "SHARD_DIR", tmp_path)
+    monkeypatch.setattr(model_shards, "MANIFEST_PATH", tmp_path / "manifest.json")
+    monkeypatch.setattr(model_shards, "MEMORY_BUDGET_MB", 2.5)
+    model_shards._loaded.clear()
+    model_shards._state.update(stamp=None, manifest=None, bytes=0, loads=0, evictions=0)
+
+
+def _rows(crops):
+    cat = np.full((len(crops), len(CAT_COLS)), "x", dtype=object)
+    cat[:, CAT_COLS.index("Crop")] = crops
+    return np.zeros((len(crops), len(NUM_COLS))), cat
+
+
+def test_routes_by_crop_with_global_fallback(shards):
+    out = model_shards.predict(*_rows([" Rice", "cotton", "Sugarcane", "WHEAT"]),
+                               fallback=lambda num, cat: np.full(len(num), -1.0))
+    assert out.tolist() == [1.0, 2.0, -1.0, 1.0]
+
+
+def test_least_recently_used_shard_unloaded_over_budget(shards):
+    fallback = lambda num, cat: np.zeros(len(num))
+    model_shards.predict(*_rows(["rice"]), fallback)
+    model_shards.predict(*_rows(["cotton"]), fallback)
+    model_shards.predict(*_rows(["rice"]), fallback)    # cereals is now most recent
+    model_shards.predict(*_rows(["maize"]), fallback)   # 3 MB > 2.5 MB budget
+
+    stats = model_shards.get_stats()
+    assert list(model_shards._loaded) == ["cereals", "maize"]
+    assert stats["evictions"] == 1 and stats["loads"] == 3
@@ -0,0 +1,66 @@
+# app/ml/tests/test_numpy_model.py
+import numpy as np
+import pandas as pd
+import pytest
+
+catboost = pytest.importorskip("catboost")
+
+from app.ml import numpy_model
+from app.ml.predict_yield import CAT_COLS, feature_row
+
+
+def _frame(n: int, seed: int = 0, seasons=("Kharif", "Rabi", "Whole Year")) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = [
+        feature_row(
+            state=f"S{rng.integers(0, 6)}",
+            district=f"D{rng.integers(0, 40)}",
+            crop=rng.choice(["rice", "wheat", "maize", "cotton", "pulses", "millets"]),
+            season=rng.choice(list(seasons)),
+            crop_year=int(rng.integers(1998, 2020)),
+            area=float(rng.uniform(1, 500)),
+            production=float(rng.uniform(0, 2000)),
+            weather={"rainfall_7d_total": rng.uniform(0, 200), "temp_7d_avg": rng.uniform(15, 40),
+                     "humidity_7d_avg": rng.uniform(30, 95)},
+            soil={"pH": rng.uniform(5, 8.5)},
+        )
+        for _ in range(n)
+    ]
+    df = pd.DataFrame(rows)
+    for c in CAT_COLS:
+        df[c] = df[c].astype(str)
+    return df
+
+
+def _target(df: pd.DataFrame) -> pd.Series:
+    return (
+        2 + 0.01 * df["rainfall_7d_total"] - 0.05 * (df["temp_7d_avg"] - 27).abs()
+        + 0.05 * df["District"].str[1:].astype(int) + 0.3 * (df["Crop"] == "rice")
+        + 0.4 * (df["Season"] == "Kharif") * (df["District"].str[1:].astype(int) % 3)
+    )
+
+
+@pytest.mark.parametrize("params, seasons", [
+    ({"depth": 6}, None),                                   # CTRs on high-cardinality columns
+    ({"depth": 4, "one_hot_max_size": 10}, None),           # one-hot splits
+    ({"depth": 5, "nan_mode": "Max"}, None),
+    ({"depth": 6, "max_ctr_complexity": 4}, ("Kharif", "Rabi")),  # one-hot values inside CTR projections
+])
+def test_matches_catboost(tmp_path, params, seasons):
+    kw = {"seasons": seasons} if seasons else {}
+    X = _frame(1500, **kw)
+    model = catboost.CatBoostRegressor(iterations=80, random_seed=7, verbose=0,
+                                       train_dir=str(tmp_path), **params)
+    model.fit(X, _target(X), cat_features=CAT_COLS)
+
+    path = numpy_model.export_model(model, X, tmp_path / "yield_model.npz")
+    m = numpy_model.load_model(path)
+
+    # Unseen categories and missing floats must follow CatBoost too
+    Y = _frame(400, seed=1, **kw)
+    Y.loc[:49, "District"] = "Nowhere"
+    Y.loc[50:99, "Crop"] = "kiwi"
+    Y.loc[100:149, "rainfall_7d_total"] = np.nan
+
+    for df in (X, Y):
+        np.testing.assert_allclose(numpy_model.predict_frame(m, df), model.predict(df), rtol=0, atol=1e-9)
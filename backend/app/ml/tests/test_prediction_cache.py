@@ -0,0 +1,72 @@
+# app/ml/tests/test_prediction_cache.py
+import numpy as np
+import pytest
+
+from app.ml import features, prediction_cache
+
+WEATHER = {"rainfall_7d_total": 42.4, "temp_7d_avg": 28.12, "humidity_7d_avg": 71.0}
+DATA = {"state": "Maharashtra", "district": "Pune", "crop": "rice", "season": "Kharif",
+        "crop_year": 2024, "area": 2.0, "production": 0.0}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    prediction_cache.clear()
+    monkeypatch.setitem(prediction_cache._state, "version", None)
+    for k in ("hits", "misses", "bypassed", "invalidations"):
+        monkeypatch.setitem(prediction_cache._state, k, 0)
+
+
+def _model():
+    calls = []
+
+    def predict_fn(num, cat):
+        calls.append(len(num))
+        return num[:, features.NUM_COLS.index("temp_7d_avg")] * 10
+    return predict_fn, calls
+
+
+def _encode(**weather):
+    return features.encode_inputs(DATA, {**WEATHER, **weather}, {"pH": 6.5})
+
+
+def test_near_identical_rows_hit_and_match_snapped_prediction():
+    predict_fn, calls = _model()
+    a = prediction_cache.predict(*_encode(), predict_fn, "v1")
+    b = prediction_cache.predict(*_encode(temp_7d_avg=28.09, rainfall_7d_total=42.2), predict_fn, "v1")
+
+    assert calls == [1]
+    assert a[0] == b[0] == pytest.approx(281.0)   # model saw the snapped 28.1 °C
+    stats = prediction_cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_batch_misses_are_deduplicated():
+    predict_fn, calls = _model()
+    num, cat = _encode()
+    out = prediction_cache.predict(np.repeat(num, 5, axis=0), np.repeat(cat, 5, axis=0), predict_fn, "v1")
+    assert calls == [1] and len(set(out.tolist())) == 1
+
+
+def test_new_model_version_invalidates():
+    predict_fn, calls = _model()
+    prediction_cache.predict(*_encode(), predict_fn, "v1")
+    prediction_cache.predict(*_encode(), predict_fn, "v2")
+    assert calls == [1, 1]
+    assert prediction_cache.get_stats()["invalidations"] == 1
+
+
+def test_lru_eviction_and_large_batch_bypass(monkeypatch):
+    monkeypatch.setattr(prediction_cache, "CACHE_SIZE", 2)
+    monkeypatch.setattr(prediction_cache, "CACHE_MAX_BATCH", 3)
+    predict_fn, calls = _model()
+    for t in (20.0, 21.0, 22.0):
+        prediction_cache.predict(*_encode(temp_7d_avg=t), predict_fn, "v1")
+    assert prediction_cache.get_stats()["size"] == 2
+
+    prediction_cache.predict(*_encode(temp_7d_avg=20.0), predict_fn, "v1")   # evicted -> miss
+    assert calls == [1, 1, 1, 1]
+
+    num, cat = _encode()
+    prediction_cache.predict(np.repeat(num, 4, axis=0), np.repeat(cat, 4, axis=0), predict_fn, "v1")
+    assert calls[-1] == 4 and prediction_cache.get_stats()["bypassed_rows"] == 4
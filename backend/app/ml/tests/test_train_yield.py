@@ -0,0 +1,34 @@
+# app/ml/tests/test_train_yield.py
+import pytest
+
+pytest.importorskip("catboost")
+
+from app.ml import predict_yield, train_yield
+from app.ml.tests.test_numpy_model import _frame, _target
+
+
+def test_auto_backend_serves_numpy_export_after_save(tmp_path, monkeypatch):
+    from catboost import CatBoostRegressor
+
+    pkl, npz = tmp_path / "yield_model.pkl", tmp_path / "yield_model.npz"
+    monkeypatch.setattr(train_yield, "MODEL_PATH", pkl)
+    monkeypatch.setattr(train_yield, "NUMPY_MODEL_PATH", npz)
+    monkeypatch.setattr(predict_yield, "MODEL_PATH", pkl)
+    monkeypatch.setattr(predict_yield, "NUMPY_MODEL_PATH", npz)
+    monkeypatch.setattr(predict_yield, "MODEL_BACKEND", "auto")
+    monkeypatch.setattr(predict_yield, "_numpy_model", {"version": None, "model": None})
+
+    X = _frame(300)
+    model = CatBoostRegressor(iterations=20, depth=3, verbose=0, allow_writing_files=False)
+    model.fit(X, _target(X), cat_features=predict_yield.CAT_COLS)
+    train_yield._save_artifacts(model, X)
+
+    assert npz.stat().st_mtime_ns >= pkl.stat().st_mtime_ns
+    assert predict_yield._numpy_backend() is not None
+
+
+def test_model_context_replays_the_training_context(monkeypatch):
+    monkeypatch.setattr(train_yield, "training_context", lambda *a, **k: ({"state": "Live"}, {}, {}))
+    meta = {"context": {"profile": {"state": "Punjab"}, "weather": {"temp_7d_avg": 27.0}, "soil": None}}
+    assert train_yield.model_context(meta) == ({"state": "Punjab"}, {"temp_7d_avg": 27.0}, {})
+    assert train_yield.model_context({}) == ({"state": "Live"}, {}, {})   # untrained: current context
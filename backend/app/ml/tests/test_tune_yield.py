@@ -0,0 +1,65 @@
+# app/ml/tests/test_tune_yield.py
+from app.ml import tune_yield
+
+
+def test_rung_schedule_grows_by_eta_until_max_or_one_survivor():
+    assert tune_yield.rung_schedule(27, 100, 1000) == [100, 300, 900, 1000]
+    assert tune_yield.rung_schedule(9, 30, 270) == [30, 90, 270]
+    assert tune_yield.rung_schedule(3, 100, 1000) == [100, 300]
+    assert tune_yield.rung_schedule(1, 100, 1000) == [100]
+
+
+def test_pareto_front_drops_dominated_trials():
+    trials = [
+        {"id": 0, "cv_rmse": 1.0, "row_latency_ms": 0.5},
+        {"id": 1, "cv_rmse": 0.8, "row_latency_ms": 0.9},
+        {"id": 2, "cv_rmse": 1.1, "row_latency_ms": 0.6},   # worse than 0 on both
+        {"id": 3, "cv_rmse": 1.5, "row_latency_ms": 0.2},
+        {"id": 4, "cv_rmse": None, "row_latency_ms": None},  # never scored
+    ]
+    assert tune_yield.pareto_front(trials) == [3, 0, 1]
+
+
+def test_sample_configs_start_from_current_params():
+    from app.ml.train_yield import PARAMS
+
+    configs = tune_yield.sample_configs(8, seed=1)
+    assert len(configs) == 8 and len({str(c) for c in configs}) == 8
+    assert configs[0]["depth"] == PARAMS["depth"] and configs[0]["learning_rate"] == PARAMS["learning_rate"]
+
+
+def _fake_fit(seconds=0.0, fail=()):
+    import time
+
+    def fit(task):
+        time.sleep(seconds)
+        if (task["trial"], task["fold"]) in fail:
+            raise RuntimeError("fit blew up")
+        return {"trial": task["trial"], "rung": task["rung"], "fold": task["fold"], "rmse": 1.0,
+                "fit_seconds": seconds, "cpu_seconds": 0.0, "model": None}
+    return fit
+
+
+def _tasks(trials, folds):
+    return [{"trial": t, "rung": 0, "fold": f} for t in range(trials) for f in range(folds)]
+
+
+def test_failed_fit_only_fails_its_trial():
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(1) as pool:
+        out = tune_yield._run_rung(pool, _fake_fit(fail={(1, 0)}), _tasks(3, 2), 1, time.perf_counter() + 60)
+    assert set(out["errors"]) == {1} and "fit blew up" in out["errors"][1]
+    assert {t: sorted(f) for t, f in out["results"].items()} == {0: [0, 1], 2: [0, 1]}
+    assert out["stop_reason"] is None
+
+
+def test_running_fits_are_kept_when_the_budget_runs_out():
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(2) as pool:
+        out = tune_yield._run_rung(pool, _fake_fit(0.2), _tasks(3, 2), 2, time.perf_counter() + 0.05)
+    assert out["stop_reason"] == "wall-clock budget"
+    assert out["results"] == {0: out["results"][0]} and sorted(out["results"][0]) == [0, 1]
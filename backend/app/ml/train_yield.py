@@ -1,86 +1,65 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from catboost import CatBoostRegressor
-import joblib
+# app/ml/train_yield.py
+"""
+Train the CatBoost yield model.
+
+    python -m app.ml.train_yield [--data CSV] [--threads N] [--train-dir DIR]
+                                 [--weather JSON] [--soil JSON] [--live]
+                                 [--snapshot-interval SEC] [--no-resume]
+                                 [--no-weather-store]
+    python -m app.ml.train_yield --incremental [--iterations N] [--holdout FRAC]
+                                 [--tolerance REL] [--compare-full]
+
+Runs offline by default. The profile/weather/soil context columns come from
+--weather / --soil JSON files (fetch_weather_summary / summarize_soil
+output), or from the feature-spec defaults; --live fetches them for the
+active profile instead. Rows with a match in the seasonal weather store
+(app/ml/feature_store.py) get their own season's weather instead.
+
+The dataset is streamed in chunks with an explicit dtype map (categories,
+float32). CatBoost snapshots progress every --snapshot-interval seconds;
+re-running the same command after an interruption resumes from the snapshot.
+
+--incremental warm-starts from the current yield_model.pkl (CatBoost
+init_model) on the rows appended to the dataset since the last fit, checks
+a rolling holdout of the newest rows and only replaces the artifacts if the
+holdout error does not regress. The savings against a full retrain are
+reported and kept in yield_model.meta.json.
+"""
+import argparse
+import json
+import os
+import resource
+import time
+from datetime import datetime
 from pathlib import Path
+
+import joblib
 import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
 
-from app.services.profile_service import get_active_profile
-from app.services.weather_service import fetch_weather_summary
-from app.services.soil_service import summarize_soil
+from app.ml import feature_store
+from app.ml.features import CAT_COLS, FEATURE_SPEC, compact_frame, context_columns
+from app.ml.numpy_model import NUMPY_MODEL_PATH, export_model
 
 # Paths
-DATA_PATH = Path(__file__).resolve().parent / "data" / "soil_data.csv"
-MODEL_PATH = Path(__file__).resolve().parent / "artifacts" / "yield_model.pkl"
+ML_DIR = Path(__file__).resolve().parent
+DATA_PATH = ML_DIR / "data" / "soil_data.csv"
+MODEL_PATH = ML_DIR / "artifacts" / "yield_model.pkl"
+META_PATH = ML_DIR / "artifacts" / "yield_model.meta.json"
+SNAPSHOT_PATH = ML_DIR / "artifacts" / "yield_model.snapshot"
+TRAIN_DIR = ML_DIR.parents[1] / "catboost_info"
 
-print(f"📂 Loading dataset: {DATA_PATH}")
-df = pd.read_csv(DATA_PATH)
-df.columns = df.columns.str.strip()
+TARGET = "Yield"
+CHUNK_ROWS = int(os.getenv("YIELD_TRAIN_CHUNK_ROWS", "50000"))
+THREAD_COUNT = int(os.getenv("YIELD_TRAIN_THREADS", "-1"))   # -1 = all cores
 
-# Target variable
-target = "Yield"
-if target not in df.columns:
-    raise RuntimeError(f"❌ '{target}' column not found in dataset!")
+# 🔹 Incremental updates (--incremental)
+UPDATE_ITERATIONS = int(os.getenv("YIELD_UPDATE_ITERATIONS", "200"))
+HOLDOUT_FRAC = float(os.getenv("YIELD_UPDATE_HOLDOUT", "0.2"))   # newest share of the appended rows
 
-# Fill missing numeric values
-for col in ("Area", "Production"):
-    if col in df.columns:
-        df[col] = df[col].fillna(df[col].median())
-
-# 🔹 Get active profile
-profile = get_active_profile()
-if not profile:
-    raise RuntimeError("❌ No active profile found.")
-
-pincode = profile.get("pincode")
-state = profile.get("state", "Unknown")
-district = profile.get("district", "Unknown")
-
-# 🔹 Fetch live weather & soil data
-weather = fetch_weather_summary(pincode)
-soil = summarize_soil(pincode)
-
-# 🔹 Add context columns (so model learns structure)
-df["state_profile"] = state
-df["district_profile"] = district
-df["rainfall_7d_total"] = weather.get("rainfall_7d_total", 0)
-df["temp_7d_avg"] = weather.get("temp_7d_avg", 0)
-df["humidity_7d_avg"] = weather.get("humidity_7d_avg", 0)
-df["soil_ph"] = soil.get("pH", 7.0)
-df["soil_soc"] = soil.get("organic_carbon_pct", 0.5)
-df["soil_sand"] = soil.get("sand_pct", 33.0)
-df["soil_silt"] = soil.get("silt_pct", 33.0)
-df["soil_clay"] = soil.get("clay_pct", 34.0)
-
-# 🔹 Feature set
-features = [
-    "State", "District", "Crop", "Crop_Year", "Season",
-    "Area", "Production",
-    "state_profile", "district_profile",
-    "rainfall_7d_total", "temp_7d_avg", "humidity_7d_avg",
-    "soil_ph", "soil_soc", "soil_sand", "soil_silt", "soil_clay"
-]
-
-X = df[features].copy()
-y = df[target].copy()
-
-# 🔹 Handle categorical and numeric columns
-cat_cols = ["State", "District", "Crop", "Season", "state_profile", "district_profile"]
-for c in cat_cols:
-    X[c] = X[c].fillna("Unknown").astype(str)
-
-num_cols = [c for c in X.columns if c not in cat_cols]
-for c in num_cols:
-    X[c] = X[c].fillna(0)
-
-# 🔹 Split train/test
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-# 🔹 Train CatBoost (tell it categorical features explicitly!)
-model = CatBoostRegressor(
+# 🔹 Model hyper-parameters (resuming a snapshot needs the same ones)
+PARAMS = dict(
     iterations=1000,
     learning_rate=0.05,
     depth=8,
@@ -89,22 +68,385 @@ model = CatBoostRegressor(
     loss_function="RMSE",
     eval_metric="RMSE",
     early_stopping_rounds=50,
-    verbose=100
+    verbose=100,
 )
 
-# 👇 Important: pass cat_features=cat_cols
-model.fit(X_train, y_train, eval_set=(X_test, y_test), cat_features=cat_cols)
+# 🔹 Columns read from the dataset and their dtypes
+DATA_COLS = {name: ("category" if role == "cat" else "float32")
+             for name, role, _, source, _ in FEATURE_SPEC if source == "data"}
+DATA_COLS[TARGET] = "float32"
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_dataset(path: Path = DATA_PATH, chunksize: int = CHUNK_ROWS) -> pd.DataFrame:
+    """Stream the crop dataset in chunks with the DATA_COLS dtype map (header names may carry spaces)."""
+    header = pd.read_csv(path, nrows=0).columns
+    raw = {c.strip(): c for c in header}
+    missing = [c for c in DATA_COLS if c not in raw]
+    if TARGET in missing:
+        raise RuntimeError(f"❌ '{TARGET}' column not found in dataset!")
+    if missing:
+        print(f"⚠️ Dataset has no {missing}; they take the feature-spec defaults")
+    cols = {raw[c]: c for c in DATA_COLS if c in raw}
+
+    chunks = []
+    reader = pd.read_csv(path, usecols=list(cols), dtype={r: DATA_COLS[c] for r, c in cols.items()},
+                         chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.rename(columns=cols)
+        chunks.append(chunk[chunk[TARGET].notna()])
+    if not chunks:
+        raise RuntimeError(f"❌ No rows in {path}")
+
+    # Chunks carry their own category sets: union them so concat keeps `category`
+    out = {}
+    for c in chunks[0].columns:
+        if DATA_COLS[c] == "category":
+            out[c] = union_categoricals([ch[c] for ch in chunks], ignore_order=True)
+        else:
+            out[c] = np.concatenate([ch[c].to_numpy() for ch in chunks])
+    df = pd.DataFrame(out)
+    for c in missing:
+        df[c] = np.nan
+
+    # Fill missing numeric values
+    for col in ("Area", "Production"):
+        df[col] = df[col].fillna(df[col].median())
+    return df
+
+
+def _read_json(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def training_context(weather_path=None, soil_path=None, live: bool = False) -> tuple:
+    """(profile, weather, soil) dicts for the context columns; no network unless live."""
+    from app.services.profile_service import get_active_profile
+
+    profile = get_active_profile() or {}
+    if live:
+        if not profile:
+            raise RuntimeError("❌ No active profile found.")
+        from app.services.weather_service import fetch_weather_summary
+        from app.services.soil_service import summarize_soil
+        return profile, fetch_weather_summary(profile.get("pincode")), summarize_soil(profile.get("pincode"))
+
+    if not profile:
+        print("⚠️ No active profile; state/district context columns use 'Unknown'")
+    weather = _read_json(weather_path) if weather_path else {}
+    soil = _read_json(soil_path) if soil_path else {}
+    if not weather or not soil:
+        print("⚠️ Missing weather/soil context files; feature-spec defaults used")
+    return profile, weather, soil
+
+
+def model_context(meta: dict = None) -> tuple:
+    """
+    (profile, weather, soil) the current model was trained with (meta "context"),
+    so replays and retrains see the same constant columns; training_context()
+    when there is no trained model metadata yet.
+    """
+    ctx = (read_meta() if meta is None else meta).get("context")
+    if not ctx:
+        return training_context()
+    return ctx.get("profile") or {}, ctx.get("weather") or {}, ctx.get("soil") or {}
+
+
+def prepare_training_frame(
+    data_path: Path,
+    context: tuple,
+    *,
+    chunksize: int = CHUNK_ROWS,
+    weather_store: bool = True,
+) -> tuple:
+    """Dataset rows -> (X in the feature-spec layout, y). `context` is (profile, weather, soil)."""
+    print(f"📂 Loading dataset: {data_path}")
+    df = load_dataset(data_path, chunksize)
+    print(f"✅ {len(df):,} rows loaded | peak RSS {peak_rss_mb():.0f} MB")
+
+    # 🔹 Add context columns (so model learns structure) - same spec/defaults as inference
+    for col, value in context_columns(*context).items():
+        df[col] = value
+
+    # 🔹 Seasonal weather per (district, year, season) from the local archive, where available
+    if weather_store:
+        if feature_store.WEATHER_ARCHIVE_DIR.exists():
+            feature_store.build()  # incremental: only changed district-years
+        if feature_store.STORE_PATH.exists():
+            df = feature_store.join_weather(df)
+        else:
+            print("⚠️ No weather feature store; weather columns stay constant")
+
+    # 🔹 Encode with the shared feature spec (column order, roles, fills)
+    return compact_frame(df), df[TARGET]
+
+
+def _metrics(y_true, y_pred) -> dict:
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    return {
+        "r2": round(float(r2_score(y_true, y_pred)), 4),
+        "mae": round(float(mean_absolute_error(y_true, y_pred)), 4),
+        "rmse": round(float(np.sqrt(mean_squared_error(y_true, y_pred))), 4),
+    }
+
+
+def _save_artifacts(model, X: pd.DataFrame):
+    """
+    Write the .pkl, then the .npz export, each via temp file + os.replace
+    (readers never see partial files). The .npz goes last: in auto mode
+    predict_yield treats an export older than the .pkl as stale.
+    """
+    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MODEL_PATH.with_name(MODEL_PATH.name + ".part")
+    joblib.dump(model, tmp)
+    os.replace(tmp, MODEL_PATH)
+    export_model(model, X, NUMPY_MODEL_PATH)
+    print(f"💾 Model saved at: {MODEL_PATH}")
+
+
+def read_meta() -> dict:
+    if not META_PATH.exists():
+        return {}
+    with open(META_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(meta: dict):
+    tmp = META_PATH.with_name(META_PATH.name + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, default=str)
+    os.replace(tmp, META_PATH)
+
+
+def train(
+    data_path: Path = DATA_PATH,
+    *,
+    weather_path=None,
+    soil_path=None,
+    live: bool = False,
+    thread_count: int = THREAD_COUNT,
+    train_dir: Path = TRAIN_DIR,
+    chunksize: int = CHUNK_ROWS,
+    snapshot_interval: int = 60,
+    resume: bool = True,
+    weather_store: bool = True,
+    params: dict = None,
+) -> dict:
+    """Load, train, evaluate and save the model (+ numpy export and meta json). Returns the meta dict."""
+    from catboost import CatBoostRegressor
+    from sklearn.model_selection import train_test_split
+
+    started = time.perf_counter()
+    profile, weather, soil = training_context(weather_path, soil_path, live)
+    X, y = prepare_training_frame(data_path, (profile, weather, soil),
+                                  chunksize=chunksize, weather_store=weather_store)
+
+    # 🔹 Split train/test
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # 🔹 Train CatBoost (snapshots let an interrupted run continue)
+    SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if not resume and SNAPSHOT_PATH.exists():
+        SNAPSHOT_PATH.unlink()
+    elif SNAPSHOT_PATH.exists():
+        print(f"⏩ Resuming from snapshot: {SNAPSHOT_PATH}")
+    model = CatBoostRegressor(
+        **(params or PARAMS),
+        thread_count=thread_count,
+        train_dir=str(train_dir),
+        save_snapshot=True,
+        snapshot_file=str(SNAPSHOT_PATH),
+        snapshot_interval=snapshot_interval,
+    )
+    fit_started = time.perf_counter()
+    # 👇 Important: pass cat_features=CAT_COLS
+    model.fit(X_train, y_train, eval_set=(X_test, y_test), cat_features=CAT_COLS)
+    fit_seconds = time.perf_counter() - fit_started
+
+    # 🔹 Evaluate
+    metrics = _metrics(y_test, model.predict(X_test))
+    print("\n✅ Model trained successfully")
+    print(f"R² = {metrics['r2']:.3f} | MAE = {metrics['mae']:.2f} | RMSE = {metrics['rmse']:.2f}")
+
+    # 🔹 Save model + numpy export (serving without catboost)
+    _save_artifacts(model, X)
+    SNAPSHOT_PATH.unlink(missing_ok=True)  # finished: next run starts fresh
+
+    meta = {
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "data_path": str(data_path),
+        "rows": int(len(X)),
+        "rows_seen": int(len(X)),   # dataset rows the model has trained on (incremental watermark)
+        "iterations": int(model.tree_count_),
+        "best_iteration": model.get_best_iteration(),
+        "metrics": metrics,
+        "params": params or PARAMS,
+        "thread_count": thread_count,
+        "weather_store": feature_store.STORE_PATH.exists() and weather_store,
+        "context": {"profile": {k: profile.get(k) for k in ("state", "district", "pincode")},
+                    "weather": weather, "soil": soil},
+        "fit_seconds": round(fit_seconds, 1),
+        "train_seconds": round(time.perf_counter() - started, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    _write_meta(meta)
+    print(f"📈 Peak RSS {meta['peak_rss_mb']:.0f} MB | {meta['train_seconds']} s")
+    return meta
+
+
+def update(
+    data_path: Path = DATA_PATH,
+    *,
+    iterations: int = UPDATE_ITERATIONS,
+    holdout_frac: float = HOLDOUT_FRAC,
+    tolerance: float = 0.0,
+    compare_full: bool = False,
+    thread_count: int = THREAD_COUNT,
+    train_dir: Path = TRAIN_DIR,
+    chunksize: int = CHUNK_ROWS,
+    weather_store: bool = True,
+) -> dict:
+    """
+    Warm-start update: continue boosting the current model (init_model) on the
+    dataset rows appended since it was trained. The newest `holdout_frac` of
+    those rows is a rolling holdout neither model has seen; the new model is
+    promoted only if its holdout RMSE is within `tolerance` of the current one.
+    Holdout rows become training rows on the next update.
+    """
+    from catboost import CatBoostRegressor
+
+    meta = read_meta()
+    if not MODEL_PATH.exists() or "rows_seen" not in meta:
+        raise RuntimeError("❌ No trained model with metadata; run a full training first.")
+    current = joblib.load(MODEL_PATH)
+
+    started = time.perf_counter()
+    X, y = prepare_training_frame(data_path, model_context(meta), chunksize=chunksize, weather_store=weather_store)
+    seen = int(meta["rows_seen"])
+    n_new = len(X) - seen
+    n_holdout = int(round(n_new * holdout_frac))
+    if n_new <= 0 or n_new - n_holdout <= 0 or n_holdout <= 0:
+        print(f"✅ Nothing to update: {max(n_new, 0)} new rows since the last fit")
+        return {"promoted": False, "new_rows": max(n_new, 0)}
+
+    # Rolling holdout: newest rows (file order = append order)
+    inc = slice(seen, len(X) - n_holdout)
+    hold = slice(len(X) - n_holdout, len(X))
+    X_inc, y_inc, X_hold, y_hold = X.iloc[inc], y.iloc[inc], X.iloc[hold], y.iloc[hold]
+
+    params = {**meta.get("params", PARAMS), "iterations": iterations}
+    params.pop("early_stopping_rounds", None)  # no eval set: the holdout is kept for the promotion check
+    model = CatBoostRegressor(**params, thread_count=thread_count, train_dir=str(train_dir))
+    fit_started = time.perf_counter()
+    model.fit(X_inc, y_inc, cat_features=CAT_COLS, init_model=current)
+    fit_seconds = time.perf_counter() - fit_started
+
+    before, after = _metrics(y_hold, current.predict(X_hold)), _metrics(y_hold, model.predict(X_hold))
+    promoted = after["rmse"] <= before["rmse"] * (1 + tolerance)
+
+    report = {
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "new_rows": n_new,
+        "trained_rows": len(X_inc),
+        "holdout_rows": n_holdout,
+        "iterations_added": int(model.tree_count_ - current.tree_count_),
+        "holdout_before": before,
+        "holdout_after": after,
+        "promoted": promoted,
+        "fit_seconds": round(fit_seconds, 1),
+        "full_fit_seconds": meta.get("fit_seconds"),
+        "full_fit_source": "last full training",
+    }
+
+    if compare_full:
+        # Same budget as a full refresh: all rows up to the holdout, full params
+        full = CatBoostRegressor(**meta.get("params", PARAMS), thread_count=thread_count, train_dir=str(train_dir))
+        t0 = time.perf_counter()
+        full.fit(X.iloc[:hold.start], y.iloc[:hold.start], eval_set=(X_hold, y_hold), cat_features=CAT_COLS)
+        report["full_fit_seconds"] = round(time.perf_counter() - t0, 1)
+        report["full_fit_source"] = "retrained now"
+        report["holdout_full_retrain"] = _metrics(y_hold, full.predict(X_hold))
+
+    if report["full_fit_seconds"]:
+        report["saved_seconds"] = round(report["full_fit_seconds"] - report["fit_seconds"], 1)
+        report["speedup"] = round(report["full_fit_seconds"] / max(report["fit_seconds"], 1e-3), 1)
+
+    print(f"📊 Holdout RMSE {before['rmse']:.3f} -> {after['rmse']:.3f} on {n_holdout:,} newest rows")
+    if promoted:
+        _save_artifacts(model, X.iloc[:hold.start])
+        meta.update(
+            rows=int(len(X)), rows_seen=hold.start, iterations=int(model.tree_count_),
+            trained_at=report["updated_at"],
+        )
+        print("✅ Updated model promoted")
+    else:
+        print("❌ Holdout error regressed; current model kept")
+    if "saved_seconds" in report:
+        print(f"⏱️ Update fit {report['fit_seconds']} s vs full fit {report['full_fit_seconds']} s "
+              f"({report['full_fit_source']}): {report['speedup']}x faster")
+
+    report["total_seconds"] = round(time.perf_counter() - started, 1)
+    meta["last_update"] = report
+    meta.setdefault("updates", []).append(
+        {k: report[k] for k in ("updated_at", "new_rows", "promoted", "fit_seconds")}
+        | {"rmse_before": before["rmse"], "rmse_after": after["rmse"]}
+    )
+    _write_meta(meta)
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train the CatBoost yield model (offline by default)")
+    ap.add_argument("--data", type=Path, default=DATA_PATH, help="crop dataset CSV")
+    ap.add_argument("--weather", help="JSON with rainfall_7d_total / temp_7d_avg / humidity_7d_avg")
+    ap.add_argument("--soil", help="JSON as returned by summarize_soil (pH, sand_pct, ...)")
+    ap.add_argument("--live", action="store_true", help="fetch weather/soil for the active profile (network)")
+    ap.add_argument("--threads", type=int, default=THREAD_COUNT, help="CatBoost thread_count (-1 = all cores)")
+    ap.add_argument("--train-dir", type=Path, default=TRAIN_DIR, help="CatBoost train_dir (logs)")
+    ap.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="CSV rows per chunk")
+    ap.add_argument("--snapshot-interval", type=int, default=60, help="seconds between snapshots")
+    ap.add_argument("--no-resume", action="store_true", help="discard an existing snapshot and start over")
+    ap.add_argument("--no-weather-store", action="store_true", help="skip the seasonal weather join")
+    ap.add_argument("--incremental", action="store_true",
+                    help="continue boosting the current model on rows appended since its last fit")
+    ap.add_argument("--iterations", type=int, default=UPDATE_ITERATIONS, help="trees added by --incremental")
+    ap.add_argument("--holdout", type=float, default=HOLDOUT_FRAC, help="newest share of new rows held out")
+    ap.add_argument("--tolerance", type=float, default=0.0, help="allowed relative holdout RMSE increase")
+    ap.add_argument("--compare-full", action="store_true", help="also time a full retrain for the report")
+    args = ap.parse_args(argv)
+
+    if args.incremental:
+        update(
+            args.data,
+            iterations=args.iterations,
+            holdout_frac=args.holdout,
+            tolerance=args.tolerance,
+            compare_full=args.compare_full,
+            thread_count=args.threads,
+            train_dir=args.train_dir,
+            chunksize=args.chunksize,
+            weather_store=not args.no_weather_store,
+        )
+        return
 
-# 🔹 Evaluate
-y_pred = model.predict(X_test)
-r2 = r2_score(y_test, y_pred)
-mae = mean_absolute_error(y_test, y_pred)
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    train(
+        args.data,
+        weather_path=args.weather,
+        soil_path=args.soil,
+        live=args.live,
+        thread_count=args.threads,
+        train_dir=args.train_dir,
+        chunksize=args.chunksize,
+        snapshot_interval=args.snapshot_interval,
+        resume=not args.no_resume,
+        weather_store=not args.no_weather_store,
+    )
 
-print("\n✅ Model trained successfully")
-print(f"R² = {r2:.3f} | MAE = {mae:.2f} | RMSE = {rmse:.2f}")
 
-# 🔹 Save model
-MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-joblib.dump(model, MODEL_PATH)
-print(f"💾 Model saved at: {MODEL_PATH}")
+if __name__ == "__main__":
+    main()
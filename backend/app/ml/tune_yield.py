@@ -0,0 +1,341 @@
+# app/ml/tune_yield.py
+"""
+Hyperparameter search for the yield model.
+
+    python -m app.ml.tune_yield [--data CSV] [--trials 27] [--folds 3]
+                                [--budget-seconds 1800] [--cpu-seconds 0]
+                                [--cpus N] [--workers W] [--sample-rows 100000]
+
+Candidate configurations (the current train_yield.PARAMS is always one of
+them) go through successive halving: every survivor is k-fold cross-validated
+at the rung's iteration count, and only the best 1/ETA move on to the next,
+longer rung. Each (trial, fold) fit is one task in a process pool; the pool
+size times CatBoost's thread_count stays within --cpus. Scheduling stops at
+the wall-clock (--budget-seconds) or CPU-time (--cpu-seconds) budget: fits
+already running are allowed to finish and are counted, and every trial keeps
+the result of its last completed rung. A fit that raises fails only its
+trial; the search goes on.
+
+For every trial the fold-0 model of its last rung is exported to the numpy
+evaluator and timed (1-row latency and per-row cost in a 1000-row batch),
+so the report can give a Pareto front of CV RMSE vs serving latency.
+Results go to artifacts/tuning/tune_<timestamp>.json.
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from app.ml.features import CAT_COLS
+
+TUNING_DIR = Path(__file__).resolve().parent / "artifacts" / "tuning"
+ETA = 3                       # keep the best 1/ETA of each rung
+
+# 🔹 Search space
+SPACE = {
+    "depth": [4, 5, 6, 7, 8],
+    "learning_rate": (0.02, 0.2),     # log-uniform
+    "l2_leaf_reg": [1, 3, 5, 10],
+    "border_count": [32, 64, 128, 254],
+}
+
+
+def sample_configs(n: int, seed: int = 0) -> list:
+    """`n` configurations; the first is train_yield's current setup."""
+    from app.ml.train_yield import PARAMS
+
+    rng = np.random.default_rng(seed)
+    configs = [{k: PARAMS[k] for k in ("depth", "learning_rate", "l2_leaf_reg") if k in PARAMS} | {"border_count": 254}]
+    lo, hi = np.log(SPACE["learning_rate"][0]), np.log(SPACE["learning_rate"][1])
+    while len(configs) < n:
+        cfg = {
+            "depth": int(rng.choice(SPACE["depth"])),
+            "learning_rate": round(float(np.exp(rng.uniform(lo, hi))), 4),
+            "l2_leaf_reg": int(rng.choice(SPACE["l2_leaf_reg"])),
+            "border_count": int(rng.choice(SPACE["border_count"])),
+        }
+        if cfg not in configs:
+            configs.append(cfg)
+    return configs[:n]
+
+
+def rung_schedule(n_trials: int, min_iterations: int, max_iterations: int, eta: int = ETA) -> list:
+    """Iterations per rung: min_iterations * eta^r, capped at max_iterations, until one survivor is left."""
+    rungs, iters, survivors = [], min_iterations, n_trials
+    while True:
+        rungs.append(min(iters, max_iterations))
+        if iters >= max_iterations or survivors <= 1:
+            return rungs
+        iters *= eta
+        survivors = max(1, math.ceil(survivors / eta))
+
+
+def pareto_front(trials: list, keys=("cv_rmse", "row_latency_ms")) -> list:
+    """Ids of trials not dominated on `keys` (lower is better for all)."""
+    scored = [t for t in trials if all(t.get(k) is not None for k in keys)]
+    front = []
+    for t in scored:
+        dominated = any(
+            all(o[k] <= t[k] for k in keys) and any(o[k] < t[k] for k in keys)
+            for o in scored if o is not t
+        )
+        if not dominated:
+            front.append(t["id"])
+    return sorted(front, key=lambda i: next(t[keys[1]] for t in scored if t["id"] == i))
+
+
+# ---------- Worker side ----------
+_data = {}
+
+
+def _init_worker(X, y, folds):
+    _data.update(X=X, y=y, folds=folds)
+
+
+def _fit_fold(task: dict) -> dict:
+    from catboost import CatBoostRegressor
+
+    X, y = _data["X"], _data["y"]
+    train_idx, test_idx = _data["folds"][task["fold"]]
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    model = CatBoostRegressor(
+        **task["params"], iterations=task["iterations"], loss_function="RMSE", random_seed=42,
+        thread_count=task["threads"], verbose=0, allow_writing_files=False,
+    )
+    model.fit(X.iloc[train_idx], y.iloc[train_idx], cat_features=CAT_COLS)
+    pred = model.predict(X.iloc[test_idx])
+    out = {
+        **{k: task[k] for k in ("trial", "rung", "fold")},
+        "rmse": float(np.sqrt(np.mean((y.iloc[test_idx].to_numpy() - pred) ** 2))),
+        "fit_seconds": time.perf_counter() - t0,
+        "cpu_seconds": time.process_time() - cpu0,
+        "model": None,
+    }
+    if task["fold"] == 0:  # keep one model per trial/rung for size + latency
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "model.cbm"
+            model.save_model(str(path))
+            out["model"] = path.read_bytes()
+    return out
+
+
+# ---------- Driver ----------
+def _run_rung(pool, fit, tasks: list, workers: int, deadline: float, cpu_left: float = None) -> dict:
+    """
+    Run one rung's (trial, fold) fits, at most `workers` at a time, until all
+    are done or the budget runs out (past `deadline`, or `cpu_left` CPU
+    seconds spent). Then nothing new starts, fits not started yet are
+    cancelled, and the running ones are waited for and kept.
+    Returns {"results": {trial: {fold: res}}, "errors": {trial: msg}, "cpu_seconds", "stop_reason"}.
+    """
+    results, errors = {}, {}
+    spent, stop_reason = 0.0, None
+    queue, pending = list(tasks), {}
+    while queue or pending:
+        while queue and len(pending) < workers and stop_reason is None:
+            task = queue.pop(0)
+            if task["trial"] not in errors:   # no more folds for a failed trial
+                pending[pool.submit(fit, task)] = task
+        if not pending:
+            break
+        timeout = None if stop_reason else max(0.0, deadline - time.perf_counter())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for fut in done:
+            task = pending.pop(fut)
+            try:
+                res = fut.result()
+            except Exception as e:
+                errors.setdefault(task["trial"], f"fold {task['fold']}: {e}")
+                print(f"⚠️ Trial {task['trial']} failed (rung {task['rung']}, fold {task['fold']}): {e}")
+                continue
+            results.setdefault(res["trial"], {})[res["fold"]] = res
+            spent += res["cpu_seconds"]
+        if stop_reason is None and time.perf_counter() >= deadline:
+            stop_reason = "wall-clock budget"
+        elif stop_reason is None and cpu_left is not None and spent >= cpu_left:
+            stop_reason = "cpu budget"
+        if stop_reason:
+            for fut in [f for f in pending if f.cancel()]:
+                del pending[fut]
+    return {"results": results, "errors": errors, "cpu_seconds": spent, "stop_reason": stop_reason}
+
+
+def _measure(blob: bytes, X) -> dict:
+    """Model size and numpy-evaluator latency for one saved CatBoost model."""
+    from catboost import CatBoostRegressor
+    from app.ml import features, numpy_model
+    from app.ml.compact_model import numpy_latency
+
+    model = CatBoostRegressor()
+    model.load_model(blob=blob)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = numpy_model.export_model(model, X, Path(tmp) / "model.npz")
+        npz_bytes = path.stat().st_size
+        m = numpy_model.load_model(path)
+
+    num, cat = features.encode_frame(X.iloc[:1000])
+    latency = numpy_latency(m, num, cat)
+    return {"cbm_bytes": len(blob), "npz_bytes": npz_bytes, "trees": int(model.tree_count_), **latency}
+
+
+def tune(
+    data_path=None,
+    *,
+    n_trials: int = 27,
+    folds: int = 3,
+    budget_seconds: float = 1800,
+    cpu_seconds: float = 0,
+    cpus: int = None,
+    workers: int = None,
+    sample_rows: int = 100_000,
+    min_iterations: int = 100,
+    max_iterations: int = None,
+    seed: int = 0,
+) -> dict:
+    from sklearn.model_selection import KFold
+    from app.ml import train_yield
+
+    started = time.perf_counter()
+    deadline = started + budget_seconds
+    cpus = cpus or os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, cpus))
+    threads = max(1, cpus // workers)          # workers * threads <= cpus
+    max_iterations = max_iterations or train_yield.PARAMS["iterations"]
+
+    X, y = train_yield.prepare_training_frame(data_path or train_yield.DATA_PATH, train_yield.model_context())
+    if len(X) > sample_rows:
+        idx = np.random.default_rng(seed).choice(len(X), sample_rows, replace=False)
+        X, y = X.iloc[np.sort(idx)].reset_index(drop=True), y.iloc[np.sort(idx)].reset_index(drop=True)
+    fold_idx = list(KFold(folds, shuffle=True, random_state=seed).split(X))
+
+    configs = sample_configs(n_trials, seed)
+    trials = [{"id": i, "params": c, "rung": None, "iterations": None, "cv_rmse": None,
+               "fold_rmse": None, "fit_seconds": 0.0, "cpu_seconds": 0.0, "status": "pending"}
+              for i, c in enumerate(configs)]
+    blobs = {}
+    rungs = rung_schedule(len(trials), min_iterations, max_iterations)
+    print(f"🔎 {len(trials)} configs | rungs {rungs} | {folds}-fold CV on {len(X):,} rows | "
+          f"{workers} workers x {threads} threads")
+
+    spent_cpu, stop_reason = 0.0, None
+    survivors = list(range(len(trials)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, fold_idx)) as pool:
+        for r, iterations in enumerate(rungs):
+            tasks = [{"trial": t, "rung": r, "fold": f, "iterations": iterations,
+                      "params": trials[t]["params"], "threads": threads}
+                     for t in survivors for f in range(folds)]
+            out = _run_rung(pool, _fit_fold, tasks, workers, deadline,
+                            cpu_left=cpu_seconds - spent_cpu if cpu_seconds else None)
+            spent_cpu += out["cpu_seconds"]
+            stop_reason = out["stop_reason"]
+
+            # record trials whose folds all finished at this rung
+            completed = []
+            for t in survivors:
+                by_fold = out["results"].get(t, {})
+                if t in out["errors"]:
+                    trials[t].update(status=f"failed at rung {r}", error=out["errors"][t])
+                    continue
+                if len(by_fold) < folds:
+                    trials[t]["status"] = "stopped (budget)"
+                    continue
+                scores = [by_fold[f]["rmse"] for f in range(folds)]
+                trials[t].update(
+                    rung=r, iterations=iterations, cv_rmse=round(float(np.mean(scores)), 4),
+                    fold_rmse=[round(s, 4) for s in scores], status="completed",
+                )
+                trials[t]["fit_seconds"] += sum(v["fit_seconds"] for v in by_fold.values())
+                trials[t]["cpu_seconds"] += sum(v["cpu_seconds"] for v in by_fold.values())
+                blobs[t] = by_fold[0]["model"]
+                completed.append(t)
+            print(f"  rung {r} ({iterations} it): {len(completed)} trials scored "
+                  f"| {time.perf_counter() - started:.0f} s, {spent_cpu:.0f} cpu-s")
+            if stop_reason or r == len(rungs) - 1:
+                break
+
+            completed.sort(key=lambda t: trials[t]["cv_rmse"])
+            survivors = completed[:max(1, math.ceil(len(completed) / ETA))]
+            for t in completed[len(survivors):]:
+                trials[t]["status"] = f"halved at rung {r}"
+
+    # 🔹 Size + serving latency, measured one at a time in this process
+    for t, blob in blobs.items():
+        try:
+            trials[t].update(_measure(blob, X))
+        except Exception as e:
+            print(f"⚠️ Could not measure trial {t}: {e}")
+    for t in trials:
+        t["fit_seconds"], t["cpu_seconds"] = round(t["fit_seconds"], 1), round(t["cpu_seconds"], 1)
+
+    front = pareto_front(trials)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(X),
+        "folds": folds,
+        "rungs": rungs,
+        "eta": ETA,
+        "cpus": cpus,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "budget_seconds": budget_seconds,
+        "cpu_budget_seconds": cpu_seconds or None,
+        "stopped_by": stop_reason,
+        "wall_seconds": round(time.perf_counter() - started, 1),
+        "cpu_seconds": round(spent_cpu, 1),
+        "pareto_front": front,
+        "trials": trials,
+    }
+    TUNING_DIR.mkdir(parents=True, exist_ok=True)
+    out = TUNING_DIR / f"tune_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'id':>3} {'depth':>5} {'lr':>7} {'l2':>3} {'borders':>7} {'iters':>5} {'cv rmse':>9} "
+          f"{'1-row ms':>9} {'batch µs/row':>12} {'npz KB':>7}")
+    for i in front:
+        t = trials[i]
+        p = t["params"]
+        print(f"{i:>3} {p['depth']:>5} {p['learning_rate']:>7} {p['l2_leaf_reg']:>3} {p['border_count']:>7} "
+              f"{t['iterations']:>5} {t['cv_rmse']:>9.4f} {t['row_latency_ms']:>9.3f} "
+              f"{t['batch_row_us']:>12.1f} {t['npz_bytes'] / 1024:>7.0f}")
+    print(f"💾 Pareto front ({len(front)} of {len(trials)} trials) -> {out}"
+          + (f" | stopped by {stop_reason}" if stop_reason else ""))
+    report["path"] = str(out)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Successive-halving CV search for the yield model")
+    ap.add_argument("--data", type=Path, help="crop dataset CSV (default: train_yield.DATA_PATH)")
+    ap.add_argument("--trials", type=int, default=27)
+    ap.add_argument("--folds", type=int, default=3)
+    ap.add_argument("--budget-seconds", type=float, default=1800, help="wall-clock budget")
+    ap.add_argument("--cpu-seconds", type=float, default=0, help="CPU-time budget across workers (0 = none)")
+    ap.add_argument("--cpus", type=int, help="cores to use in total (default: all)")
+    ap.add_argument("--workers", type=int, help="parallel fits (default: --cpus)")
+    ap.add_argument("--sample-rows", type=int, default=100_000, help="rows used for the search")
+    ap.add_argument("--min-iterations", type=int, default=100, help="iterations of the first rung")
+    ap.add_argument("--max-iterations", type=int, help="iterations of the last rung (default: train_yield's)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    tune(
+        args.data,
+        n_trials=args.trials,
+        folds=args.folds,
+        budget_seconds=args.budget_seconds,
+        cpu_seconds=args.cpu_seconds,
+        cpus=args.cpus,
+        workers=args.workers,
+        sample_rows=args.sample_rows,
+        min_iterations=args.min_iterations,
+        max_iterations=args.max_iterations,
+        seed=args.seed,
+    )
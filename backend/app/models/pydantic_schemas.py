@@ -16,6 +16,13 @@ class CropRecommendation(BaseModel):
 class CropRecommendResponse(BaseModel):
     recommendations: List[CropRecommendation]
 
+class CropRecommendBatchRequest(BaseModel):
+    farms: List[CropRecommendRequest]
+    top_k: int = Field(5, gt=0, le=50, description="Crops returned per farm")
+
+class CropRecommendBatchResponse(BaseModel):
+    results: List[List[CropRecommendation]]
+
 
 # ---------- Irrigation ----------
 class IrrigationRequest(BaseModel):
@@ -181,3 +188,26 @@ class WhatIfRequest(BaseModel):
     # New inputs from frontend
     sowing_delay: Optional[int] = 0        # delay in weeks
     irrigation_delay: Optional[int] = 0    # delay in weeks
+
+
+class SweepAxis(BaseModel):
+    """Either explicit `values`, or `steps` evenly spaced points from `start` to `stop`."""
+    values: Optional[List[float]] = None
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = Field(5, ge=1, le=100)
+
+
+class WhatIfSweepRequest(BaseModel):
+    crop: Optional[str] = None
+    pincode: Optional[str] = None
+    area_ha: Optional[float] = None
+    season: Optional[str] = None
+
+    # Swept overrides (omitted axis = current conditions / no delay)
+    rainfall_mm: Optional[SweepAxis] = None
+    temp_c: Optional[SweepAxis] = None
+    humidity_pct: Optional[SweepAxis] = None
+    soil_pH: Optional[SweepAxis] = None
+    sowing_delay: Optional[SweepAxis] = None      # weeks
+    irrigation_delay: Optional[SweepAxis] = None  # weeks
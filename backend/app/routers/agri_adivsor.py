@@ -1,7 +1,7 @@
 # app/routers/agri_advisors.py
 
 from fastapi import APIRouter, HTTPException
-from app.services import recommend_service, pest_service, profile_service
+from app.services import profile_service, snapshot_service
 
 router = APIRouter(prefix="/agri-advisor", tags=["Agri-Advisor"])
 
@@ -14,8 +14,10 @@ def get_dashboard():
     {
       "profile": { ... },
       "recommendations": [ {crop, score, rationale}, ... ],
-      "pest_alerts": [ {pest, disease, risk, note}, ... ]
+      "pest_alerts": [ {pest, disease, risk, note}, ... ],
+      "snapshot": {source, computed_at}
     }
+    Served from today's snapshot when there is one (see snapshot_service).
     """
     try:
         # ✅ Load active farmer profile
@@ -23,16 +25,13 @@ def get_dashboard():
         if not profile:
             raise HTTPException(status_code=404, detail="No active profile found")
 
-        # ✅ Get crop recommendations (auto-uses profile/soil/weather)
-        recommendations = recommend_service.get_recommendations()
-
-        # ✅ Get pest/disease alerts (auto-uses profile/weather)
-        pest_alerts = pest_service.get_pest_alerts()
+        # ✅ Crop recommendations + pest/disease alerts (profile/soil/weather), snapshotted daily
+        snapshot, source = snapshot_service.get_or_compute("advisor", profile)
 
         return {
-            "profile": profile,
-            "recommendations": recommendations,
-            "pest_alerts": pest_alerts
+            "profile": profile,   # live profile; snapshots don't keep it
+            **snapshot["data"],
+            "snapshot": snapshot_service.freshness(snapshot, source),
         }
 
     except Exception as e:
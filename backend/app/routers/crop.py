@@ -3,6 +3,9 @@ from pydantic import BaseModel
 from typing import List
 
 from app.schemas.response import ResponseModel, CropRecommendationItem, CropData
+from app.models.pydantic_schemas import CropRecommendBatchRequest, CropRecommendBatchResponse
+from app.services.crop_service import recommend_crops_batch
+from app.services.rule_engine import get_ruleset, matching_outputs
 
 router = APIRouter(
     prefix="/crop",
@@ -26,31 +29,16 @@ async def recommend_crop(input: CropInput):
     recommendations: List[CropRecommendationItem] = []
     notes: List[str] = []
 
-    # --- Crop suggestion rules (simple, extendable) ---
+    # --- Crop suggestion rules (declarative, see app/data/rules.json) ---
     s_pH = input.soil_pH
     rain = input.rainfall_mm
     season = input.season.lower()
     moisture = input.soil_moisture
 
-    # Rice candidate
-    if 5.5 <= s_pH <= 7.0 and rain >= 800 and season == "kharif":
-        recommendations.append(CropRecommendationItem(crop="rice", reason="Neutral pH and adequate rainfall in Kharif."))
-
-    # Maize candidate
-    if 5.5 <= s_pH <= 7.5 and rain >= 500:
-        recommendations.append(CropRecommendationItem(crop="maize", reason="Wide pH tolerance and moderate rainfall."))
-
-    # Millets for low moisture
-    if moisture < 25:
-        recommendations.append(CropRecommendationItem(crop="millets", reason="Tolerates low soil moisture and drought conditions."))
-
-    # Wheat in rabi if conditions OK
-    if season == "rabi" and 6.0 <= s_pH <= 7.5 and 400 <= rain <= 800:
-        recommendations.append(CropRecommendationItem(crop="wheat", reason="Favorable pH and moderate water requirement in Rabi season."))
-
-    # Pulses fallback for summer/low rainfall
-    if season == "summer" and rain < 400:
-        recommendations.append(CropRecommendationItem(crop="pulses", reason="Thrives in low rainfall and warm summer conditions."))
+    # Candidate crops ("crop_recommend" ruleset)
+    facts = {"soil_pH": s_pH, "rainfall_mm": rain, "season": season, "soil_moisture": moisture}
+    for rule in matching_outputs(get_ruleset("crop_recommend"), facts):
+        recommendations.append(CropRecommendationItem(crop=rule["crop"], reason=rule["reason"]))
 
     # --- Notes (always list) ---
     if s_pH < 6.0:
@@ -86,3 +74,22 @@ async def recommend_crop(input: CropInput):
         data=crop_data,
         message="Crop recommendation fetched successfully"
     )
+
+
+@router.post("/recommend/batch", response_model=ResponseModel)
+async def recommend_crop_batch(req: CropRecommendBatchRequest):
+    """
+    Score many farms' (pH, rainfall, season) against the whole crop catalog
+    in one vectorized pass and return the top-k crops per farm (input order).
+    """
+    results = recommend_crops_batch(
+        [f.soil_pH for f in req.farms],
+        [f.rainfall_mm for f in req.farms],
+        [f.season for f in req.farms],
+        top_k=req.top_k,
+    )
+    return ResponseModel(
+        success=True,
+        data=CropRecommendBatchResponse(results=results),
+        message=f"Crop suitability scored for {len(results)} farms"
+    )
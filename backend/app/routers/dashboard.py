@@ -1,15 +1,9 @@
 # backend/app/routers/dashboard.py
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional, Dict, Any
-from app.services.weather_service import fetch_weather_summary
-from app.services.crop_service import recommend_crops as _recommend_crops
-from app.services.irrigation_service import calculate_irrigation
-from app.services.fertilizer_service import get_fertilizer_advice
-from app.services.pest_service import get_pest_alerts
-from app.models.pydantic_schemas import (
-    CropRecommendRequest, IrrigationRequest, FertilizerRequest, PestAlertRequest
-)
+from typing import Optional
+from app.services import dashboard_service
 from app.schemas.response import ResponseModel
+from app.utils.fields import parse_fields
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -20,105 +14,51 @@ def get_dashboard(
     crop: Optional[str] = Query(None, description="Target crop (optional)"),
     area_ha: float = Query(1.0, gt=0, description="Farm area in hectares"),
     soil_pH: Optional[float] = Query(None, description="Soil pH if known"),
-    soil_moisture: Optional[float] = Query(None, description="% VWC if known"),
-    season: Optional[str] = Query(None, description="kharif/rabi/annual (optional)")
+    soil_moisture: Optional[float] = Query(None, description="% VWC if known (not used by the irrigation preview)"),
+    season: Optional[str] = Query(None, description="kharif/rabi/annual (optional)"),
+    deadline_ms: Optional[float] = Query(None, gt=0, description="Per-widget deadline (default DASHBOARD_DEADLINE_MS)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated widgets to compute: " + ",".join(dashboard_service.DASHBOARD_FIELDS)
+    ),
 ) -> ResponseModel:
     """
-    Aggregates quick-preview data for the Dashboard widgets:
+    Aggregates quick-preview data for the Dashboard widgets, computed concurrently:
     - Weather summary (last 7 days)
     - Crop recommendations (if soil_pH provided)
     - Irrigation preview (weekly)
     - Fertilizer preview (mini-summary)
-    - Pest alert snapshot (based on avg weather)
-    """
-    result: Dict[str, Any] = {
-        "weather": None,
-        "crop_recommendations": [],
-        "irrigation_preview": None,
-        "fertilizer_preview": None,
-        "pest_preview": {"alerts": []},
-        "errors": {}
-    }
+    - Pest alert snapshot (based on avg weather, if crop provided)
 
+    Widgets that miss their deadline are listed under "pending" with a
+    retry_token for /dashboard/widgets/{token}; per-widget timings and
+    status are in "meta". With fields= only those widgets are computed.
+    """
+    selected = parse_fields(fields, dashboard_service.DASHBOARD_FIELDS)
     try:
-        # 1) Weather summary (always required)
-        weather = fetch_weather_summary(pincode)
-        result["weather"] = weather
-
-        # Extract helper values
-        rainfall_7d = weather.get("rainfall_7d_total", 0.0)
-        avg_temp = weather.get("temp_7d_avg", 0.0)
-        avg_hum = weather.get("humidity_7d_avg", 0.0)
-
-        # 2) Crop recommendations (if soil_pH available)
-        if soil_pH is not None:
-            try:
-                req = CropRecommendRequest(
-                    season=season or "kharif",
-                    soil_pH=soil_pH,
-                    rainfall_mm=rainfall_7d,
-                    region=None,
-                )
-                recs = _recommend_crops(req)
-                result["crop_recommendations"] = [r.dict() for r in recs]
-            except Exception as e:
-                result["errors"]["crop_recommendations"] = str(e)
-
-        # 3) Irrigation preview
-        try:
-            irr_req = IrrigationRequest(
-                crop=crop or "rice",
-                area_hectares=area_ha,
-                soil_moisture=soil_moisture if soil_moisture is not None else 20.0,
-                rainfall_forecast_mm=rainfall_7d,
-            )
-            irr = calculate_irrigation(irr_req)
-            result["irrigation_preview"] = irr.dict()
-        except Exception as e:
-            result["errors"]["irrigation"] = str(e)
-
-        # 4) Fertilizer preview
-        try:
-            fert_req = FertilizerRequest(
-                crop=crop or "rice",
-                area_ha=area_ha,
-                season=season or "kharif",
-                soil_pH=soil_pH,
-                soil_N_level="medium",
-                soil_P_level="medium",
-                soil_K_level="medium",
-                yield_target=None
-            )
-            fert = get_fertilizer_advice(fert_req)
-            result["fertilizer_preview"] = {
-                "per_ha_NPK_kg": fert.per_ha_NPK_kg,
-                "application_schedule": fert.application_schedule[:2],
-                "cautions": fert.cautions[:1],
-            }
-        except Exception as e:
-            result["errors"]["fertilizer"] = str(e)
-
-        # 5) Pest alerts
-        try:
-            if crop:
-                pest_req = PestAlertRequest(
-                    crop=crop,
-                    season=season or "kharif",
-                    temp_c=avg_temp,
-                    humidity=avg_hum
-                )
-                alerts = get_pest_alerts(pest_req)
-                result["pest_preview"] = {
-                    "alerts": [a.dict() for a in alerts[:3]]
-                }
-        except Exception as e:
-            result["errors"]["pest"] = str(e)
-
+        result = dashboard_service.build_dashboard(
+            pincode, crop=crop, area_ha=area_ha, soil_pH=soil_pH, season=season, deadline_ms=deadline_ms,
+            fields=selected,
+        )
         return ResponseModel(
             success=True,
-            message="✅ Dashboard summary generated",
+            message="✅ Dashboard summary generated" if not result["pending"] else "⚠️ Dashboard partially generated",
             data=result
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/widgets/{token}", response_model=ResponseModel)
+def get_dashboard_widget(
+    token: str,
+    wait_ms: float = Query(0, ge=0, le=30000, description="Wait up to this long for a still-running widget"),
+) -> ResponseModel:
+    """
+    Result of a widget that was pending in a /dashboard/ response, taken from
+    the same in-flight computation (status: ready | pending | error).
+    """
+    widget = dashboard_service.get_widget(token, wait_ms=wait_ms)
+    if widget is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired retry token")
+    return ResponseModel(success=widget["status"] != "error", message=f"Widget {widget['status']}", data=widget)
@@ -1,33 +1,141 @@
 # app/routers/forecast.py
-from fastapi import APIRouter, HTTPException
-from app.services import forecast_service, profile_service
+import asyncio
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.ml.predict_yield import model_version
+from app.services import forecast_service, profile_service, snapshot_service
 from app.schemas.response import ResponseModel   # ✅ unified response schema
+from app.utils import http_cache
+from app.utils.fields import parse_fields, select
 
 router = APIRouter(prefix="/forecast", tags=["Forecast"])
 
 
 @router.get("/", response_model=ResponseModel)
-def get_forecast():
+async def get_forecast(
+    request: Request,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated parts to compute: " + ",".join(forecast_service.FORECAST_FIELDS)
+    ),
+):
     """
     Generate crop forecast using active saved profile + weather + soil + mandi price.
+    Served from today's snapshot when there is one (see snapshot_service);
+    "snapshot" tells when it was computed. With fields= only those parts are
+    computed (e.g. fields=summary skips the timeline and the mandi price list).
+    ETag from profile version, data date, model version and snapshot; a
+    matching If-None-Match answers 304 without touching the forecast.
+    """
+    selected = parse_fields(fields, forecast_service.FORECAST_FIELDS)
+
+    # 🔹 Load active profile
+    profile = profile_service.get_active_profile()
+    if not profile:
+        raise HTTPException(status_code=404, detail="No active profile found")
+
+    # 🔹 Today's snapshot (O(1)); its timestamp is part of the ETag
+    snapshot = snapshot_service.lookup("forecast", profile)
+    etag = http_cache.etag_for(
+        request, profile_service.profile_version(profile), http_cache.data_date(), model_version(),
+        snapshot and snapshot["computed_at"],
+    )
+
+    async def forecast_payload() -> ResponseModel:
+        try:
+            record, source = snapshot, "snapshot"
+            if record is None and selected is None:
+                # generate the forecast now, one computation per profile (kept as the
+                # snapshot only when complete); its lock and file write stay off the event loop
+                record, source = await asyncio.get_running_loop().run_in_executor(
+                    None, snapshot_service.get_or_compute, "forecast", profile)
+            elif record is None:
+                # a fields= subset is never stored
+                forecast = await forecast_service.generate_forecast_async(profile, selected)
+                record, source = snapshot_service.transient(forecast), "computed"
+
+            return ResponseModel(
+                success=True,
+                data={
+                    "profile": profile,   # ✅ return full profile dict
+                    "forecast": select(record["data"], selected),  # ✅ summary, yieldForecast, riskFactors, marketData
+                    "snapshot": snapshot_service.freshness(record, source),
+                },
+                message=f"Forecast generated successfully for {profile.get('crop', 'Unknown Crop')}"
+            )
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    # a still-pending explanation is not cached: the next poll should pick it up
+    return await http_cache.respond_async(
+        request, etag, forecast_payload,
+        cacheable=lambda r: (r.data["forecast"].get("explanation") or {}).get("status") != "pending",
+    )
+
+
+@router.get("/distribution", response_model=ResponseModel)
+def get_forecast_distribution(
+    n: int = Query(1000, ge=10, le=20000, description="Number of weather scenarios"),
+    method: str = Query("bootstrap", description="bootstrap | climatology"),
+    seed: Optional[int] = Query(None, description="RNG seed for reproducible draws"),
+):
+    """
+    Probabilistic forecast for the active profile: P10/P50/P90 yield and income
+    over N sampled weather scenarios (one batched model call).
+    """
+    if method not in forecast_service.SCENARIO_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {forecast_service.SCENARIO_METHODS}")
+    try:
+        profile = profile_service.get_active_profile()
+        if not profile:
+            raise HTTPException(status_code=404, detail="No active profile found")
+
+        distribution = forecast_service.generate_forecast_distribution(n=n, method=method, seed=seed)
+
+        return ResponseModel(
+            success=True,
+            data={"profile": profile, "distribution": distribution},
+            message=f"Yield distribution over {n} scenarios for {profile.get('crop', 'Unknown Crop')}"
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        # e.g. too few valid weather days to sample from
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/crop-options", response_model=ResponseModel)
+def get_crop_options(
+    crops: Optional[List[str]] = Query(None, description="Candidate crops (default: all known crops)"),
+    seasons: Optional[List[str]] = Query(None, description="Candidate seasons (default: Kharif, Rabi, Summer, Whole Year)"),
+    top: Optional[int] = Query(None, ge=1, le=100, description="Return only the best N options"),
+):
+    """
+    Every candidate crop x season for the active farm, ranked by expected
+    income and risk (one batched yield prediction, cached mandi prices).
     """
     try:
-        # 🔹 Load active profile
         profile = profile_service.get_active_profile()
         if not profile:
             raise HTTPException(status_code=404, detail="No active profile found")
 
-        # 🔹 Generate forecast (auto-uses profile inside forecast_service)
-        forecast = forecast_service.generate_forecast()
+        result = forecast_service.generate_crop_options(crops=crops, seasons=seasons, top=top)
+        best = result["options"][0] if result["options"] else None
 
         return ResponseModel(
             success=True,
-            data={
-                "profile": profile,   # ✅ return full profile dict
-                "forecast": forecast  # ✅ includes summary, yieldForecast, riskFactors, marketData
-            },
-            message=f"Forecast generated successfully for {profile.get('crop', 'Unknown Crop')}"
+            data={"profile": profile, **result},
+            message=(f"Best option: {best['crop']} ({best['season']})" if best else "No crop options")
         )
 
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        # e.g. only blank crops= values
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
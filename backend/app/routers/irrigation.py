@@ -1,21 +1,28 @@
 # app/routers/irrigation.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.models.pydantic_schemas import IrrigationResponse, IrrigationProfile
 from app.services.irrigation_service import calculate_irrigation
-from app.services.profile_service import get_active_profile   # ✅ use new helper
+from app.services.profile_service import get_active_profile, profile_version   # ✅ use new helper
+from app.utils import http_cache
 
 router = APIRouter(prefix="/irrigation", tags=["Irrigation"])
 
 
 @router.get("/", response_model=IrrigationResponse)
-def get_irrigation_advice():
+def get_irrigation_advice(request: Request):
     """
     Endpoint to calculate irrigation requirement using the active profile.
     Active profile = profile with `"active": true` in profiles.json.
+    ETag per profile version and day; If-None-Match answers 304.
     """
+    active_profile = get_active_profile()
+    etag = http_cache.etag_for(request, profile_version(active_profile), http_cache.data_date())
+    return http_cache.respond(request, etag, lambda: _irrigation_payload(active_profile))
+
+
+def _irrigation_payload(active_profile) -> IrrigationResponse:
     try:
-        active_profile = get_active_profile()
         if not active_profile:
             raise HTTPException(status_code=404, detail="No active profile found")
 
@@ -1,17 +1,25 @@
 # backend/app/routers/market.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.services.market_service import fetch_market_price
+from app.services.profile_service import get_active_profile, profile_version
 from app.schemas.response import ResponseModel
+from app.utils import http_cache
 
 router = APIRouter(prefix="/market", tags=["Market Advisory"])
 
 
 @router.get("/", response_model=ResponseModel)
-async def fetch_market_prices():
+def fetch_market_prices(request: Request):
     """
     Fetch market prices for the crop in the active profile.
     Uses AgMarkNet API (via market_service) with fallback to mock prices.
+    ETag per profile version and day; If-None-Match answers 304.
     """
+    etag = http_cache.etag_for(request, profile_version(get_active_profile()), http_cache.data_date())
+    return http_cache.respond(request, etag, _market_payload)
+
+
+def _market_payload() -> ResponseModel:
     try:
         prices = fetch_market_price()  # ✅ profile-driven, no params needed
 
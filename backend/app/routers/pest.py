@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.schemas.response import ResponseModel  # ✅ Correct import
+from app.services.rule_engine import get_ruleset, matching_outputs
 
 router = APIRouter(
     prefix="/pest",
@@ -15,49 +16,8 @@ class PestRequest(BaseModel):
     avg_humidity: float     # average relative humidity %
     recent_rainfall_mm: float
 
-# Knowledge base: major pest/disease conditions
-PEST_DISEASE_DB = {
-    "rice": [
-        {
-            "name": "Rice Blast",
-            "condition": lambda t, h, r: 20 <= t <= 28 and h > 80 and r > 50,
-            "advice": "Fungal disease. Use resistant varieties, avoid excessive nitrogen, apply Tricyclazole if severe."
-        },
-        {
-            "name": "Brown Planthopper",
-            "condition": lambda t, h, r: t > 28 and h > 70,
-            "advice": "Pest attack. Maintain proper spacing, avoid overuse of urea, use neem-based spray if needed."
-        }
-    ],
-    "wheat": [
-        {
-            "name": "Rust (Yellow/Stem/Leaf)",
-            "condition": lambda t, h, r: 10 <= t <= 25 and h > 60,
-            "advice": "Fungal rust common in cool humid conditions. Use resistant cultivars, apply Propiconazole if outbreak detected."
-        }
-    ],
-    "maize": [
-        {
-            "name": "Fall Armyworm",
-            "condition": lambda t, h, r: t > 20,
-            "advice": "Larvae damage leaves and cobs. Regular scouting, pheromone traps, and biocontrol (Trichogramma) recommended."
-        }
-    ],
-    "pulses": [
-        {
-            "name": "Pod Borer",
-            "condition": lambda t, h, r: t > 20 and h > 60,
-            "advice": "Install pheromone traps, encourage natural enemies, avoid indiscriminate insecticide sprays."
-        }
-    ],
-    "millets": [
-        {
-            "name": "Shoot Fly",
-            "condition": lambda t, h, r: t > 25,
-            "advice": "Use timely sowing, resistant varieties, and seed treatment with Imidacloprid for prevention."
-        }
-    ]
-}
+# Knowledge base: major pest/disease conditions live in app/data/rules.json → "pest_management"
+PEST_RULESET = "pest_management"
 
 @router.post("/recommend", response_model=ResponseModel)
 def recommend_pest_management(payload: PestRequest):
@@ -65,13 +25,17 @@ def recommend_pest_management(payload: PestRequest):
     possible_threats = []
     notes = []
 
-    if crop in PEST_DISEASE_DB:
-        for issue in PEST_DISEASE_DB[crop]:
-            if issue["condition"](payload.avg_temp_c, payload.avg_humidity, payload.recent_rainfall_mm):
-                possible_threats.append({
-                    "name": issue["name"],
-                    "advice": issue["advice"]
-                })
+    facts = {
+        "crop": crop,
+        "temp_c": payload.avg_temp_c,
+        "humidity_pct": payload.avg_humidity,
+        "rainfall_mm": payload.recent_rainfall_mm,
+    }
+    for issue in matching_outputs(get_ruleset(PEST_RULESET), facts):
+        possible_threats.append({
+            "name": issue["name"],
+            "advice": issue["advice"]
+        })
 
     if not possible_threats:
         notes.append("No major pest or disease risk detected based on current conditions.")
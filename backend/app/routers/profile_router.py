@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict
-from ..services import profile_service
+from ..services import profile_service, snapshot_service
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
@@ -19,6 +19,9 @@ def add_or_update(profile: Dict):
         raise HTTPException(status_code=400, detail="Phone number is required")
 
     result = profile_service.add_or_update_profile(profile)
+    if result["message"] != "No changes detected":
+        # 🔹 Recompute this profile's forecast / advisor snapshots right away
+        snapshot_service.refresh_profile(result["profile"])
 
     # Differentiate between create, update, and no-change
     if result["message"] == "No changes detected":
@@ -49,6 +52,7 @@ def switch_profile(phone: str):
     result = profile_service.switch_profile(phone)
     if result["profile"] is None:
         raise HTTPException(status_code=404, detail="Profile not found")
+    snapshot_service.refresh_profile(result["profile"], force=False)   # only if not already fresh
 
     return {
         "success": True,
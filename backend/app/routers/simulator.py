@@ -1,12 +1,18 @@
 # app/routers/simulator.py
-from fastapi import APIRouter, HTTPException
-from app.models.pydantic_schemas import WhatIfRequest
-from app.ml.inference import what_if_yield
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from app.models.pydantic_schemas import WhatIfRequest, WhatIfSweepRequest
+from app.ml.inference import WHAT_IF_FIELDS, what_if_yield_async, what_if_sweep
+from app.utils.fields import parse_fields
 
 router = APIRouter(prefix="/simulator", tags=["Simulator"])
 
 @router.post("/simulate")
-def simulate_endpoint(req: WhatIfRequest):
+async def simulate_endpoint(
+    req: WhatIfRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated parts to compute: " + ",".join(WHAT_IF_FIELDS)),
+):
     """
     Accepts WhatIfRequest and returns a JSON object:
       {
@@ -17,9 +23,34 @@ def simulate_endpoint(req: WhatIfRequest):
         irrigation,
         input_overrides
       }
+    With fields= only those parts are computed (e.g. fields=predicted_yield
+    skips the irrigation lookup and the growth curve).
     """
+    selected = parse_fields(fields, WHAT_IF_FIELDS)
     try:
-        result = what_if_yield(req)
+        result = await what_if_yield_async(req, selected)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sweep")
+def sweep_endpoint(req: WhatIfSweepRequest):
+    """
+    Scores a grid of what-if scenarios in one batched model call and returns
+    a response surface the UI can interpolate while sliders move:
+      {
+        axis_order: [rainfall_mm, temp_c, humidity_pct, soil_pH, sowing_delay, irrigation_delay],
+        axes: {axis: [values...]},
+        shape: [...],
+        yield: nested list indexed in axis_order,
+        best: {predicted_yield, <axis>: value, ...},
+        weather, soil, scenarios, model_rows
+      }
+    """
+    try:
+        return what_if_sweep(req)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
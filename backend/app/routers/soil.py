@@ -1,18 +1,25 @@
 # app/routers/soil.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.services.soil_service import summarize_soil
+from app.utils import http_cache
 import traceback
 
 router = APIRouter(prefix="/soil", tags=["Soil"])
 
 
 @router.get("/{pincode}")
-def get_soil(pincode: str):
+def get_soil(pincode: str, request: Request):
     """
     Fetch soil data summary for a given pincode.
     Example: GET /soil/110001
+    ETag per pincode and day; If-None-Match answers 304 without a lookup.
     """
+    etag = http_cache.etag_for(request, http_cache.data_date())
+    return http_cache.respond(request, etag, lambda: _soil_payload(pincode))
+
+
+def _soil_payload(pincode: str) -> dict:
     try:
         data = summarize_soil(pincode)  # ✅ synchronous
         if not data:
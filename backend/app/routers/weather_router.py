@@ -1,7 +1,8 @@
 # app/routers/weather.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from app.services import weather_service
 from app.schemas.response import ResponseModel
+from app.utils import http_cache
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
@@ -12,8 +13,9 @@ def fetch_weather_data(pincode: str = Query(..., description="Indian postal code
     Saves CSV and returns file path.
     """
     try:
-        csv_path = weather_services.fetch_weather(pincode, days=30)
-        return ResponseModel.success(
+        csv_path = weather_service.fetch_weather(pincode, days=30)
+        return ResponseModel(
+            success=True,
             message=f"Weather data fetched for pincode {pincode}",
             data={"csv_path": str(csv_path)}
         )
@@ -22,16 +24,22 @@ def fetch_weather_data(pincode: str = Query(..., description="Indian postal code
 
 
 @router.get("/summary", response_model=ResponseModel)
-def get_weather_summary(pincode: str = Query(..., description="Indian postal code")):
+def get_weather_summary(request: Request, pincode: str = Query(..., description="Indian postal code")):
     """
     Get summarized weather insights for last 7 days.
     Returns JSON with rainfall, avg temperature, avg humidity.
+    ETag per pincode and day (the day's weather file); If-None-Match answers 304.
     """
-    try:
-        summary = weather_services.fetch_weather_summary(pincode)
-        return ResponseModel.success(
-            message=f"7-day weather summary for pincode {pincode}",
-            data=summary
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    def summary_payload():
+        try:
+            summary = weather_service.fetch_weather_summary(pincode)
+            return ResponseModel(
+                success=True,
+                message=f"7-day weather summary for pincode {pincode}",
+                data=summary
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    etag = http_cache.etag_for(request, http_cache.data_date())
+    return http_cache.respond(request, etag, summary_payload)
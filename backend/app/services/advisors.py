@@ -1,5 +1,6 @@
 # backend/app/services/advisors.py
 from typing import List, Dict, Any, Optional
+from app.services.rule_engine import get_ruleset, matching_outputs
 
 def recommend_crops(soil_pH: Optional[float],
                     rainfall_mm_7d: Optional[float],
@@ -9,15 +10,10 @@ def recommend_crops(soil_pH: Optional[float],
     rain = rainfall_mm_7d if rainfall_mm_7d is not None else 20.0
     szn = (season or "").lower()
 
-    # Example India-oriented rules (tweak freely)
-    if 6.0 <= pH <= 7.5 and rain >= 15 and ("kharif" in szn or not szn):
-        recos.append({"crop": "Rice", "why": "Neutral pH and adequate rain in Kharif."})
-    if 6.0 <= pH <= 7.8 and rain <= 30 and ("rabi" in szn or not szn):
-        recos.append({"crop": "Wheat", "why": "Neutral–slightly alkaline pH; moderate water."})
-    if pH >= 7.0 and rain <= 25:
-        recos.append({"crop": "Cotton", "why": "Tolerates slightly alkaline soils; low–moderate rainfall."})
-    if 5.5 <= pH <= 7.0 and rain >= 10:
-        recos.append({"crop": "Maize", "why": "Wide pH tolerance and moderate rainfall."})
+    # Example India-oriented rules (tweak freely in app/data/rules.json → "advisor_crops")
+    facts = {"soil_pH": pH, "rainfall_mm": rain, "season": szn}
+    for rule in matching_outputs(get_ruleset("advisor_crops"), facts):
+        recos.append(dict(rule))
 
     return recos[:4] or [{"crop": "Maize", "why": "Generalist fallback."}]
 
@@ -114,12 +110,10 @@ def pest_alerts(crop: Optional[str],
     h = humidity_pct if humidity_pct is not None else 70.0
     alerts = []
 
-    if "rice" in crop and h >= 75 and 24 <= t <= 32:
-        alerts.append({"pest": "Brown planthopper", "risk": "High", "why": "Warm & humid."})
-    if "wheat" in crop and 15 <= t <= 25 and h >= 70:
-        alerts.append({"disease": "Rust", "risk": "Medium", "why": "Cool & humid."})
-    if "cotton" in crop and t >= 25 and h <= 60:
-        alerts.append({"pest": "Whitefly", "risk": "Medium", "why": "Warm & dry."})
+    # Rules live in app/data/rules.json → "advisor_pests"
+    facts = {"crop": crop, "temp_c": t, "humidity_pct": h}
+    for rule in matching_outputs(get_ruleset("advisor_pests"), facts):
+        alerts.append(dict(rule))
 
     return alerts or [{"note": "No specific alerts based on current conditions."}]
 
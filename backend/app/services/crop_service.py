@@ -1,44 +1,171 @@
-from typing import List
+import os
+import csv
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
 from app.models.pydantic_schemas import CropRecommendRequest, CropRecommendation
+from app.services.rule_engine import load_rules
+
+# Optional extended catalog (hundreds of crops/varieties), appended to the base rules.
+# Columns: crop, ph_min, ph_max, rain_min, rain_max, seasons ("kharif|rabi"), note
+CROP_CATALOG_PATH = Path(os.getenv(
+    "CROP_CATALOG_PATH",
+    Path(__file__).resolve().parents[1] / "data" / "crop_catalog.csv",
+))
+
+# Farms scored per chunk in batch mode (bounds the [farms x crops] matrix)
+BATCH_CHUNK = 4096
+
+
+# simple rules (you can expand later in app/data/rules.json → "crop_suitability")
+def _rule_tuple(rule: dict):
+    when, then = rule["when"], rule["then"]
+    return (
+        then["crop"],
+        (when["soil_pH"]["min"], when["soil_pH"]["max"]),
+        (when["rainfall_mm"]["min"], when["rainfall_mm"]["max"]),
+        set(when["season"]["in"]),
+        then["note"],
+    )
+
+
+def _load_catalog_rows(path: Path) -> list:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [
+            (
+                row["crop"].strip(),
+                (float(row["ph_min"]), float(row["ph_max"])),
+                (float(row["rain_min"]), float(row["rain_max"])),
+                {s.strip().lower() for s in row["seasons"].split("|") if s.strip()},
+                row.get("note", "").strip(),
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+# crop, (pH_min, pH_max), (rain_min, rain_max), seasons, note
+CROP_RULES = [_rule_tuple(r) for r in load_rules("crop_suitability")] + _load_catalog_rows(CROP_CATALOG_PATH)
+
+
+def build_catalog(rules) -> Dict:
+    """Column arrays for a list of CROP_RULES-style tuples."""
+    seasons = sorted({s for rule in rules for s in rule[3]})
+    season_mask = np.zeros((len(seasons) + 1, len(rules)), dtype=bool)  # last row = unknown season
+    for j, rule in enumerate(rules):
+        for s in rule[3]:
+            season_mask[seasons.index(s), j] = True
+    return {
+        "crop": [r[0] for r in rules],
+        "note": [r[4] for r in rules],
+        "ph_lo": np.array([r[1][0] for r in rules], dtype=float),
+        "ph_hi": np.array([r[1][1] for r in rules], dtype=float),
+        "rain_lo": np.array([r[2][0] for r in rules], dtype=float),
+        "rain_hi": np.array([r[2][1] for r in rules], dtype=float),
+        "season_index": {s: i for i, s in enumerate(seasons)},
+        "season_mask": season_mask,
+    }
+
+
+CROP_CATALOG = build_catalog(CROP_RULES)
 
-# simple rules (you can expand later)
-CROP_RULES = [
-    # crop, (pH_min, pH_max), (rain_min, rain_max), seasons, note
-    ("rice", (5.5, 7.0), (800, 2000), {"kharif"}, "Thrives in high rainfall & neutral pH"),
-    ("wheat", (6.0, 7.5), (300, 900), {"rabi"}, "Prefers cooler season & moderate rain"),
-    ("maize", (5.5, 7.5), (500, 1200), {"kharif", "rabi"}, "Wide pH tolerance; moderate rain"),
-    ("sugarcane", (6.0, 7.5), (1100, 1500), {"annual"}, "High water demand crop"),
-    ("cotton", (5.8, 8.0), (500, 1000), {"kharif"}, "Needs warm season & well-drained soils"),
-    ("pulses", (6.0, 7.5), (400, 800), {"kharif", "rabi"}, "Low–moderate water; neutral pH"),
-    ("millets", (5.5, 7.5), (300, 700), {"kharif"}, "Very resilient to low water"),
-]
 
 def _score(pH: float, rain: float, season: str, rule) -> float:
     crop, (p_lo, p_hi), (r_lo, r_hi), seasons, _ = rule
     score = 0.0
-    
+
     # pH suitability
     if p_lo <= pH <= p_hi:
         mid = (p_lo + p_hi) / 2
-        score += 1.0 - abs(pH - mid) / (p_hi - p_lo)
-    
+        score += 1.0 - abs(pH - mid) / (p_hi - p_lo) if p_hi > p_lo else 1.0
+
     # rainfall suitability
     if r_lo <= rain <= r_hi:
         mid = (r_lo + r_hi) / 2
-        score += 1.0 - abs(rain - mid) / (r_hi - r_lo)
-    
+        score += 1.0 - abs(rain - mid) / (r_hi - r_lo) if r_hi > r_lo else 1.0
+
     # season match
     if season.lower() in seasons:
         score += 0.5
-    
+
     return round(score, 3)
 
+
+def _range_score(x: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    mid = (lo + hi) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = 1.0 - np.abs(x - mid) / (hi - lo)
+    s = np.where(hi > lo, s, 1.0)   # single-value range (lo == hi): an exact hit is a full match
+    return np.where((lo <= x) & (x <= hi), s, 0.0)
+
+
+def score_matrix(pH, rain, season, catalog: Dict = None) -> np.ndarray:
+    """
+    Vectorized `_score`: [n_farms x n_crops] suitability for arrays of
+    pH, rainfall and season (all crops scored in one pass).
+    """
+    catalog = catalog or CROP_CATALOG
+    pH = np.asarray(pH, dtype=float).reshape(-1, 1)
+    rain = np.asarray(rain, dtype=float).reshape(-1, 1)
+    unknown = len(catalog["season_index"])
+    codes = np.array(
+        [catalog["season_index"].get(str(s).lower(), unknown) for s in np.atleast_1d(season)],
+        dtype=np.intp,
+    )
+
+    score = _range_score(pH, catalog["ph_lo"], catalog["ph_hi"])
+    score += _range_score(rain, catalog["rain_lo"], catalog["rain_hi"])
+    score += 0.5 * catalog["season_mask"][codes]
+    return _round3(score)
+
+
+def _round3(x: np.ndarray) -> np.ndarray:
+    """np.round(x, 3), except near-halfway values use Python's exact `round` (as `_score` does)."""
+    scaled = x * 1000
+    out = np.rint(scaled) / 1000
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        out[near_half] = [round(v, 3) for v in x[near_half].tolist()]
+    return out
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best crops per row, best first (ties keep catalog order)."""
+    n_crops = scores.shape[1]
+    k = min(k, n_crops)
+    # scores are rounded to 3 decimals: an integer key makes ties break by catalog index
+    key = (-np.rint(scores * 1000)).astype(np.int64) * n_crops + np.arange(n_crops)
+    idx = np.argpartition(key, k - 1, axis=1)[:, :k] if k < n_crops else np.argsort(key, axis=1)
+    order = np.argsort(np.take_along_axis(key, idx, axis=1), axis=1)
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def recommend_crops_batch(pH, rain, season, top_k: int = 5, catalog: Dict = None) -> List[List[Dict]]:
+    """
+    Score many farms against the whole catalog and return the top-k
+    (crop, score, rationale) per farm, skipping zero scores.
+    """
+    catalog = catalog or CROP_CATALOG
+    pH, rain = np.atleast_1d(pH), np.atleast_1d(rain)
+    season = np.atleast_1d(season)
+    results: List[List[Dict]] = []
+
+    for start in range(0, len(pH), BATCH_CHUNK):
+        sl = slice(start, start + BATCH_CHUNK)
+        scores = score_matrix(pH[sl], rain[sl], season[sl], catalog)
+        best = _top_k(scores, top_k)
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        for idx_row, score_row in zip(best.tolist(), best_scores.tolist()):
+            results.append([
+                {"crop": catalog["crop"][j], "score": s, "rationale": catalog["note"][j]}
+                for j, s in zip(idx_row, score_row) if s > 0
+            ])
+    return results
+
+
 def recommend_crops(req: CropRecommendRequest) -> List[CropRecommendation]:
-    recs = []
-    for rule in CROP_RULES:
-        crop, _, _, _, note = rule
-        score = _score(req.soil_pH, req.rainfall_mm, req.season, rule)
-        if score > 0:
-            recs.append(CropRecommendation(crop=crop, score=score, rationale=note))
-    recs.sort(key=lambda x: x.score, reverse=True)
-    return recs[:5]
+    recs = recommend_crops_batch([req.soil_pH], [req.rainfall_mm], [req.season], top_k=5)[0]
+    return [CropRecommendation(**r) for r in recs]
@@ -0,0 +1,214 @@
+# app/services/dashboard_service.py
+"""
+Dashboard widgets computed concurrently, each within its own deadline.
+
+build_dashboard() submits every widget to a shared thread pool at once
+(widgets that need the weather summary wait on the weather job inside their
+own thread) and waits for each one until its deadline, measured from the
+start of the request. Widgets that finished are returned; late ones keep
+running and are returned as pending with a retry token. get_widget(token)
+returns the result of that same in-flight computation once it is done. A
+widget already in flight for the same inputs is reused rather than started
+again.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.models.pydantic_schemas import CropRecommendRequest, FertilizerRequest, IrrigationProfile
+from app.services.crop_service import recommend_crops
+from app.services.fertilizer_service import get_fertilizer_advice
+from app.services.irrigation_service import calculate_irrigation
+from app.services.pest_service import match_pest_alerts
+from app.services.weather_service import fetch_weather_summary
+from app.utils.fields import select, wants
+
+DEADLINE_MS = float(os.getenv("DASHBOARD_DEADLINE_MS", "1500"))
+PENDING_TTL_SECONDS = float(os.getenv("DASHBOARD_PENDING_TTL_SECONDS", "300"))
+WORKERS = int(os.getenv("DASHBOARD_WORKERS", "16"))
+
+# 🔹 Widget -> its field in the dashboard payload (errors / pending / meta use the widget name)
+WIDGETS = {
+    "weather": "weather",
+    "crop_recommendations": "crop_recommendations",
+    "irrigation": "irrigation_preview",
+    "fertilizer": "fertilizer_preview",
+    "pest": "pest_preview",
+}
+# Per-widget deadline (ms from request start); the weather summary feeds three other widgets
+WIDGET_DEADLINES_MS = {w: DEADLINE_MS for w in WIDGETS}
+DASHBOARD_FIELDS = tuple(WIDGETS.values())   # selectable with fields= on /dashboard/
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="dashboard")
+_lock = threading.Lock()
+_inflight: "OrderedDict[str, dict]" = OrderedDict()   # token -> {"widget", "key", "future", "started", "finished"}
+_by_key: Dict[tuple, str] = {}                         # (widget, inputs) -> token of the running computation
+
+
+# ---------- Widgets ----------
+def _crop_widget(weather: Future, season, soil_pH):
+    w = weather.result()
+    req = CropRecommendRequest(
+        season=season or "kharif",
+        soil_pH=soil_pH,
+        rainfall_mm=w.get("rainfall_7d_total", 0.0),
+        region=None,
+    )
+    return [r.dict() for r in recommend_crops(req)]
+
+
+def _irrigation_widget(weather: Future, pincode, crop, area_ha):
+    weather.result()   # the day's weather file is on disk now; no second upstream fetch
+    profile = IrrigationProfile(crop=crop or "rice", farmArea=area_ha, location=pincode)
+    return calculate_irrigation(profile).dict()
+
+
+def _fertilizer_widget(crop, area_ha, season, soil_pH):
+    fert = get_fertilizer_advice(FertilizerRequest(
+        crop=crop or "rice",
+        area_ha=area_ha,
+        season=season or "kharif",
+        soil_pH=soil_pH,
+        soil_N_level="medium",
+        soil_P_level="medium",
+        soil_K_level="medium",
+        yield_target=None,
+    ))
+    return {
+        "per_ha_NPK_kg": fert.per_ha_NPK_kg,
+        "application_schedule": fert.application_schedule[:2],
+        "cautions": fert.cautions[:1],
+    }
+
+
+def _pest_widget(weather: Future, crop, season):
+    w = weather.result()
+    alerts = match_pest_alerts(crop, season or "kharif", w.get("temp_7d_avg", 0.0), w.get("humidity_7d_avg", 0.0))
+    return {"alerts": alerts[:3]}
+
+
+# ---------- In-flight registry ----------
+def _expire(now: float):
+    """Forget finished computations older than PENDING_TTL_SECONDS (caller holds _lock)."""
+    for token in list(_inflight):
+        entry = _inflight[token]
+        if entry["finished"] is not None and now - entry["finished"] > PENDING_TTL_SECONDS:
+            del _inflight[token]
+            if _by_key.get(entry["key"]) == token:
+                del _by_key[entry["key"]]
+
+
+def _submit(widget: str, key: tuple, fn: Callable, *args) -> tuple:
+    """(token, entry) of the computation for (widget, key): the running one, or a new one."""
+    with _lock:
+        now = time.monotonic()
+        _expire(now)
+        token = _by_key.get((widget, key))
+        if token is not None and _inflight[token]["finished"] is None:
+            return token, _inflight[token]
+        token = uuid.uuid4().hex
+        entry = {"widget": widget, "key": (widget, key), "started": now, "finished": None}
+        entry["future"] = _executor.submit(fn, *args)
+        _inflight[token] = entry
+        _by_key[(widget, key)] = token
+
+    def _done(_):
+        entry["finished"] = time.monotonic()
+
+    entry["future"].add_done_callback(_done)
+    return token, entry
+
+
+def _outcome(token: str, entry: dict, timeout: float) -> Dict[str, Any]:
+    """Wait up to `timeout` seconds: {"status": ready|error|pending, "data"/"error", "elapsed_ms"}."""
+    try:
+        data = entry["future"].result(timeout=max(timeout, 0.0))
+        out = {"status": "ready", "data": data}
+    except FutureTimeout:
+        out = {"status": "pending", "retry_token": token}
+    except Exception as e:
+        out = {"status": "error", "error": str(e)}
+    end = entry["finished"] if entry["finished"] is not None else time.monotonic()
+    out["elapsed_ms"] = round((end - entry["started"]) * 1000, 1)
+    return out
+
+
+# ---------- API ----------
+def build_dashboard(
+    pincode: str,
+    crop: Optional[str] = None,
+    area_ha: float = 1.0,
+    soil_pH: Optional[float] = None,
+    season: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
+    fields: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Dashboard payload with every widget that finished in time; late ones are listed under "pending".
+    With `fields` (DASHBOARD_FIELDS) only those widgets are started.
+    """
+    started = time.monotonic()
+    jobs = {}
+    # the weather job also runs when only a widget that depends on it was asked for
+    if wants(fields, "weather", "crop_recommendations", "irrigation_preview", "pest_preview"):
+        jobs["weather"] = _submit("weather", (pincode,), fetch_weather_summary, pincode)
+        weather = jobs["weather"][1]["future"]
+    if soil_pH is not None and wants(fields, "crop_recommendations"):
+        jobs["crop_recommendations"] = _submit(
+            "crop_recommendations", (pincode, season, soil_pH), _crop_widget, weather, season, soil_pH)
+    if wants(fields, "irrigation_preview"):
+        jobs["irrigation"] = _submit(
+            "irrigation", (pincode, crop, area_ha), _irrigation_widget, weather, pincode, crop, area_ha)
+    if wants(fields, "fertilizer_preview"):
+        jobs["fertilizer"] = _submit(
+            "fertilizer", (crop, area_ha, season, soil_pH), _fertilizer_widget, crop, area_ha, season, soil_pH)
+    if crop and wants(fields, "pest_preview"):
+        jobs["pest"] = _submit("pest", (pincode, crop, season), _pest_widget, weather, crop, season)
+    if not wants(fields, "weather"):
+        jobs.pop("weather", None)   # awaited by its dependents, not reported
+
+    result: Dict[str, Any] = {
+        "weather": None,
+        "crop_recommendations": [],
+        "irrigation_preview": None,
+        "fertilizer_preview": None,
+        "pest_preview": {"alerts": []},
+        "errors": {},
+        "pending": {},
+    }
+    meta = {"deadline_ms": {}, "timings_ms": {}, "status": {}}
+    for widget, (token, entry) in jobs.items():
+        deadline = deadline_ms if deadline_ms is not None else WIDGET_DEADLINES_MS[widget]
+        out = _outcome(token, entry, deadline / 1000 - (time.monotonic() - started))
+        meta["deadline_ms"][widget] = deadline
+        meta["timings_ms"][widget] = out["elapsed_ms"]
+        meta["status"][widget] = out["status"]
+        if out["status"] == "ready":
+            result[WIDGETS[widget]] = out["data"]
+        elif out["status"] == "pending":
+            result["pending"][widget] = {"retry_token": token, "retry_after_ms": int(max(deadline, 100))}
+        else:
+            result["errors"][widget] = out["error"]
+    meta["total_ms"] = round((time.monotonic() - started) * 1000, 1)
+    result["meta"] = meta
+    return select(result, fields, always=("errors", "pending", "meta"))
+
+
+def get_widget(token: str, wait_ms: float = 0.0) -> Optional[Dict[str, Any]]:
+    """Result of a pending widget by retry token, waiting up to `wait_ms`; None for unknown/expired tokens."""
+    with _lock:
+        _expire(time.monotonic())
+        entry = _inflight.get(token)
+    if entry is None:
+        return None
+    return {"widget": entry["widget"], "field": WIDGETS[entry["widget"]], **_outcome(token, entry, wait_ms / 1000)}
+
+
+def get_stats() -> dict:
+    with _lock:
+        running = sum(1 for e in _inflight.values() if e["finished"] is None)
+        return {"tracked": len(_inflight), "running": running, "deadline_ms": DEADLINE_MS, "workers": WORKERS}
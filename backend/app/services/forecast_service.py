@@ -1,14 +1,23 @@
 # app/services/forecast_service.py
 
 from datetime import date, timedelta
-import calendar, random
-from typing import List, Dict
+import asyncio, calendar, hashlib, random, time
+from typing import List, Dict, Optional, Set
 
-from app.services.weather_service import fetch_weather_summary
+import numpy as np
+import pandas as pd
+
+from app.services.weather_service import fetch_weather_summary, fetch_weather_history
 from app.services.soil_service import summarize_soil
 from app.services import profile_service
-from app.ml.predict_yield import predict_row
-from app.services.market_service import fetch_market_price
+from app.ml import explanations
+from app.ml.features import encode_rows
+from app.ml.predict_yield import predict_row, predict_row_async, feature_row, predict_frame, predict_arrays
+from app.services.market_service import fetch_market_price, fetch_crop_price, fetch_crop_prices
+from app.utils.fields import select, wants
+
+SCENARIO_METHODS = ("bootstrap", "climatology")
+WINDOW_DAYS = 7  # the model's weather features are 7-day aggregates
 
 
 CROP_META = {
@@ -21,6 +30,19 @@ CROP_META = {
     "millets":   (90,  "Kharif", 2000),
 }
 
+# Rule-of-thumb yield (quintal/ha) when the model returns nothing usable
+BASE_YIELD = {
+    "rice": 25, "wheat": 20, "maize": 18,
+    "cotton": 12, "sugarcane": 80,
+    "pulses": 10, "millets": 15
+}
+
+# Seasons tried for every crop by /forecast/crop-options (dataset season names)
+CROP_OPTION_SEASONS = ("Kharif", "Rabi", "Summer", "Whole Year")
+
+# Top-level parts of a forecast, selectable with fields= on /forecast/
+FORECAST_FIELDS = ("summary", "yieldForecast", "riskFactors", "marketData", "explanation")
+
 
 def _guess_meta(crop: str, fallback_price: float):
     duration, season, default_price = CROP_META.get(
@@ -79,14 +101,15 @@ def _compute_risk_buckets(crop: str, weather: dict, soil: dict) -> List[Dict]:
     ]
 
 
-def generate_forecast() -> dict:
+def _forecast_context(profile: Optional[Dict] = None, fields: Optional[Set[str]] = None) -> dict:
     """
-    Generate forecast dynamically from farmer profile (✅ no frontend inputs).
+    Steps 1-3 of the forecast (profile, weather, soil, price): I/O only, no model work.
+    Only what the requested `fields` need is fetched.
     """
     print("\n===== FORECAST DEBUG LOG =====")
 
-    # 🔹 1. Load Profile
-    profile = profile_service.get_active_profile()
+    # 🔹 1. Load Profile (default: the active one)
+    profile = profile or profile_service.get_active_profile()
     if not profile:
         raise ValueError("No active profile found. Please create or activate a profile.")
 
@@ -97,9 +120,11 @@ def generate_forecast() -> dict:
     district = profile.get("district")
     print(f"Profile: crop={crop}, area={area_hectares} ha, location={district}, {state}")
 
-    # 🔹 2. Weather & Soil
-    weather = fetch_weather_summary(pincode)
-    soil = summarize_soil(pincode)
+    # 🔹 2. Weather & Soil (not needed for marketData alone)
+    weather, soil = {}, {}
+    if wants(fields, "summary", "yieldForecast", "riskFactors", "explanation"):
+        weather = fetch_weather_summary(pincode)
+        soil = summarize_soil(pincode)
     print(f"Weather Data: {weather}")
     print(f"Soil Data: {soil}")
 
@@ -107,13 +132,17 @@ def generate_forecast() -> dict:
     duration_days, season, default_price = _guess_meta(crop, 2000)
     crop_year = date.today().year
 
-    market_data = fetch_market_price()  # ✅ profile-driven inside service
-    price_per_quintal = getattr(market_data, "avg_price", None) or default_price
+    market_data, price_per_quintal = None, default_price
+    if wants(fields, "marketData"):
+        market_data = fetch_market_price(profile)  # ✅ profile-driven inside service, all mandi rows
+        price_per_quintal = getattr(market_data, "avg_price", None) or default_price
+    elif wants(fields, "summary", "yieldForecast"):
+        # only the average is needed: cached per crop/location, no geocoding
+        price_per_quintal = fetch_crop_price(crop, state or "", district or "").avg_price or default_price
 
     print(f"Crop Metadata: duration={duration_days} days, season={season}, price={price_per_quintal} Rs/quintal")
 
-    # 🔹 4. Yield Prediction (with fallback if ML gives 0)
-    yield_pred = predict_row(
+    inputs = dict(
         state=state,
         district=district,
         crop=crop,
@@ -124,13 +153,81 @@ def generate_forecast() -> dict:
         weather=weather,
         soil=soil,
     )
+    return {
+        "crop": crop, "area_hectares": area_hectares, "weather": weather, "soil": soil,
+        "duration_days": duration_days, "market_data": market_data,
+        "price_per_quintal": price_per_quintal, "inputs": inputs,
+    }
+
+
+def generate_forecast(profile: Optional[Dict] = None, fields: Optional[Set[str]] = None) -> dict:
+    """
+    Generate forecast dynamically from farmer profile (✅ no frontend inputs).
+    Uses the active profile unless one is passed (snapshot_service); with
+    `fields` only those parts are computed and returned.
+    """
+    ctx = _forecast_context(profile, fields)
+
+    # 🔹 4. Yield Prediction + top factors behind it (precomputed by refresh_explanations, else within a budget)
+    yield_pred = predict_row(**ctx["inputs"]) if wants(fields, "summary", "yieldForecast") else None
+    explanation = None
+    if wants(fields, "explanation"):
+        explanation = explanations.explain(*encode_rows([feature_row(**ctx["inputs"])]))
+    return _assemble_forecast(ctx, yield_pred, explanation, fields)
+
+
+async def generate_forecast_async(profile: Optional[Dict] = None, fields: Optional[Set[str]] = None) -> dict:
+    """generate_forecast for async endpoints: I/O in the threadpool, the model call awaited."""
+    loop = asyncio.get_running_loop()
+    ctx = await loop.run_in_executor(None, _forecast_context, profile, fields)
+    yield_pred = None
+    if wants(fields, "summary", "yieldForecast"):
+        yield_pred = await predict_row_async(**ctx["inputs"])
+    explanation = None
+    if wants(fields, "explanation"):
+        encoded = encode_rows([feature_row(**ctx["inputs"])])
+        explanation = await loop.run_in_executor(None, explanations.explain, *encoded)
+    return _assemble_forecast(ctx, yield_pred, explanation, fields)
+
+
+def timeline_seed(ctx: dict, expected_yield: float) -> int:
+    """
+    Seed of the timeline's ±10% noise: same farm, day and yield -> same
+    timeline, so a day's forecast is byte-identical (ETags, snapshots).
+    """
+    inputs = ctx["inputs"]
+    key = (inputs["state"], inputs["district"], ctx["crop"], ctx["area_hectares"],
+           date.today().isoformat(), round(expected_yield, 2))
+    return int(hashlib.sha1(repr(key).encode()).hexdigest()[:8], 16)
+
+
+def _assemble_forecast(ctx: dict, yield_pred: Optional[float], explanation: Optional[dict],
+                       fields: Optional[Set[str]] = None) -> dict:
+    """Steps 4-8: fallback yield, income, harvest date, risk and timeline around the prediction."""
+    crop, area_hectares = ctx["crop"], ctx["area_hectares"]
+    weather, soil = ctx["weather"], ctx["soil"]
+    duration_days, market_data = ctx["duration_days"], ctx["market_data"]
+    price_per_quintal = ctx["price_per_quintal"]
+    out = {}
+
+    # 🔹 7. Risk Factors (also behind the summary's risk level)
+    if wants(fields, "summary", "riskFactors"):
+        risk_factors = _compute_risk_buckets(crop, weather, soil)
+        overall_risk_pct = sum(r["risk"] for r in risk_factors) / len(risk_factors)
+        risk_level = _map_overall_risk(overall_risk_pct)
+        print(f"Risk Factors: {risk_factors}")
+        print(f"Overall Risk: {overall_risk_pct:.2f}% ({risk_level})")
+        out["riskFactors"] = risk_factors
+
+    if wants(fields, "marketData"):
+        out["marketData"] = market_data.dict() if hasattr(market_data, "dict") else market_data
+    if wants(fields, "explanation"):
+        out["explanation"] = explanation
+    if not wants(fields, "summary", "yieldForecast"):
+        print("===== END DEBUG LOG =====\n")
+        return select({k: out[k] for k in FORECAST_FIELDS if k in out}, fields)
 
     if not yield_pred or yield_pred <= 0:
-        BASE_YIELD = {
-            "rice": 25, "wheat": 20, "maize": 18,
-            "cotton": 12, "sugarcane": 80,
-            "pulses": 10, "millets": 15
-        }
         yield_pred = BASE_YIELD.get(crop.lower(), 15) * area_hectares
 
     expected_yield = max(yield_pred, 0.0)
@@ -146,16 +243,19 @@ def generate_forecast() -> dict:
     harvest_date_label = f"{calendar.month_abbr[harvest_date.month]} {harvest_date.year}"
     print(f"Harvest Date: {harvest_date_label}")
 
-    # 🔹 7. Risk Factors
-    risk_factors = _compute_risk_buckets(crop, weather, soil)
-    overall_risk_pct = sum(r["risk"] for r in risk_factors) / len(risk_factors)
-    risk_level = _map_overall_risk(overall_risk_pct)
-    print(f"Risk Factors: {risk_factors}")
-    print(f"Overall Risk: {overall_risk_pct:.2f}% ({risk_level})")
+    if wants(fields, "summary"):
+        out["summary"] = {
+            "expected_yield_qtl": round(expected_yield, 2),
+            "expected_income_inr": round(expected_income, 2),
+            "harvest_date_label": harvest_date_label,
+            "risk_level": risk_level,
+            "overall_risk_pct": round(overall_risk_pct, 2)
+        }
 
-    # 🔹 8. Yield Timeline (progressive growth curve with randomness)
+    # 🔹 8. Yield Timeline (progressive growth curve with seeded randomness)
+    rng = random.Random(timeline_seed(ctx, expected_yield))
     yield_forecast = []
-    months = max(duration_days // 30, 1)
+    months = max(duration_days // 30, 1) if wants(fields, "yieldForecast") else 0
     for i in range(months):
         month_date = sowing_date + timedelta(days=i * 30)
 
@@ -164,7 +264,7 @@ def generate_forecast() -> dict:
         yield_pct = 100 * (1 / (1 + pow(2.718, -6 * (progress - 0.5))))
 
         # ✅ add ±10% randomness
-        random_factor = random.uniform(0.9, 1.1)
+        random_factor = rng.uniform(0.9, 1.1)
         yield_pct = yield_pct * random_factor
 
         monthly_yield = expected_yield * (yield_pct / 100.0)
@@ -179,15 +279,247 @@ def generate_forecast() -> dict:
     print("Yield Forecast Timeline:", yield_forecast)
     print("===== END DEBUG LOG =====\n")
 
+    out["yieldForecast"] = yield_forecast
+    # same key order as before field selection
+    return select({k: out[k] for k in FORECAST_FIELDS if k in out}, fields)
+
+
+def refresh_explanations() -> int:
+    """
+    Background job: SHAP explanations for every saved profile's current
+    forecast row, computed in one batch and stored by feature hash + model version.
+    """
+    rows = []
+    for profile in profile_service.load_profiles():
+        crop = profile.get("crop")
+        if not crop:
+            continue
+        pincode = profile.get("pincode") or profile.get("location")
+        try:
+            weather, soil = fetch_weather_summary(pincode), summarize_soil(pincode)
+        except Exception as e:
+            print(f"⚠️ Skipping explanation for {profile.get('phone')}: {e}")
+            continue
+        rows.append(feature_row(
+            state=profile.get("state"),
+            district=profile.get("district"),
+            crop=crop,
+            season=_guess_meta(crop, 2000)[1],
+            crop_year=date.today().year,
+            area=float(profile.get("area", 1.0)),
+            production=0.0,
+            weather=weather,
+            soil=soil,
+        ))
+    if rows:
+        explanations.store(*encode_rows(rows))
+    return len(rows)
+
+
+def valid_weather_days(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop days without real observations: missing values, NASA's -999 fill,
+    and the 0 °C / 0 % rows fetch_weather writes in its place (relative
+    humidity is never actually 0 %).
+    """
+    cols = ["rainfall_mm", "temperature_C", "humidity_pct"]
+    values = history[cols].apply(pd.to_numeric, errors="coerce")
+    ok = values.notna().all(axis=1) & (values > -999).all(axis=1) & (values["humidity_pct"] > 0)
+    return history[ok]
+
+
+def sample_weather_scenarios(history: pd.DataFrame, n: int, method: str = "bootstrap",
+                             seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    N synthetic 7-day weather windows from the daily history, as the model's
+    rainfall_7d_total / temp_7d_avg / humidity_7d_avg feature arrays.
+
+    bootstrap   : each scenario draws 7 past days with replacement
+    climatology : normal draws around the mean/std of every observed 7-day window
+
+    Only valid days are sampled (see valid_weather_days); fewer than
+    WINDOW_DAYS of them raise ValueError.
+    """
+    history = valid_weather_days(history)
+    if len(history) < WINDOW_DAYS:
+        raise ValueError(
+            f"Only {len(history)} valid weather days in the history; "
+            f"at least {WINDOW_DAYS} are needed to sample scenarios"
+        )
+    rng = np.random.default_rng(seed)
+    rain = history["rainfall_mm"].to_numpy(dtype=float)
+    temp = history["temperature_C"].to_numpy(dtype=float)
+    hum = history["humidity_pct"].to_numpy(dtype=float)
+
+    if method == "bootstrap":
+        idx = rng.integers(0, len(history), size=(n, WINDOW_DAYS))
+        out = {
+            "rainfall_7d_total": rain[idx].sum(axis=1),
+            "temp_7d_avg": temp[idx].mean(axis=1),
+            "humidity_7d_avg": hum[idx].mean(axis=1),
+        }
+    elif method == "climatology":
+        win = np.lib.stride_tricks.sliding_window_view
+        windows = {
+            "rainfall_7d_total": win(rain, WINDOW_DAYS).sum(axis=1),
+            "temp_7d_avg": win(temp, WINDOW_DAYS).mean(axis=1),
+            "humidity_7d_avg": win(hum, WINDOW_DAYS).mean(axis=1),
+        }
+        out = {k: rng.normal(v.mean(), v.std(), n) for k, v in windows.items()}
+    else:
+        raise ValueError(f"Unknown scenario method '{method}' (use one of {SCENARIO_METHODS})")
+
+    out["rainfall_7d_total"] = np.clip(out["rainfall_7d_total"], 0, None)
+    out["humidity_7d_avg"] = np.clip(out["humidity_7d_avg"], 0, 100)
+    return out
+
+
+def _percentiles(values: np.ndarray) -> dict:
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
     return {
-        "summary": {
-            "expected_yield_qtl": round(expected_yield, 2),
-            "expected_income_inr": round(expected_income, 2),
-            "harvest_date_label": harvest_date_label,
-            "risk_level": risk_level,
-            "overall_risk_pct": round(overall_risk_pct, 2)
-        },
-        "yieldForecast": yield_forecast,
-        "riskFactors": risk_factors,
-        "marketData": market_data.dict() if hasattr(market_data, "dict") else market_data,
+        "p10": round(float(p10), 2),
+        "p50": round(float(p50), 2),
+        "p90": round(float(p90), 2),
+        "mean": round(float(values.mean()), 2),
+    }
+
+
+def generate_forecast_distribution(n: int = 1000, method: str = "bootstrap",
+                                   seed: Optional[int] = None) -> dict:
+    """
+    Probabilistic forecast: N weather scenarios sampled around the 30-day
+    history, scored with one batched model call, summarized as P10/P50/P90
+    yield and income.
+    """
+    t0 = time.perf_counter()
+
+    profile = profile_service.get_active_profile()
+    if not profile:
+        raise ValueError("No active profile found. Please create or activate a profile.")
+
+    crop = profile.get("crop")
+    area_hectares = float(profile.get("area") or profile.get("farmArea") or 1.0)
+    pincode = profile.get("pincode") or profile.get("location")
+
+    history = fetch_weather_history(pincode)
+    # sampled first: a too-short history fails before the soil and mandi calls
+    scenarios = sample_weather_scenarios(history, n, method=method, seed=seed)
+    soil = summarize_soil(pincode)
+    duration_days, season, default_price = _guess_meta(crop, 2000)
+    market_data = fetch_market_price()
+    price_per_quintal = getattr(market_data, "avg_price", None) or default_price
+
+    # 🔹 N feature rows: profile/soil fixed, weather columns replaced per scenario
+    base = feature_row(
+        state=profile.get("state"),
+        district=profile.get("district"),
+        crop=crop,
+        season=season,
+        crop_year=date.today().year,
+        area=area_hectares,
+        production=0.0,
+        weather={},
+        soil=soil,
+    )
+    df = pd.DataFrame([base]).iloc[np.zeros(n, dtype=int)].reset_index(drop=True)
+    for col, values in scenarios.items():
+        df[col] = values
+
+    yields = np.clip(predict_frame(df), 0, None)
+    income = yields * price_per_quintal
+
+    return {
+        "n_scenarios": n,
+        "method": method,
+        "seed": seed,
+        "crop": crop,
+        "area_ha": area_hectares,
+        "price_per_quintal": price_per_quintal,
+        "yield_qtl": _percentiles(yields),
+        "income_inr": _percentiles(income),
+        "weather": {col: _percentiles(values) for col, values in scenarios.items()},
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+
+
+def _unique(values, normalize=lambda v: v) -> list:
+    """Stripped, non-blank values in first-seen order; duplicates (after case-folding) dropped."""
+    seen, out = set(), []
+    for v in values:
+        v = normalize(str(v).strip())
+        if v and v.casefold() not in seen:
+            seen.add(v.casefold())
+            out.append(v)
+    return out
+
+
+def generate_crop_options(crops: Optional[List[str]] = None, seasons: Optional[List[str]] = None,
+                          top: Optional[int] = None) -> dict:
+    """
+    Rank crop x season options for the active farm by expected income: one
+    feature row per option, one batched model call, cached mandi prices.
+    Risk is the same bucket model /forecast/ uses; options are sorted by
+    risk-adjusted income (income x (1 - risk%)).
+    """
+    t0 = time.perf_counter()
+
+    profile = profile_service.get_active_profile()
+    if not profile:
+        raise ValueError("No active profile found. Please create or activate a profile.")
+
+    area_hectares = float(profile.get("area") or profile.get("farmArea") or 1.0)
+    pincode = profile.get("pincode") or profile.get("location")
+    state, district = profile.get("state"), profile.get("district")
+    crops = _unique(crops or CROP_META, str.lower)
+    seasons = _unique(seasons or CROP_OPTION_SEASONS)
+    if not crops or not seasons:
+        raise ValueError("No candidate crops or seasons left (blank values are ignored)")
+
+    weather = fetch_weather_summary(pincode)
+    soil = summarize_soil(pincode)
+    prices = fetch_crop_prices(crops, state or "", district or "")
+
+    # 🔹 One row per (crop, season), scored together
+    options = [(crop, season) for crop in crops for season in seasons]
+    rows = [
+        feature_row(
+            state=state, district=district, crop=crop.title(), season=season,
+            crop_year=date.today().year, area=area_hectares, production=0.0,
+            weather=weather, soil=soil,
+        )
+        for crop, season in options
+    ]
+    yields = predict_arrays(*encode_rows(rows))
+
+    risk = {}
+    for crop in crops:
+        buckets = _compute_risk_buckets(crop, weather, soil)
+        risk[crop] = sum(r["risk"] for r in buckets) / len(buckets)
+
+    ranked = []
+    for (crop, season), y in zip(options, yields.tolist()):
+        source = "model"
+        if not y or y <= 0:
+            y, source = BASE_YIELD.get(crop, 15) * area_hectares, "baseline"
+        price = prices[crop].avg_price or _guess_meta(crop, 2000)[2]
+        income = y * price
+        ranked.append({
+            "crop": crop.title(),
+            "season": season,
+            "expected_yield_qtl": round(y, 2),
+            "yield_source": source,
+            "price_per_quintal": price,
+            "expected_income_inr": round(income, 2),
+            "overall_risk_pct": round(risk[crop], 2),
+            "risk_level": _map_overall_risk(risk[crop]),
+            "risk_adjusted_income_inr": round(income * (1 - risk[crop] / 100), 2),
+            "duration_days": _guess_meta(crop, 2000)[0],
+        })
+    ranked.sort(key=lambda o: (-o["risk_adjusted_income_inr"], o["overall_risk_pct"]))
+
+    return {
+        "area_ha": area_hectares,
+        "n_options": len(ranked),
+        "options": ranked[:top] if top else ranked,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
     }
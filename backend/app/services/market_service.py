@@ -1,7 +1,11 @@
 import os
 import requests
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from typing import Dict, List, Optional
 from app.models.pydantic_schemas import PriceResponse, PriceData
 from app.services import profile_service
 from dotenv import load_dotenv
@@ -19,6 +23,13 @@ load_dotenv(dotenv_path=ENV_PATH)
 BASE_UL = os.getenv("BASE_UL", "https://agmarknet.gov.in/api/Report/CommodityWiseDailyReport")
 GEOCODE_URL = os.getenv("GEOCODE_URL", "https://nominatim.openstreetmap.org/search")
 
+# --- Per-crop price cache (fetch_crop_price) ---
+PRICE_TTL_SECONDS = int(os.getenv("MARKET_PRICE_TTL_SECONDS", "21600"))   # 6 h
+PRICE_CACHE_SIZE = 512
+PRICE_FETCH_WORKERS = 8
+_price_cache: Dict[tuple, tuple] = {}   # (crop, state, district) -> (expires_at, PriceResponse)
+_price_lock = threading.Lock()
+
 
 def pincode_to_state_district(pincode: str):
     """Convert pincode → (state, district) using OpenStreetMap Nominatim."""
@@ -46,13 +57,13 @@ def pincode_to_state_district(pincode: str):
     return None, None
 
 
-def fetch_market_price() -> PriceResponse:
+def fetch_market_price(profile: Optional[Dict] = None) -> PriceResponse:
     """
-    Fetch mandi market prices for the active profile's crop, state, and district.
+    Fetch mandi market prices for the profile's (default: active profile's) crop, state, and district.
     Falls back to mock/static data if API fails (MVP safe).
     """
     # 🔹 Load active profile
-    profile = profile_service.get_active_profile()
+    profile = profile or profile_service.get_active_profile()
     if not profile:
         raise ValueError("No active profile found")
 
@@ -66,6 +77,11 @@ def fetch_market_price() -> PriceResponse:
     if not district:
         district = ""
 
+    return _query_prices(crop, state, district) or _mock_price(crop, state, district)
+
+
+def _query_prices(crop: str, state: str, district: str) -> Optional[PriceResponse]:
+    """Last 7 days of mandi prices from agmarknet; None when the API fails or has no rows."""
     today = date.today()
     start = (today - timedelta(days=7)).strftime("%d/%m/%Y")
     end = today.strftime("%d/%m/%Y")
@@ -112,7 +128,10 @@ def fetch_market_price() -> PriceResponse:
     except Exception:
         # 🔹 Fallback to mock prices
         pass
+    return None
 
+
+def _mock_price(crop: str, state: str, district: str) -> PriceResponse:
     # -------- MOCK PRICES (MVP) --------
     base_prices = {
         "rice": 2200, "wheat": 2100, "maize": 1800,
@@ -121,7 +140,7 @@ def fetch_market_price() -> PriceResponse:
     avg_price = base_prices.get(crop.lower(), 2000) + random.randint(-200, 200)
 
     mock_prices = [
-        PriceData(mandi="Mock Mandi", date=str(today), price_per_quintal=avg_price)
+        PriceData(mandi="Mock Mandi", date=str(date.today()), price_per_quintal=avg_price)
     ]
 
     return PriceResponse(
@@ -131,3 +150,43 @@ def fetch_market_price() -> PriceResponse:
         avg_price=avg_price,
         prices=mock_prices,
     )
+
+
+def _price_key(crop: str, state: str, district: str) -> tuple:
+    return (crop.strip().lower(), (state or "").strip().lower(), (district or "").strip().lower())
+
+
+def _cached_price(key: tuple) -> Optional[PriceResponse]:
+    with _price_lock:
+        hit = _price_cache.get(key)
+    return hit[1] if hit and hit[0] > time.monotonic() else None
+
+
+def fetch_crop_price(crop: str, state: str = "", district: str = "") -> PriceResponse:
+    """
+    Mandi price for any crop/location, cached for MARKET_PRICE_TTL_SECONDS
+    (prices are daily; mock fallbacks are cached too, so they stay stable).
+    """
+    key = _price_key(crop, state, district)
+    cached = _cached_price(key)
+    if cached is not None:
+        return cached
+
+    result = _query_prices(crop, state or "", district or "") or _mock_price(crop, state or "", district or "")
+    with _price_lock:
+        _price_cache[key] = (time.monotonic() + PRICE_TTL_SECONDS, result)
+        if len(_price_cache) > PRICE_CACHE_SIZE:
+            _price_cache.pop(next(iter(_price_cache)))
+    return result
+
+
+def fetch_crop_prices(crops: List[str], state: str = "", district: str = "") -> Dict[str, PriceResponse]:
+    """fetch_crop_price for several crops; cache misses are fetched concurrently."""
+    prices = {c: _cached_price(_price_key(c, state, district)) for c in crops}
+    misses = [c for c, p in prices.items() if p is None]
+    if len(misses) == 1:
+        prices[misses[0]] = fetch_crop_price(misses[0], state, district)
+    elif misses:
+        with ThreadPoolExecutor(max_workers=min(len(misses), PRICE_FETCH_WORKERS)) as pool:
+            prices.update(zip(misses, pool.map(lambda c: fetch_crop_price(c, state, district), misses)))
+    return prices
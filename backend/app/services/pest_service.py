@@ -1,29 +1,135 @@
 # app/services/pest_service.py
 
+import threading
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from typing import Dict, Optional
 from app.services import profile_service, weather_service
 
 # Path to dataset
 DATA_PATH = Path(__file__).resolve().parents[1] / "ml" / "data" / "pest_disease.csv"
 
+INTERVAL_COLS = ("temp_min", "temp_max", "humidity_min", "humidity_max")
+TEXT_COLS = ("pest", "disease", "note")
+
+# Compiled index: (crop, season) -> numpy interval arrays + alert text columns
+_index_lock = threading.Lock()
+_index = {"loaded": False, "version": None, "buckets": {}, "rows": 0}
+
+
+def _build_index(df: pd.DataFrame) -> dict:
+    """Group the pest table by (crop, season) into per-bucket numpy arrays."""
+    if df.empty:
+        return {}
+    df = df.copy()
+    df["crop"] = df["crop"].astype(str).str.lower()
+    df["season"] = df["season"].astype(str).str.lower()
+    for col in INTERVAL_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in TEXT_COLS:
+        if col not in df.columns:
+            df[col] = None
+
+    buckets = {}
+    for key, group in df.groupby(["crop", "season"], sort=False):
+        bucket = {col: group[col].to_numpy(dtype=float) for col in INTERVAL_COLS}
+        bucket.update({col: group[col].to_numpy(dtype=object) for col in TEXT_COLS})
+        buckets[key] = bucket
+    return buckets
+
+
+def _load_index() -> dict:
+    """Return the compiled index, reloading it if the CSV changed on disk (e.g. generate.py)."""
+    try:
+        st = DATA_PATH.stat()
+        version = (str(DATA_PATH), st.st_mtime_ns, st.st_size)
+    except OSError:
+        version = None
+    if _index["loaded"] and _index["version"] == version:
+        return _index
+
+    with _index_lock:
+        if _index["loaded"] and _index["version"] == version:
+            return _index
+        try:
+            df = pd.read_csv(DATA_PATH)
+            buckets = _build_index(df)
+            print(f"✅ Pest dataset loaded: {len(df)} rows in {len(buckets)} (crop, season) buckets")
+        except Exception as e:
+            print(f"❌ Error loading pest dataset: {e}")
+            df, buckets = pd.DataFrame(), {}  # fallback
+        _index.update({"loaded": True, "version": version, "buckets": buckets, "rows": len(df)})
+    return _index
+
+
 # Load dataset once at startup
-try:
-    df = pd.read_csv(DATA_PATH)
-    print(f"✅ Pest dataset loaded: {len(df)} rows")
-except Exception as e:
-    print(f"❌ Error loading pest dataset: {e}")
-    df = pd.DataFrame()  # fallback
+_load_index()
+
+
+def _alert(bucket: dict, i: int) -> dict:
+    return {
+        "pest": bucket["pest"][i],
+        "disease": bucket["disease"][i],
+        "risk": "high",
+        "note": f"In this season, {bucket['note'][i]}"
+    }
+
+
+def match_pest_alerts(crop: str, season: str, temp: float, humidity: float) -> list:
+    """
+    High-risk alerts for one (crop, season, temp, humidity) query:
+    a single vectorized interval test over the (crop, season) bucket.
+    """
+    bucket = _load_index()["buckets"].get((crop.lower(), season.lower()))
+    if bucket is None:
+        return []
+    hit = (
+        (bucket["temp_min"] <= temp) & (temp <= bucket["temp_max"])
+        & (bucket["humidity_min"] <= humidity) & (humidity <= bucket["humidity_max"])
+    )
+    return [_alert(bucket, i) for i in np.flatnonzero(hit)]
+
+
+def match_pest_alerts_batch(queries) -> list:
+    """
+    Batch mode: `queries` is an iterable of (crop, season, temp, humidity).
+    Queries that share a bucket are tested together as one
+    [n_queries x n_rows] interval test. Returns one alert list per query,
+    in input order.
+    """
+    queries = list(queries)
+    buckets = _load_index()["buckets"]
+    results = [[] for _ in queries]
 
+    by_bucket = {}
+    for qi, (crop, season, _, _) in enumerate(queries):
+        by_bucket.setdefault((str(crop).lower(), str(season).lower()), []).append(qi)
 
-def get_pest_alerts():
+    for key, idx in by_bucket.items():
+        bucket = buckets.get(key)
+        if bucket is None:
+            continue
+        temps = np.array([queries[i][2] for i in idx], dtype=float)[:, None]
+        hums = np.array([queries[i][3] for i in idx], dtype=float)[:, None]
+        hit = (
+            (bucket["temp_min"] <= temps) & (temps <= bucket["temp_max"])
+            & (bucket["humidity_min"] <= hums) & (hums <= bucket["humidity_max"])
+        )
+        q_pos, row_pos = np.nonzero(hit)
+        for qp, rp in zip(q_pos, row_pos):
+            results[idx[qp]].append(_alert(bucket, rp))
+    return results
+
+
+def get_pest_alerts(profile: Optional[Dict] = None):
     """
     Generate pest and disease alerts dynamically using:
-    - Active profile (crop, season)
+    - Profile (crop, season; default: the active profile)
     - Weather service (temperature, humidity)
     """
 
-    profile = profile_service.get_active_profile()
+    profile = profile or profile_service.get_active_profile()
     if not profile:
         return [{
             "pest": None,
@@ -46,7 +152,7 @@ def get_pest_alerts():
     if humidity is None:
         humidity = 80
 
-    if df.empty:
+    if not _load_index()["rows"]:
         return [{
             "pest": None,
             "disease": None,
@@ -54,31 +160,8 @@ def get_pest_alerts():
             "note": "Pest dataset not available"
         }]
 
-    alerts = []
-
-    for _, row in df.iterrows():
-        row_crop = str(row.get("crop", "")).lower()
-        row_season = str(row.get("season", "")).lower()
-
-        if row_crop != crop:
-            continue
-
-        if row_season != season:
-            continue
-
-        if not (row["temp_min"] <= temp <= row["temp_max"]):
-            continue
-
-        if not (row["humidity_min"] <= humidity <= row["humidity_max"]):
-            continue
-
-        # ✅ All matched → high risk alert
-        alerts.append({
-            "pest": row.get("pest"),
-            "disease": row.get("disease"),
-            "risk": "high",
-            "note": f"In this season, {row.get('note', '')}"
-        })
+    # ✅ Matched rows → high risk alerts
+    alerts = match_pest_alerts(crop, season, temp, humidity)
 
     # If nothing matched, return safe default
     if not alerts:
@@ -1,3 +1,4 @@
+import hashlib
 import json
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -91,3 +92,12 @@ def get_active_profile() -> Optional[Dict]:
         if p.get("active"):
             return p
     return None
+
+
+# 🔹 Helper: version of a profile's contents (for snapshots and ETags)
+def profile_version(profile: Optional[Dict]) -> Optional[str]:
+    """Hash of the profile's contents; the active flag does not change it."""
+    if not profile:
+        return None
+    body = {k: v for k, v in profile.items() if k != "active"}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:12]
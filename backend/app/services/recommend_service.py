@@ -1,12 +1,12 @@
 # app/services/recommend_service.py
 
-from typing import List, Dict
-from app.services import profile_service, soil_service, weather_service
+from typing import List, Dict, Optional
+from app.services import pest_service, profile_service, soil_service, weather_service
 
-def get_recommendations() -> List[Dict]:
+def get_recommendations(profile: Optional[Dict] = None) -> List[Dict]:
     """
     Generate crop recommendations dynamically using:
-    - Active farmer profile
+    - Farmer profile (default: the active one)
     - Soil data (from soil_service)
     - Weather data (from weather_service)
 
@@ -14,7 +14,7 @@ def get_recommendations() -> List[Dict]:
     """
 
     # ✅ Get active farmer profile
-    profile = profile_service.get_active_profile()
+    profile = profile or profile_service.get_active_profile()
     if not profile:
         return []
 
@@ -94,3 +94,18 @@ def get_recommendations() -> List[Dict]:
     recommendations.sort(key=lambda x: x["score"], reverse=True)
 
     return recommendations[:5]
+
+
+def get_advisor_dashboard(profile: Optional[Dict] = None) -> Dict:
+    """
+    /agri-advisor/dashboard payload for a profile (default: the active one):
+    profile, crop recommendations and pest/disease alerts.
+    """
+    profile = profile or profile_service.get_active_profile()
+    if not profile:
+        raise ValueError("No active profile found")
+    return {
+        "profile": profile,
+        "recommendations": get_recommendations(profile),
+        "pest_alerts": pest_service.get_pest_alerts(profile),
+    }
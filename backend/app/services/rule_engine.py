@@ -0,0 +1,152 @@
+# app/services/rule_engine.py
+"""
+Declarative rules (app/data/rules.json) compiled into vectorized predicates.
+
+A ruleset is an ordered list of rules:
+    {"id": "rice", "when": {<field>: <condition>, ...}, "then": {...output...}}
+
+Conditions:
+    numeric     {"min": x, "max": y}   inclusive bounds
+                {"gt": x,  "lt": y}    exclusive bounds
+    categorical {"in": [...]}          exact match (case-insensitive)
+                {"contains": [...]}    substring match (case-insensitive)
+                "or_empty": true       also matches a missing/empty value
+
+Compiling turns each numeric field into lo/hi bound arrays across rules and
+each categorical field into a per-rule matcher, so one pass evaluates every
+rule for one farm or for a million farms given as arrays.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+RULES_PATH = Path(__file__).resolve().parents[1] / "data" / "rules.json"
+
+NUMERIC_OPS = {"min", "max", "gt", "lt"}
+CATEGORICAL_OPS = {"in", "contains", "or_empty"}
+
+
+def compile_ruleset(rules: List[Dict]) -> Dict:
+    """Compile a list of rule dicts into bound arrays + categorical matchers."""
+    n = len(rules)
+    numeric, categorical = {}, {}
+
+    for r_idx, rule in enumerate(rules):
+        for field, cond in rule.get("when", {}).items():
+            ops = set(cond)
+            if ops <= NUMERIC_OPS:
+                spec = numeric.setdefault(field, {
+                    "lo": np.full(n, -np.inf), "hi": np.full(n, np.inf),
+                    "constrained": np.zeros(n, dtype=bool),
+                })
+                spec["constrained"][r_idx] = True
+                # exclusive bounds become inclusive ones on the next float over,
+                # so evaluation is a single pair of >= / <= comparisons
+                if "min" in cond:
+                    spec["lo"][r_idx] = cond["min"]
+                if "gt" in cond:
+                    spec["lo"][r_idx] = np.nextafter(float(cond["gt"]), np.inf)
+                if "max" in cond:
+                    spec["hi"][r_idx] = cond["max"]
+                if "lt" in cond:
+                    spec["hi"][r_idx] = np.nextafter(float(cond["lt"]), -np.inf)
+            elif ops <= CATEGORICAL_OPS:
+                matchers = categorical.setdefault(field, [None] * n)
+                matchers[r_idx] = {
+                    "in": {str(v).lower() for v in cond.get("in", [])},
+                    "contains": [str(v).lower() for v in cond.get("contains", [])],
+                    "or_empty": bool(cond.get("or_empty", False)),
+                }
+            else:
+                raise ValueError(f"❌ Rule '{rule.get('id')}': unknown condition on '{field}': {cond}")
+
+    return {
+        "ids": [rule.get("id") for rule in rules],
+        "outputs": [rule.get("then", {}) for rule in rules],
+        "numeric": numeric,
+        "categorical": categorical,
+    }
+
+
+def _match_value(value: str, matcher: Dict) -> bool:
+    if not value:
+        return matcher["or_empty"]
+    if matcher["in"] and value in matcher["in"]:
+        return True
+    return any(token in value for token in matcher["contains"])
+
+
+def _as_columns(facts) -> Dict:
+    """Accept one fact dict, a list of fact dicts, or a dict of column arrays."""
+    if isinstance(facts, dict):
+        return {k: np.atleast_1d(np.asarray(v)) for k, v in facts.items()}
+    facts = list(facts)
+    keys = {k for f in facts for k in f}
+    return {k: np.asarray([f.get(k) for f in facts]) for k in keys}
+
+
+def evaluate(compiled: Dict, facts) -> np.ndarray:
+    """
+    Boolean matrix [n_facts, n_rules]: True where every condition of the rule holds.
+    Facts may be a single dict of scalars, a list of dicts or a dict of arrays.
+    """
+    cols = _as_columns(facts)
+    n_rules = len(compiled["ids"])
+    n = max((len(v) for v in cols.values()), default=1)
+    hit = np.ones((n, n_rules), dtype=bool)
+
+    for field, spec in compiled["numeric"].items():
+        if field in cols:
+            x = np.asarray(cols[field], dtype=float)[:, None]
+        else:
+            x = np.full((n, 1), np.nan)
+        ok = (x >= spec["lo"]) & (x <= spec["hi"])
+        if np.isnan(x).any():
+            # a missing value only fails the rules that constrain this field
+            ok |= ~spec["constrained"]
+        hit &= ok
+
+    for field, matchers in compiled["categorical"].items():
+        raw = cols.get(field, np.full(n, None, dtype=object))
+        # match each distinct value once, then broadcast back to every fact;
+        # missing values get code -1, which indexes the trailing "" row
+        if raw.dtype.kind in "US":
+            raw = raw.astype(object)  # hash-factorizing object strings is much faster
+        codes, uniques = pd.factorize(raw)
+        values = [str(u).lower() for u in uniques] + [""]
+        table = np.ones((len(values), n_rules), dtype=bool)
+        for r_idx, matcher in enumerate(matchers):
+            if matcher is not None:
+                table[:, r_idx] = [_match_value(v, matcher) for v in values]
+        hit &= table[codes]
+
+    return hit
+
+
+def matching_outputs(compiled: Dict, fact: Dict) -> List[Dict]:
+    """`then` payloads of the rules matching a single fact, in rule order."""
+    row = evaluate(compiled, fact)[0]
+    return [compiled["outputs"][i] for i in np.flatnonzero(row)]
+
+
+def load_rulesets(path: Path = RULES_PATH) -> Dict[str, Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {name: compile_ruleset(spec["rules"]) for name, spec in raw.items()}
+
+
+def load_rules(name: str, path: Path = RULES_PATH) -> List[Dict]:
+    """Raw (uncompiled) rule dicts of one ruleset."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)[name]["rules"]
+
+
+# Compiled once at startup
+RULESETS = load_rulesets()
+
+
+def get_ruleset(name: str) -> Dict:
+    return RULESETS[name]
@@ -0,0 +1,268 @@
+# app/services/snapshot_service.py
+"""
+Materialized per-profile snapshots of /forecast/ and /agri-advisor/dashboard.
+
+Both payloads only change when their inputs do: the day's weather file
+(weather_service fetches one per pincode per day), soil and mandi prices,
+or the profile itself. So they are computed ahead of time:
+
+- start_scheduler()         fills missing snapshots at startup, then every night
+                            at SNAPSHOT_START_HOUR recomputes all profiles,
+                            spread over SNAPSHOT_WINDOW_HOURS and never more than
+                            one profile per SNAPSHOT_MIN_INTERVAL_SECONDS
+                            (each profile hits weather, soil and mandi APIs)
+- lookup(kind, profile)     the snapshot if it was computed today for this exact
+                            profile (and, for the forecast, by the model now
+                            serving), else None (a dict read)
+- get_or_compute(...)       lookup, else compute now and store (one computation
+                            per profile and kind at a time)
+- refresh_profile(profile)  recompute in the background right after a profile
+                            is created, edited or switched to
+
+Snapshots live in memory and in app/data/snapshots.json (not in git). The
+file has no phone numbers or profiles: records are keyed by a hash of the
+phone and carry the profile version hash only.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.ml import predict_yield
+from app.services import forecast_service, profile_service, recommend_service
+
+STORE_PATH = Path(__file__).resolve().parents[1] / "data" / "snapshots.json"
+SCHEDULER_ENABLED = os.getenv("SNAPSHOT_SCHEDULER", "1") == "1"
+START_HOUR = int(os.getenv("SNAPSHOT_START_HOUR", "1"))              # local time
+WINDOW_HOURS = float(os.getenv("SNAPSHOT_WINDOW_HOURS", "4"))
+MIN_INTERVAL_SECONDS = float(os.getenv("SNAPSHOT_MIN_INTERVAL_SECONDS", "5"))
+MAX_AGE_SECONDS = float(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "86400"))
+
+# 🔹 Snapshot kind -> how to compute it for a profile
+KINDS = {
+    "forecast": forecast_service.generate_forecast,
+    "advisor": recommend_service.get_advisor_dashboard,
+}
+# kinds whose payload comes from the yield model: stale once it is retrained or swapped
+MODEL_KINDS = {"forecast"}
+
+_lock = threading.Lock()
+_snapshots: Dict[str, dict] = {}          # "kind:phone" -> snapshot record
+_key_locks: Dict[str, threading.Lock] = {}
+_persist_lock = threading.Lock()          # scheduler, refresh worker and requests all persist
+_state = {"loaded": False, "hits": 0, "misses": 0, "computed": 0, "failed": 0, "last_run": None, "next_run": None}
+# one worker: profile-change refreshes run one at a time, off the request threads
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+_scheduler_thread = None
+
+
+def _key(kind: str, profile: dict) -> str:
+    phone = str(profile.get("phone", "")).strip()
+    return f"{kind}:{hashlib.sha1(phone.encode()).hexdigest()[:16]}"
+
+
+# ---------- Store ----------
+def _load():
+    if _state["loaded"]:
+        return
+    _state["loaded"] = True
+    if STORE_PATH.exists():
+        try:
+            with open(STORE_PATH, "r", encoding="utf-8") as f:
+                # records written before keys were hashed carry the phone: dropped
+                _snapshots.update({k: r for k, r in json.load(f).items() if "phone" not in r})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Could not read {STORE_PATH.name}: {e}")
+
+
+def _persist():
+    # one writer at a time, each through its own temp file; the snapshot is taken
+    # inside the lock so the last file written is also the newest state
+    with _persist_lock:
+        with _lock:
+            snapshot = dict(_snapshots)
+        STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=STORE_PATH.parent,
+                                         prefix=STORE_PATH.name, suffix=".part", delete=False) as f:
+            json.dump(snapshot, f, default=str)
+        try:
+            os.replace(f.name, STORE_PATH)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+
+def _model_version(kind: str) -> Optional[str]:
+    if kind not in MODEL_KINDS:
+        return None
+    return hashlib.sha1(repr(predict_yield.model_version()).encode()).hexdigest()[:16]
+
+
+def _is_fresh(record: Optional[dict], profile: dict, model_version: Optional[str]) -> bool:
+    return (
+        record is not None
+        and record["profile_hash"] == profile_service.profile_version(profile)
+        and record.get("model_version") == model_version
+        and record["computed_date"] == date.today().isoformat()   # the day's weather file
+        and time.time() - record["computed_ts"] <= MAX_AGE_SECONDS
+        and record["complete"]
+    )
+
+
+def lookup(kind: str, profile: dict) -> Optional[dict]:
+    """Today's snapshot of `kind` for this profile, or None when missing or stale."""
+    model_version = _model_version(kind)
+    with _lock:
+        _load()
+        record = _snapshots.get(_key(kind, profile))
+        fresh = _is_fresh(record, profile, model_version)
+        _state["hits" if fresh else "misses"] += 1
+        return record if fresh else None
+
+
+def store(kind: str, profile: dict, data, persist: bool = True) -> dict:
+    """Keep `data` as today's snapshot; persist=False leaves the file write to the caller (batches)."""
+    if isinstance(data, dict) and "profile" in data:
+        # the router adds the live profile back; no profile (phone) in the store
+        data = {k: v for k, v in data.items() if k != "profile"}
+    now = datetime.now()
+    record = {
+        "kind": kind,
+        "profile_hash": profile_service.profile_version(profile),
+        "model_version": _model_version(kind),
+        "computed_at": now.isoformat(timespec="seconds"),
+        "computed_date": now.date().isoformat(),
+        "computed_ts": time.time(),
+        # a forecast whose explanation was still pending is recomputed on the next request
+        "complete": not (isinstance(data, dict) and (data.get("explanation") or {}).get("status") == "pending"),
+        "data": data,
+    }
+    with _lock:
+        _load()
+        _snapshots[_key(kind, profile)] = record
+        _state["computed"] += 1
+    if persist:
+        _persist()
+    return record
+
+
+def transient(data) -> dict:
+    """Record-shaped wrapper for a payload computed now but not stored (e.g. a fields= subset)."""
+    return {"computed_at": datetime.now().isoformat(timespec="seconds"), "computed_ts": time.time(), "data": data}
+
+
+def freshness(record: dict, source: str = "snapshot") -> dict:
+    """Freshness block returned next to the payload (no running age, so the body stays cacheable)."""
+    return {"source": source, "computed_at": record["computed_at"]}
+
+
+def get_or_compute(kind: str, profile: dict) -> tuple:
+    """(record, source): today's snapshot, else computed now ("computed")."""
+    record = lookup(kind, profile)
+    if record is not None:
+        return record, "snapshot"
+    with _lock:
+        key_lock = _key_locks.setdefault(_key(kind, profile), threading.Lock())
+    with key_lock:
+        # another request may have computed it while we waited
+        with _lock:
+            record = _snapshots.get(_key(kind, profile))
+            if _is_fresh(record, profile, _model_version(kind)):
+                return record, "snapshot"
+        return store(kind, profile, KINDS[kind](profile)), "computed"
+
+
+# ---------- Refresh ----------
+def _refresh_one(profile: dict, force: bool = False, persist: bool = True) -> tuple:
+    """Recompute the profile's stale snapshots (all with force); returns (computed, attempted)."""
+    done = attempted = 0
+    for kind, compute in KINDS.items():
+        if not force and lookup(kind, profile) is not None:
+            continue
+        attempted += 1
+        try:
+            store(kind, profile, compute(profile), persist=False)
+            done += 1
+        except Exception as e:
+            _state["failed"] += 1
+            print(f"⚠️ Snapshot {kind} failed for {profile.get('phone')}: {e}")
+    if done and persist:
+        _persist()
+    return done, attempted
+
+
+def refresh_profile(profile: dict, force: bool = True):
+    """Recompute a profile's snapshots in the background (after it was created, edited or switched to)."""
+    if profile and profile.get("phone"):
+        _executor.submit(_refresh_one, profile, force)
+
+
+def refresh_all(spread_seconds: float = 0.0) -> int:
+    """Recompute every profile's stale snapshots, spaced over `spread_seconds`; returns snapshots computed."""
+    profiles = [p for p in profile_service.load_profiles() if p.get("phone")]
+    interval = max(spread_seconds / max(len(profiles), 1), MIN_INTERVAL_SECONDS)
+    started, total = time.perf_counter(), 0
+    for i, profile in enumerate(profiles):
+        done, attempted = _refresh_one(profile, persist=False)
+        total += done
+        if attempted and i < len(profiles) - 1:
+            time.sleep(interval)   # rate limit: upstream calls were made for this profile
+    if total:
+        _persist()   # once per batch
+    _state["last_run"] = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "profiles": len(profiles),
+        "snapshots": total,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+    print(f"✅ Snapshots refreshed: {total} for {len(profiles)} profiles in {_state['last_run']['seconds']} s")
+    return total
+
+
+def _seconds_until(hour: int) -> float:
+    now = datetime.now()
+    run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(days=1)
+    _state["next_run"] = run.isoformat(timespec="seconds")
+    return (run - now).total_seconds()
+
+
+def start_scheduler():
+    """Daemon thread: fill missing snapshots now, then recompute all of them every night."""
+    global _scheduler_thread
+    if not SCHEDULER_ENABLED or (_scheduler_thread is not None and _scheduler_thread.is_alive()):
+        return
+
+    def _loop():
+        spread = 0.0   # startup: only the rate limit
+        while True:
+            try:
+                refresh_all(spread)
+            except Exception as e:
+                print(f"❌ Snapshot refresh failed: {e}")
+            spread = WINDOW_HOURS * 3600
+            time.sleep(_seconds_until(START_HOUR))
+
+    _scheduler_thread = threading.Thread(target=_loop, name="snapshot-scheduler", daemon=True)
+    _scheduler_thread.start()
+
+
+def get_stats() -> dict:
+    with _lock:
+        return {
+            "snapshots": len(_snapshots),
+            "hits": _state["hits"],
+            "misses": _state["misses"],
+            "computed": _state["computed"],
+            "failed": _state["failed"],
+            "scheduler": SCHEDULER_ENABLED,
+            "last_run": _state["last_run"],
+            "next_run": _state["next_run"],
+        }
@@ -0,0 +1,53 @@
+# app/services/tests/test_crop_options.py
+import numpy as np
+import pytest
+
+from app.models.pydantic_schemas import PriceResponse
+from app.ml.features import CAT_COLS
+from app.services import forecast_service
+
+PROFILE = {"phone": "9000000003", "crop": "rice", "area": 2.0, "pincode": "110001",
+           "state": "Punjab", "district": "Ludhiana"}
+PRICES = {"rice": 2000.0, "wheat": 2500.0, "maize": 1500.0}
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    calls = []
+
+    def _predict(num, cat):
+        crops = [str(c) for c in cat[:, CAT_COLS.index("Crop")]]
+        calls.append(crops)
+        # rice gets no usable prediction -> baseline
+        return np.array([0.0 if c == "Rice" else 30.0 for c in crops])
+
+    monkeypatch.setattr(forecast_service.profile_service, "get_active_profile", lambda: dict(PROFILE))
+    monkeypatch.setattr(forecast_service, "fetch_weather_summary",
+                        lambda p: {"rainfall_7d_total": 40.0, "temp_7d_avg": 27.0, "humidity_7d_avg": 60.0})
+    monkeypatch.setattr(forecast_service, "summarize_soil", lambda p: {"pH": 6.8})
+    monkeypatch.setattr(forecast_service, "fetch_crop_prices", lambda crops, state, district: {
+        c: PriceResponse(crop=c, avg_price=PRICES[c], prices=[]) for c in crops})
+    monkeypatch.setattr(forecast_service, "predict_arrays", _predict)
+    return calls
+
+
+def test_options_scored_in_one_call_and_ranked(offline):
+    out = forecast_service.generate_crop_options(["Rice", "wheat", " rice ", "maize", " "], ["Kharif", "Rabi", "kharif"])
+    assert offline == [["Rice", "Rice", "Wheat", "Wheat", "Maize", "Maize"]]   # one batched call, no duplicates
+    assert out["n_options"] == 6
+    assert {(o["crop"], o["season"]) for o in out["options"]} == {
+        (c, s) for c in ("Rice", "Wheat", "Maize") for s in ("Kharif", "Rabi")}
+
+    ranked = [o["risk_adjusted_income_inr"] for o in out["options"]]
+    assert ranked == sorted(ranked, reverse=True)
+
+    rice = next(o for o in out["options"] if o["crop"] == "Rice")
+    assert rice["yield_source"] == "baseline"
+    assert rice["expected_yield_qtl"] == forecast_service.BASE_YIELD["rice"] * PROFILE["area"]
+    assert {o["yield_source"] for o in out["options"] if o["crop"] != "Rice"} == {"model"}
+
+
+def test_blank_candidates_are_a_value_error(offline):
+    with pytest.raises(ValueError, match="No candidate crops"):
+        forecast_service.generate_crop_options([" ", ""])
+    assert offline == []
@@ -0,0 +1,59 @@
+# app/services/tests/test_crop_service.py
+import itertools
+import math
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.pydantic_schemas import CropRecommendRequest
+from app.routers import crop
+from app.services import crop_service
+
+FARMS = list(itertools.product(
+    [4.5, 5.5, 5.8, 6.3, 7.0, 7.5, 8.0],
+    [0, 300, 450, 800, 1100, 1600],
+    ["kharif", "Rabi", "annual", "summer"],
+))
+
+
+def _single(pH, rain, season, top_k=5):
+    req = CropRecommendRequest(soil_pH=pH, rainfall_mm=rain, season=season)
+    return [r.dict() for r in crop_service.recommend_crops(req)][:top_k]
+
+
+def _reference(pH, rain, season, top_k=5):
+    """Row-wise `_score` over CROP_RULES, best first, ties in catalog order."""
+    scored = [(r[0], crop_service._score(pH, rain, season, r), r[4]) for r in crop_service.CROP_RULES]
+    scored = sorted(scored, key=lambda x: -x[1])[:top_k]
+    return [{"crop": c, "score": s, "rationale": n} for c, s, n in scored if s > 0]
+
+
+def test_batch_equals_single_and_reference():
+    pH, rain, season = zip(*FARMS)
+    batch = crop_service.recommend_crops_batch(list(pH), list(rain), list(season), top_k=5)
+    assert len(batch) == len(FARMS)
+    for farm, got in zip(FARMS, batch):
+        assert got == _single(*farm)
+        assert got == _reference(*farm)
+
+
+def test_single_value_range_scores_full_match():
+    catalog = crop_service.build_catalog([
+        ("fixed", (6.5, 6.5), (500, 500), {"kharif"}, "point range"),
+        ("wide", (5.0, 8.0), (0, 1000), {"kharif"}, "wide range"),
+    ])
+    scores = crop_service.score_matrix([6.5, 6.0], [500, 500], ["kharif", "kharif"], catalog)
+    assert not any(math.isnan(s) for s in scores.ravel())
+    assert scores[0, 0] == 2.5 and scores[1, 0] == 1.5   # pH off the point, rain on it
+    rule = ("fixed", (6.5, 6.5), (500, 500), {"kharif"}, "point range")
+    assert crop_service._score(6.5, 500, "kharif", rule) == 2.5
+
+
+def test_batch_endpoint_matches_single():
+    app = FastAPI()
+    app.include_router(crop.router)
+    farms = [{"soil_pH": p, "rainfall_mm": r, "season": s} for p, r, s in FARMS[:20]]
+    res = TestClient(app).post("/crop/recommend/batch", json={"farms": farms, "top_k": 3})
+    assert res.status_code == 200
+    results = res.json()["data"]["results"]
+    assert results == [_single(f["soil_pH"], f["rainfall_mm"], f["season"], top_k=3) for f in farms]
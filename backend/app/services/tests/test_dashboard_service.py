@@ -0,0 +1,67 @@
+# app/services/tests/test_dashboard_service.py
+import threading
+
+import pytest
+
+from app.services import dashboard_service
+
+
+@pytest.fixture
+def slow_weather(monkeypatch):
+    gate, calls = threading.Event(), []
+
+    def _weather(pincode):
+        calls.append(pincode)
+        gate.wait(5)
+        return {"rainfall_7d_total": 12.0, "temp_7d_avg": 28.0, "humidity_7d_avg": 70.0}
+
+    monkeypatch.setattr(dashboard_service, "fetch_weather_summary", _weather)
+    monkeypatch.setattr(dashboard_service, "_irrigation_widget", lambda weather, *a: {"water": weather.result()})
+    dashboard_service._inflight.clear()
+    dashboard_service._by_key.clear()
+    yield gate, calls
+    gate.set()
+
+
+def test_late_widgets_are_pending_and_retryable(slow_weather):
+    gate, calls = slow_weather
+    out = dashboard_service.build_dashboard("110001", crop="rice", deadline_ms=50)
+
+    # the fertilizer preview needs no weather and is returned; weather and its dependents are late
+    assert out["fertilizer_preview"]["per_ha_NPK_kg"]
+    assert set(out["pending"]) == {"weather", "irrigation", "pest"}
+    assert out["meta"]["status"]["fertilizer"] == "ready"
+    assert set(out["meta"]["timings_ms"]) == {"weather", "irrigation", "fertilizer", "pest"}
+
+    # a second dashboard call joins the in-flight computation instead of fetching again
+    again = dashboard_service.build_dashboard("110001", crop="rice", deadline_ms=10)
+    assert again["pending"]["weather"]["retry_token"] == out["pending"]["weather"]["retry_token"]
+    assert calls == ["110001"]
+
+    gate.set()
+    token = out["pending"]["irrigation"]["retry_token"]
+    widget = dashboard_service.get_widget(token, wait_ms=2000)
+    assert widget["status"] == "ready"
+    assert widget["field"] == "irrigation_preview"
+    assert widget["data"]["water"]["rainfall_7d_total"] == 12.0
+
+
+def test_unknown_token_and_errors(slow_weather, monkeypatch):
+    gate, _ = slow_weather
+    gate.set()
+    monkeypatch.setattr(dashboard_service, "_fertilizer_widget", lambda *a: 1 / 0)
+    out = dashboard_service.build_dashboard("110002", deadline_ms=2000)
+    assert out["weather"]["temp_7d_avg"] == 28.0
+    assert "division by zero" in out["errors"]["fertilizer"]
+    assert out["pending"] == {}
+    assert dashboard_service.get_widget("nope") is None
+
+
+def test_fields_skip_unrequested_widgets(slow_weather, monkeypatch):
+    gate, _ = slow_weather
+    gate.set()
+    monkeypatch.setattr(dashboard_service, "_fertilizer_widget", lambda *a: pytest.fail("fertilizer computed"))
+    monkeypatch.setattr(dashboard_service, "_pest_widget", lambda *a: pytest.fail("pest computed"))
+    out = dashboard_service.build_dashboard("110003", crop="rice", deadline_ms=2000, fields={"weather"})
+    assert set(out) == {"weather", "errors", "pending", "meta"}
+    assert set(out["meta"]["status"]) == {"weather"}
@@ -0,0 +1,55 @@
+# app/services/tests/test_forecast_fields.py
+import pytest
+
+from app.services import forecast_service
+from app.models.pydantic_schemas import PriceResponse
+
+PROFILE = {"phone": "9000000002", "crop": "rice", "area": 2.0, "pincode": "110001",
+           "state": "Punjab", "district": "Ludhiana"}
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    calls = []
+
+    def _record(name, value):
+        def fn(*args, **kwargs):
+            calls.append(name)
+            return value
+        return fn
+
+    price = PriceResponse(crop="rice", avg_price=2500.0, prices=[])
+    monkeypatch.setattr(forecast_service, "fetch_weather_summary", _record("weather", {"rainfall_7d_total": 10.0}))
+    monkeypatch.setattr(forecast_service, "summarize_soil", _record("soil", {"pH": 6.5}))
+    monkeypatch.setattr(forecast_service, "fetch_market_price", _record("market", price))
+    monkeypatch.setattr(forecast_service, "fetch_crop_price", _record("crop_price", price))
+    monkeypatch.setattr(forecast_service, "predict_row", _record("model", 40.0))
+    monkeypatch.setattr(forecast_service.explanations, "explain", _record("explain", {"status": "ready"}))
+    return calls
+
+
+def test_summary_only_skips_timeline_and_mandi_rows(offline):
+    out = forecast_service.generate_forecast(PROFILE, fields={"summary"})
+    assert list(out) == ["summary"]
+    assert out["summary"]["expected_income_inr"] == 40.0 * 2500.0
+    assert "market" not in offline and "explain" not in offline
+    assert {"crop_price", "model"} <= set(offline)
+
+
+def test_market_data_only_skips_weather_and_model(offline):
+    out = forecast_service.generate_forecast(PROFILE, fields={"marketData"})
+    assert list(out) == ["marketData"]
+    assert offline == ["market"]
+
+
+def test_all_fields_by_default(offline):
+    out = forecast_service.generate_forecast(PROFILE)
+    assert list(out) == list(forecast_service.FORECAST_FIELDS)
+
+
+def test_timeline_is_seed_deterministic(offline):
+    first = forecast_service.generate_forecast(PROFILE, fields={"yieldForecast"})
+    second = forecast_service.generate_forecast(PROFILE, fields={"yieldForecast"})
+    assert first == second
+    other = forecast_service.generate_forecast({**PROFILE, "area": 3.0}, fields={"yieldForecast"})
+    assert other != first
@@ -0,0 +1,73 @@
+# app/services/tests/test_pest_service.py
+import itertools
+import os
+
+import pandas as pd
+import pytest
+
+from app.services import pest_service
+
+QUERIES = [
+    (crop, season, temp, hum)
+    for crop, season in [("rice", "kharif"), ("Wheat", "Rabi"), ("maize", "kharif"), ("sugarcane", "annual"),
+                         ("millets", "kharif"), ("rice", "rabi"), ("banana", "kharif")]
+    for temp, hum in itertools.product([10, 15, 20, 25, 30, 35, 40], [40, 50, 60, 70, 80, 90, 100])
+]
+
+
+def _rowwise(df, crop, season, temp, humidity):
+    """The pre-index iterrows loop, kept as the reference."""
+    alerts = []
+    for _, row in df.iterrows():
+        if str(row.get("crop", "")).lower() != crop.lower():
+            continue
+        if str(row.get("season", "")).lower() != season.lower():
+            continue
+        if not (row["temp_min"] <= temp <= row["temp_max"]):
+            continue
+        if not (row["humidity_min"] <= humidity <= row["humidity_max"]):
+            continue
+        alerts.append({
+            "pest": row.get("pest"),
+            "disease": row.get("disease"),
+            "risk": "high",
+            "note": f"In this season, {row.get('note', '')}",
+        })
+    return alerts
+
+
+@pytest.fixture
+def pest_csv(tmp_path, monkeypatch):
+    path = tmp_path / "pest_disease.csv"
+    monkeypatch.setattr(pest_service, "DATA_PATH", path)
+    monkeypatch.setattr(pest_service, "_index", {"loaded": False, "version": None, "buckets": {}, "rows": 0})
+    return path
+
+
+def test_index_matches_rowwise_reference_on_repo_csv():
+    df = pd.read_csv(pest_service.DATA_PATH)
+    matched = 0
+    for q in QUERIES:
+        expected = _rowwise(df, *q)
+        assert pest_service.match_pest_alerts(*q) == expected
+        matched += bool(expected)
+    assert matched   # the grid does hit some rows
+
+
+def test_batch_equals_single_queries():
+    batch = pest_service.match_pest_alerts_batch(QUERIES)
+    assert batch == [pest_service.match_pest_alerts(*q) for q in QUERIES]
+    assert pest_service.match_pest_alerts_batch([]) == []
+
+
+def test_index_reloads_when_csv_is_rewritten(pest_csv):
+    header = "crop,season,temp_min,temp_max,humidity_min,humidity_max,pest,disease,note\n"
+    pest_csv.write_text(header + "rice,kharif,25,35,70,100,BPH,Blast,warm\n")
+    assert [a["pest"] for a in pest_service.match_pest_alerts("rice", "kharif", 30, 80)] == ["BPH"]
+
+    pest_csv.write_text(header + "rice,kharif,25,35,70,100,BPH,Blast,warm\n"
+                        + "rice,kharif,28,32,75,95,Stem borer,Sheath blight,humid\n")
+    st = pest_csv.stat()
+    os.utime(pest_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert [a["pest"] for a in pest_service.match_pest_alerts("rice", "kharif", 30, 80)] == ["BPH", "Stem borer"]
+    assert pest_service._load_index()["rows"] == 2
@@ -0,0 +1,104 @@
+# app/services/tests/test_rule_engine.py
+"""Parity of the rules.json rulesets with the hand-written rules they replaced."""
+import itertools
+
+from app.services import advisors, crop_service
+from app.services.rule_engine import get_ruleset, matching_outputs
+
+PH = [4.5, 5.5, 5.8, 6.0, 6.5, 6.8, 7.0, 7.2, 7.5, 7.8, 8.0, 8.5]
+RAIN = [0, 9.9, 10, 15, 20, 25, 30, 50, 300, 399.9, 400, 500, 800, 1200, 2000]
+SEASONS = ["kharif", "rabi", "summer", "annual", "", "kharif 2024"]
+CROPS = ["rice", "wheat", "maize", "cotton", "pulses", "millets", "basmati rice", "banana", ""]
+TEMPS = [5, 10, 15, 20, 24, 25, 28, 28.5, 32, 35]
+HUMIDITY = [40, 60, 61, 70, 75, 80, 81, 90]
+
+
+# 🔹 The previous implementations, kept as references
+def _old_advisor_crops(pH, rain, szn):
+    recos = []
+    if 6.0 <= pH <= 7.5 and rain >= 15 and ("kharif" in szn or not szn):
+        recos.append({"crop": "Rice", "why": "Neutral pH and adequate rain in Kharif."})
+    if 6.0 <= pH <= 7.8 and rain <= 30 and ("rabi" in szn or not szn):
+        recos.append({"crop": "Wheat", "why": "Neutral–slightly alkaline pH; moderate water."})
+    if pH >= 7.0 and rain <= 25:
+        recos.append({"crop": "Cotton", "why": "Tolerates slightly alkaline soils; low–moderate rainfall."})
+    if 5.5 <= pH <= 7.0 and rain >= 10:
+        recos.append({"crop": "Maize", "why": "Wide pH tolerance and moderate rainfall."})
+    return recos[:4] or [{"crop": "Maize", "why": "Generalist fallback."}]
+
+
+def _old_advisor_pests(crop, t, h):
+    alerts = []
+    if "rice" in crop and h >= 75 and 24 <= t <= 32:
+        alerts.append({"pest": "Brown planthopper", "risk": "High", "why": "Warm & humid."})
+    if "wheat" in crop and 15 <= t <= 25 and h >= 70:
+        alerts.append({"disease": "Rust", "risk": "Medium", "why": "Cool & humid."})
+    if "cotton" in crop and t >= 25 and h <= 60:
+        alerts.append({"pest": "Whitefly", "risk": "Medium", "why": "Warm & dry."})
+    return alerts or [{"note": "No specific alerts based on current conditions."}]
+
+
+def _old_crop_recommend(s_pH, rain, season, moisture):
+    out = []
+    if 5.5 <= s_pH <= 7.0 and rain >= 800 and season == "kharif":
+        out.append("rice")
+    if 5.5 <= s_pH <= 7.5 and rain >= 500:
+        out.append("maize")
+    if moisture < 25:
+        out.append("millets")
+    if season == "rabi" and 6.0 <= s_pH <= 7.5 and 400 <= rain <= 800:
+        out.append("wheat")
+    if season == "summer" and rain < 400:
+        out.append("pulses")
+    return out
+
+
+OLD_PEST_DB = {
+    "rice": [("Rice Blast", lambda t, h, r: 20 <= t <= 28 and h > 80 and r > 50),
+             ("Brown Planthopper", lambda t, h, r: t > 28 and h > 70)],
+    "wheat": [("Rust (Yellow/Stem/Leaf)", lambda t, h, r: 10 <= t <= 25 and h > 60)],
+    "maize": [("Fall Armyworm", lambda t, h, r: t > 20)],
+    "pulses": [("Pod Borer", lambda t, h, r: t > 20 and h > 60)],
+    "millets": [("Shoot Fly", lambda t, h, r: t > 25)],
+}
+
+OLD_CROP_RULES = [
+    ("rice", (5.5, 7.0), (800, 2000), {"kharif"}, "Thrives in high rainfall & neutral pH"),
+    ("wheat", (6.0, 7.5), (300, 900), {"rabi"}, "Prefers cooler season & moderate rain"),
+    ("maize", (5.5, 7.5), (500, 1200), {"kharif", "rabi"}, "Wide pH tolerance; moderate rain"),
+    ("sugarcane", (6.0, 7.5), (1100, 1500), {"annual"}, "High water demand crop"),
+    ("cotton", (5.8, 8.0), (500, 1000), {"kharif"}, "Needs warm season & well-drained soils"),
+    ("pulses", (6.0, 7.5), (400, 800), {"kharif", "rabi"}, "Low–moderate water; neutral pH"),
+    ("millets", (5.5, 7.5), (300, 700), {"kharif"}, "Very resilient to low water"),
+]
+
+
+def test_advisor_crops_parity():
+    for pH, rain, szn in itertools.product(PH, RAIN, SEASONS):
+        assert advisors.recommend_crops(pH, rain, szn) == _old_advisor_crops(pH, rain, szn), (pH, rain, szn)
+
+
+def test_advisor_pests_parity():
+    for crop, t, h in itertools.product(CROPS, TEMPS, HUMIDITY):
+        assert advisors.pest_alerts(crop, t, h, None) == _old_advisor_pests(crop, t, h), (crop, t, h)
+
+
+def test_crop_recommend_parity():
+    ruleset = get_ruleset("crop_recommend")
+    for pH, rain, season, moisture in itertools.product(PH, RAIN, SEASONS, [10, 24.9, 25, 40]):
+        facts = {"soil_pH": pH, "rainfall_mm": rain, "season": season, "soil_moisture": moisture}
+        got = [r["crop"] for r in matching_outputs(ruleset, facts)]
+        assert got == _old_crop_recommend(pH, rain, season, moisture), facts
+
+
+def test_pest_management_parity():
+    ruleset = get_ruleset("pest_management")
+    for crop, t, h, r in itertools.product(CROPS, TEMPS, HUMIDITY, [0, 50, 51]):
+        facts = {"crop": crop, "temp_c": t, "humidity_pct": h, "rainfall_mm": r}
+        got = [issue["name"] for issue in matching_outputs(ruleset, facts)]
+        expected = [name for name, cond in OLD_PEST_DB.get(crop, []) if cond(t, h, r)]
+        assert got == expected, facts
+
+
+def test_crop_suitability_table_unchanged():
+    assert crop_service.CROP_RULES == OLD_CROP_RULES
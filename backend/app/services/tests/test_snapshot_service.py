@@ -0,0 +1,95 @@
+# app/services/tests/test_snapshot_service.py
+import pytest
+
+from app.services import snapshot_service
+
+PROFILE = {"phone": "9000000001", "crop": "rice", "area": 2.0, "pincode": "110001", "active": True}
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    calls = []
+
+    def _forecast(profile):
+        calls.append(("forecast", profile["crop"]))
+        return {"summary": {"crop": profile["crop"]}, "explanation": {"status": "ready"}}
+
+    def _advisor(profile):
+        calls.append(("advisor", profile["crop"]))
+        return {"recommendations": [], "pest_alerts": []}
+
+    monkeypatch.setattr(snapshot_service, "KINDS", {"forecast": _forecast, "advisor": _advisor})
+    monkeypatch.setattr(snapshot_service, "STORE_PATH", tmp_path / "snapshots.json")
+    monkeypatch.setattr(snapshot_service, "MIN_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(snapshot_service.profile_service, "load_profiles", lambda: [dict(PROFILE)])
+    snapshot_service._snapshots.clear()
+    snapshot_service._state["loaded"] = False
+    return calls
+
+
+def test_refresh_then_served_from_snapshot(snapshots):
+    assert snapshot_service.refresh_all() == 2
+    record, source = snapshot_service.get_or_compute("forecast", dict(PROFILE))
+    assert source == "snapshot"
+    assert record["data"]["summary"]["crop"] == "rice"
+    assert snapshot_service.freshness(record)["computed_at"] == record["computed_at"]
+    assert len(snapshots) == 2
+
+    # the active flag is not part of the profile; a second run has nothing to do
+    assert snapshot_service.lookup("advisor", {**PROFILE, "active": False}) is not None
+    assert snapshot_service.refresh_all() == 0
+
+    # reloaded from disk after a restart
+    snapshot_service._snapshots.clear()
+    snapshot_service._state["loaded"] = False
+    assert snapshot_service.lookup("forecast", PROFILE) is not None
+
+
+def test_stale_when_profile_or_day_changes(snapshots):
+    snapshot_service.refresh_all()
+    edited = {**PROFILE, "crop": "wheat"}
+    assert snapshot_service.lookup("forecast", edited) is None
+    record, source = snapshot_service.get_or_compute("forecast", edited)
+    assert source == "computed" and record["data"]["summary"]["crop"] == "wheat"
+
+    record["computed_date"] = "2000-01-01"
+    assert snapshot_service.lookup("forecast", edited) is None
+
+
+def test_pending_explanation_is_not_served(snapshots):
+    snapshot_service.store("forecast", PROFILE, {"explanation": {"status": "pending"}})
+    assert snapshot_service.lookup("forecast", PROFILE) is None
+
+
+def test_store_file_has_no_phone_or_profile(snapshots):
+    snapshot_service.KINDS["advisor"] = lambda p: {"profile": dict(p), "recommendations": []}
+    snapshot_service.refresh_all()
+    text = snapshot_service.STORE_PATH.read_text()
+    assert PROFILE["phone"] not in text
+    assert snapshot_service.lookup("advisor", PROFILE)["data"] == {"recommendations": []}
+
+
+def test_concurrent_cold_requests_compute_once(snapshots):
+    import threading
+
+    threads = [threading.Thread(target=snapshot_service.get_or_compute, args=("forecast", dict(PROFILE)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert snapshots == [("forecast", "rice")]
+    assert not list(snapshot_service.STORE_PATH.parent.glob("*.part"))
+
+
+def test_forecast_stale_after_model_changes(snapshots, monkeypatch):
+    monkeypatch.setattr(snapshot_service.predict_yield, "model_version", lambda: ("auto", "", (1, 10), None, None))
+    snapshot_service.refresh_all()
+    assert snapshot_service.lookup("forecast", PROFILE) is not None
+
+    # retrained .pkl: the forecast is recomputed, the advisor (no model) is kept
+    monkeypatch.setattr(snapshot_service.predict_yield, "model_version", lambda: ("auto", "", (2, 10), None, None))
+    assert snapshot_service.lookup("forecast", PROFILE) is None
+    assert snapshot_service.lookup("advisor", PROFILE) is not None
+    record, source = snapshot_service.get_or_compute("forecast", dict(PROFILE))
+    assert source == "computed" and snapshot_service.lookup("forecast", PROFILE) is record
@@ -0,0 +1,39 @@
+# app/services/tests/test_weather_scenarios.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import forecast_service
+
+
+def _history(days: int, placeholders: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "date": pd.date_range("2026-01-01", periods=days + placeholders),
+        "temperature_C": np.r_[rng.uniform(24, 32, days), np.zeros(placeholders)],
+        "humidity_pct": np.r_[rng.uniform(60, 90, days), np.zeros(placeholders)],
+        "rainfall_mm": np.r_[rng.uniform(0, 20, days), np.zeros(placeholders)],
+        "sunlight_hours": 8.0,
+    })
+    return df
+
+
+@pytest.mark.parametrize("method", forecast_service.SCENARIO_METHODS)
+def test_zero_filled_days_are_not_sampled(method):
+    out = forecast_service.sample_weather_scenarios(_history(20, placeholders=10), 500, method=method, seed=1)
+    for values in out.values():
+        assert np.isfinite(values).all()
+    if method == "bootstrap":
+        assert out["temp_7d_avg"].min() >= 24 and out["humidity_7d_avg"].min() >= 60
+
+
+@pytest.mark.parametrize("method", forecast_service.SCENARIO_METHODS)
+@pytest.mark.parametrize("days", [0, 3, 6])
+def test_short_history_is_a_value_error(method, days):
+    with pytest.raises(ValueError, match="valid weather days"):
+        forecast_service.sample_weather_scenarios(_history(days, placeholders=5), 100, method=method)
+
+
+def test_exactly_one_window_is_enough():
+    out = forecast_service.sample_weather_scenarios(_history(7), 50, method="climatology", seed=1)
+    assert np.isfinite(out["rainfall_7d_total"]).all()
@@ -134,6 +134,15 @@ def fetch_weekly_series(pincode: str) -> list:
     } for _, row in last7.iterrows()]
 
 
+def fetch_weather_history(pincode: str) -> pd.DataFrame:
+    """Daily rows (date, temperature_C, humidity_pct, rainfall_mm, sunlight_hours) of the 30-day window."""
+    created_date = date.today().strftime("%Y%m%d")
+    csv_path = DATA_DIR / f"weather_{pincode}_{created_date}.csv"
+    if not csv_path.exists():
+        fetch_weather(pincode, days=30)
+    return pd.read_csv(csv_path, parse_dates=["date"])
+
+
 async def get_weather_data(pincode: str):
     summary = fetch_weather_summary(pincode)
     weekly = fetch_weekly_series(pincode)
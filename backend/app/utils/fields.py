@@ -0,0 +1,34 @@
+# app/utils/fields.py
+from typing import Iterable, Optional, Set
+
+from fastapi import HTTPException
+
+
+def parse_fields(raw: Optional[str], allowed: Iterable[str]) -> Optional[Set[str]]:
+    """
+    `fields=` query value ("summary,riskFactors") -> set of top-level fields,
+    or None for everything. Unknown names are a 400.
+    """
+    if raw is None or not raw.strip():
+        return None
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = fields - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {sorted(unknown)}; choose from {sorted(allowed)}",
+        )
+    return fields
+
+
+def wants(fields: Optional[Set[str]], *names: str) -> bool:
+    """Whether any of `names` is requested (None = all fields)."""
+    return fields is None or any(n in fields for n in names)
+
+
+def select(data: dict, fields: Optional[Set[str]], always: Iterable[str] = ()) -> dict:
+    """Keep only the requested top-level keys (plus `always`)."""
+    if fields is None:
+        return data
+    keep = set(fields) | set(always)
+    return {k: v for k, v in data.items() if k in keep}
@@ -0,0 +1,153 @@
+# app/utils/http_cache.py
+"""
+Conditional GET + server-side body cache for endpoints whose payload is a
+function of a few known inputs (profile version, data date, model version).
+
+The ETag is computed from those inputs plus the request path and query
+string, before any service work. A matching If-None-Match gets 304 right
+away; otherwise the serialized body is served from a bounded LRU cache
+keyed by the ETag, and only a miss runs the endpoint's compute function.
+
+    etag = http_cache.etag_for(request, profile_version, data_date)
+    return http_cache.respond(request, etag, lambda: build_payload())
+
+Env:
+  HTTP_CACHE_MAX_ENTRIES  bodies kept (default 512)
+  HTTP_CACHE_MAX_MB       total size of the kept bodies (default 64)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "512"))
+MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024)
+CACHE_CONTROL = "private, no-cache"   # clients may keep the body but must revalidate
+
+_lock = threading.Lock()
+_bodies: "OrderedDict[str, bytes]" = OrderedDict()
+_stats = {"bytes": 0, "hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+
+def data_date() -> str:
+    """Date of the day's data (weather files and mandi prices are per day)."""
+    return date.today().isoformat()
+
+
+def etag_for(request: Request, *inputs) -> str:
+    """Strong ETag of the request (path + query) and the payload's inputs."""
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(repr((request.url.path, query, inputs)).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip() for t in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _get(etag: str) -> Optional[bytes]:
+    with _lock:
+        body = _bodies.get(etag)
+        if body is not None:
+            _bodies.move_to_end(etag)
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+        return body
+
+
+def _put(etag: str, body: bytes):
+    with _lock:
+        if etag in _bodies:
+            return
+        _bodies[etag] = body
+        _stats["bytes"] += len(body)
+        while len(_bodies) > 1 and (len(_bodies) > MAX_ENTRIES or _stats["bytes"] > MAX_BYTES):
+            _, old = _bodies.popitem(last=False)
+            _stats["bytes"] -= len(old)
+            _stats["evictions"] += 1
+
+
+def _not_modified(etag: str) -> Response:
+    with _lock:
+        _stats["not_modified"] += 1
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def _ok(etag: str, body: bytes, hit: bool) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Cache": "hit" if hit else "miss"},
+    )
+
+
+def _serialize(payload: Any) -> bytes:
+    # same rendering as FastAPI's default JSON responses
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def _finish(etag: str, payload: Any, cacheable: Optional[Callable[[Any], bool]]) -> Response:
+    body = _serialize(payload)
+    if cacheable is not None and not cacheable(payload):
+        # provisional payload: no ETag, so the next request recomputes
+        return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+    _put(etag, body)
+    return _ok(etag, body, hit=False)
+
+
+def respond(request: Request, etag: str, compute: Callable[[], Any],
+            cacheable: Optional[Callable[[Any], bool]] = None) -> Response:
+    """
+    304, cached body, or compute() serialized and cached (unless cacheable(payload)
+    is False). Exceptions from compute() pass through.
+    """
+    if _matches(request, etag):
+        return _not_modified(etag)
+    body = _get(etag)
+    if body is not None:
+        return _ok(etag, body, hit=True)
+    return _finish(etag, compute(), cacheable)
+
+
+async def respond_async(request: Request, etag: str, compute: Callable[[], Awaitable[Any]],
+                        cacheable: Optional[Callable[[Any], bool]] = None) -> Response:
+    """respond() for async compute functions."""
+    if _matches(request, etag):
+        return _not_modified(etag)
+    body = _get(etag)
+    if body is not None:
+        return _ok(etag, body, hit=True)
+    return _finish(etag, await compute(), cacheable)
+
+
+def clear():
+    with _lock:
+        _bodies.clear()
+        _stats["bytes"] = 0
+
+
+def get_stats() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "entries": len(_bodies),
+            "max_entries": MAX_ENTRIES,
+            "mb": round(_stats["bytes"] / 1024 / 1024, 2),
+            "max_mb": round(MAX_BYTES / 1024 / 1024, 1),
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "hit_ratio": round(_stats["hits"] / lookups, 3) if lookups else None,
+            "not_modified": _stats["not_modified"],
+            "evictions": _stats["evictions"],
+        }
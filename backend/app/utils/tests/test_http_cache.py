@@ -0,0 +1,60 @@
+# app/utils/tests/test_http_cache.py
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils import http_cache
+
+
+def _client(calls: list, version: dict) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/thing")
+    def thing(request: Request):
+        def payload():
+            calls.append(1)
+            return {"value": version["v"], "status": version.get("status", "ready")}
+        etag = http_cache.etag_for(request, version["v"], http_cache.data_date())
+        return http_cache.respond(request, etag, payload, cacheable=lambda p: p["status"] != "pending")
+
+    return TestClient(app)
+
+
+def test_etag_304_and_body_cache():
+    http_cache.clear()
+    calls, version = [], {"v": 1}
+    c = _client(calls, version)
+
+    first = c.get("/thing")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["x-cache"] == "miss"
+
+    assert c.get("/thing", headers={"If-None-Match": etag}).status_code == 304
+    again = c.get("/thing")
+    assert again.headers["x-cache"] == "hit" and again.content == first.content
+    assert len(calls) == 1
+
+    # other query string or other inputs -> other ETag, computed again
+    assert c.get("/thing?lang=hi").headers["etag"] != etag
+    version["v"] = 2
+    changed = c.get("/thing", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["value"] == 2
+    assert len(calls) == 3
+
+
+def test_provisional_payload_not_cached():
+    http_cache.clear()
+    calls, version = [], {"v": 9, "status": "pending"}
+    c = _client(calls, version)
+    r = c.get("/thing")
+    assert "etag" not in r.headers
+    c.get("/thing")
+    assert len(calls) == 2
+
+
+def test_bounded(monkeypatch):
+    http_cache.clear()
+    monkeypatch.setattr(http_cache, "MAX_ENTRIES", 2)
+    for i in range(5):
+        http_cache._put(f'"{i}"', b"x" * 10)
+    assert list(http_cache._bodies) == ['"3"', '"4"']
+    assert http_cache.get_stats()["mb"] == round(20 / 1024 / 1024, 2)
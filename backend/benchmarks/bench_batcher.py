@@ -0,0 +1,71 @@
+# benchmarks/bench_batcher.py
+"""
+Concurrent single-row predict_row calls: inline model.predict per call vs
+the micro-batcher. Needs a trained model (app/ml/artifacts/yield_model.pkl).
+
+Run from the backend folder:
+    python -m benchmarks.bench_batcher [n_threads] [calls_per_thread]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.ml import batcher, prediction_cache
+from app.ml.predict_yield import MODEL_PATH, predict_row
+
+
+def _call(i: int) -> float:
+    return predict_row(
+        state="Maharashtra", district="Pune", crop="rice", season="Kharif",
+        crop_year=2024, area=2.0, production=0.0,
+        weather={"rainfall_7d_total": float(i % 120), "temp_7d_avg": 28.0, "humidity_7d_avg": 70.0},
+        soil={"pH": 6.8},
+    )
+
+
+def _run(n_threads: int, calls: int) -> tuple:
+    latencies = []
+
+    def worker(t):
+        out = []
+        for j in range(calls):
+            t0 = time.perf_counter()
+            out.append(_call(t * calls + j))
+            latencies.append(time.perf_counter() - t0)
+        return out
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_threads) as ex:
+        results = list(ex.map(worker, range(n_threads)))
+    wall = time.perf_counter() - t0
+    return wall, np.array(latencies) * 1000, np.concatenate(results)
+
+
+def main(n_threads: int = 32, calls: int = 20):
+    if not MODEL_PATH.exists():
+        print(f"❌ No model at {MODEL_PATH}; run train_yield.py first.")
+        return
+    total = n_threads * calls
+    prediction_cache.CACHE_SIZE = 0  # measure the model path, not cache hits
+
+    batcher.BATCHING_ENABLED = False
+    inline_wall, inline_lat, inline_y = _run(n_threads, calls)
+
+    batcher.BATCHING_ENABLED = True
+    batched_wall, batched_lat, batched_y = _run(n_threads, calls)
+
+    assert np.allclose(np.sort(inline_y), np.sort(batched_y)), "batched predictions differ"
+
+    m = batcher.get_metrics()
+    print(f"threads: {n_threads}  calls: {total}  window: {m['window_ms']} ms  max batch: {m['max_batch']}")
+    for name, wall, lat in (("inline ", inline_wall, inline_lat), ("batched", batched_wall, batched_lat)):
+        print(f"{name}: {total / wall:8.1f} req/s   p50 {np.percentile(lat, 50):7.2f} ms   p95 {np.percentile(lat, 95):7.2f} ms")
+    print(f"mean batch size: {m['mean_batch_size']}  queue delay p95: {m['queue_delay_ms']['p95']} ms")
+    print(f"batch sizes: {m['batch_size_hist']}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
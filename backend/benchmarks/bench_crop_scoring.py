@@ -0,0 +1,74 @@
+# benchmarks/bench_crop_scoring.py
+"""
+Crop-suitability ranking for a district: per-farm `_score` loop vs the
+vectorized [farms x crops] matrix + argpartition top-k.
+
+Run from the backend folder:
+    python -m benchmarks.bench_crop_scoring [n_farms] [n_crops]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.crop_service import _score, build_catalog, recommend_crops_batch
+
+SEASONS = ["kharif", "rabi", "annual", "summer"]
+
+
+def _synthetic_rules(n_crops: int, seed: int = 11) -> list:
+    rng = np.random.default_rng(seed)
+    rules = []
+    for i in range(n_crops):
+        p_lo = rng.uniform(4.5, 7.0)
+        r_lo = rng.uniform(200, 1500)
+        seasons = set(rng.choice(SEASONS, size=rng.integers(1, 3), replace=False).tolist())
+        rules.append((
+            f"crop_{i:04d}",
+            (round(p_lo, 2), round(p_lo + rng.uniform(0.5, 2.0), 2)),
+            (round(r_lo), round(r_lo + rng.uniform(200, 900))),
+            seasons,
+            f"variety {i}",
+        ))
+    return rules
+
+
+def _loop(pH, rain, season, rules, k: int) -> list:
+    """What crop_service.recommend_crops did, once per farm."""
+    out = []
+    for p, r, s in zip(pH, rain, season):
+        scored = [(rule[0], _score(p, r, s, rule)) for rule in rules]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        out.append([c for c, sc in scored[:k] if sc > 0])
+    return out
+
+
+def main(n_farms: int = 20_000, n_crops: int = 500, k: int = 5):
+    rules = _synthetic_rules(n_crops)
+    catalog = build_catalog(rules)
+    rng = np.random.default_rng(3)
+    pH = np.round(rng.uniform(4.5, 8.5, n_farms), 2)
+    rain = np.round(rng.uniform(100, 2500, n_farms), 1)
+    season = np.array(SEASONS)[rng.integers(0, len(SEASONS), n_farms)]
+
+    loop_n = min(n_farms, 2_000)
+    t0 = time.perf_counter()
+    loop_top = _loop(pH[:loop_n].tolist(), rain[:loop_n].tolist(), season[:loop_n].tolist(), rules, k)
+    loop_s = (time.perf_counter() - t0) * n_farms / loop_n
+
+    t0 = time.perf_counter()
+    batch = recommend_crops_batch(pH, rain, season, top_k=k, catalog=catalog)
+    batch_s = time.perf_counter() - t0
+
+    assert [[r["crop"] for r in farm] for farm in batch[:loop_n]] == loop_top, \
+        "vectorized ranking diverges from the loop"
+
+    print(f"farms: {n_farms:,}  crops: {n_crops}  top-k: {k}")
+    print(f"python loop      : {loop_s:8.3f} s" + ("  (extrapolated)" if loop_n < n_farms else ""))
+    print(f"vectorized batch : {batch_s:8.3f} s")
+    print(f"speedup          : {loop_s / batch_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,82 @@
+# benchmarks/bench_numpy_model.py
+"""
+CatBoost (joblib .pkl) vs the pure-NumPy export (.npz): load time, predict
+latency for 1 / 100 / 100k rows and peak RSS. Each backend runs in its own
+child process so RSS reflects only what that backend imports and loads.
+
+Needs app/ml/artifacts/yield_model.pkl and yield_model.npz (train_yield.py
+writes both). Run from the backend folder:
+    python -m benchmarks.bench_numpy_model
+"""
+import json
+import resource
+import subprocess
+import sys
+import time
+
+SIZES = (1, 100, 100_000)
+
+
+def _rows(n: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "State": "Maharashtra", "District": "Pune",
+        "Crop": rng.choice(["rice", "wheat", "maize"], n), "Crop_Year": 2024,
+        "Season": rng.choice(["Kharif", "Rabi"], n), "Area": rng.uniform(1, 10, n), "Production": 0.0,
+        "state_profile": "Maharashtra", "district_profile": "Pune",
+        "rainfall_7d_total": rng.uniform(0, 150, n), "temp_7d_avg": rng.uniform(18, 38, n),
+        "humidity_7d_avg": rng.uniform(30, 95, n), "soil_ph": rng.uniform(5, 8.5, n),
+        "soil_soc": 0.5, "soil_sand": 33.0, "soil_silt": 33.0, "soil_clay": 34.0,
+    })
+
+
+def _child(backend: str):
+    t0 = time.perf_counter()
+    if backend == "catboost":
+        import joblib
+        from app.ml.predict_yield import MODEL_PATH
+        model = joblib.load(MODEL_PATH)
+        predict = lambda df: model.predict(df)
+    else:
+        from app.ml import numpy_model
+        m = numpy_model.load_model()
+        predict = lambda df: numpy_model.predict_frame(m, df)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    out = {"backend": backend, "load_ms": load_ms, "predict_ms": {}}
+    for n in SIZES:
+        df = _rows(n)
+        predict(df)  # warm-up
+        reps = 50 if n <= 100 else 3
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            predict(df)
+        out["predict_ms"][n] = (time.perf_counter() - t0) * 1000 / reps
+    out["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(out))
+
+
+def main():
+    results = []
+    for backend in ("catboost", "numpy"):
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_numpy_model", "--child", backend],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"❌ {backend} run failed:\n{proc.stderr[-800:]}")
+            return
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':10s} {'load ms':>9s} " + " ".join(f"{f'{n:,} rows ms':>14s}" for n in SIZES) + f" {'peak RSS MB':>12s}")
+    for r in results:
+        cells = " ".join(f"{r['predict_ms'][str(n)]:14.3f}" for n in SIZES)
+        print(f"{r['backend']:10s} {r['load_ms']:9.1f} {cells} {r['max_rss_mb']:12.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        _child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_rules.py
+"""
+Bulk rule evaluation: per-farm Python `if` chains vs the compiled rule engine.
+
+Run from the backend folder:
+    python -m benchmarks.bench_rules [n_farms]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.rule_engine import evaluate, get_ruleset
+
+SEASONS = np.array(["kharif", "rabi", "summer", "annual"])
+
+
+def _farms(n: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "soil_pH": rng.uniform(4.5, 8.5, n),
+        "rainfall_mm": rng.uniform(0, 1500, n),
+        "season": SEASONS[rng.integers(0, len(SEASONS), n)],
+        "soil_moisture": rng.uniform(5, 70, n),
+    }
+
+
+def _if_chain(s_pH, rain, season, moisture) -> list:
+    """The hand-coded checks that routers/crop.py used to run per request."""
+    out = []
+    if 5.5 <= s_pH <= 7.0 and rain >= 800 and season == "kharif":
+        out.append("rice")
+    if 5.5 <= s_pH <= 7.5 and rain >= 500:
+        out.append("maize")
+    if moisture < 25:
+        out.append("millets")
+    if season == "rabi" and 6.0 <= s_pH <= 7.5 and 400 <= rain <= 800:
+        out.append("wheat")
+    if season == "summer" and rain < 400:
+        out.append("pulses")
+    return out
+
+
+def main(n: int = 1_000_000):
+    farms = _farms(n)
+    compiled = get_ruleset("crop_recommend")
+
+    loop_n = min(n, 200_000)
+    cols = [farms[k][:loop_n].tolist() for k in ("soil_pH", "rainfall_mm", "season", "soil_moisture")]
+    t0 = time.perf_counter()
+    loop_hits = [_if_chain(*row) for row in zip(*cols)]
+    loop_s = (time.perf_counter() - t0) * n / loop_n
+
+    t0 = time.perf_counter()
+    hits = evaluate(compiled, farms)
+    bulk_s = time.perf_counter() - t0
+
+    ids = compiled["ids"]
+    assert all(
+        [ids[j] for j in np.flatnonzero(hits[i])] == loop_hits[i] for i in range(0, loop_n, 997)
+    ), "bulk result diverges from the if-chain"
+
+    print(f"farms: {n:,}  rules: {len(ids)}")
+    print(f"python if-chain : {loop_s:8.3f} s" + ("  (extrapolated)" if loop_n < n else ""))
+    print(f"compiled engine : {bulk_s:8.3f} s")
+    print(f"speedup         : {loop_s / bulk_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,117 @@
+# benchmarks/bench_voice.py
+"""
+Per-request latency and disk I/O of the voice input path.
+
+Compares the old file-based flow (save upload -> pydub export .wav ->
+sr.AudioFile reads it back) with the in-memory pipeline in voice.py,
+for 10 s and 60 s clips. Speech recognition itself is not called.
+
+Run from the backend folder:
+    python -m benchmarks.bench_voice
+"""
+import io
+import math
+import shutil
+import statistics
+import struct
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import speech_recognition as sr
+from pydub import AudioSegment
+
+from app.chatbot.backend import voice
+
+REPEATS = 5
+SOURCE_RATE = 44100
+
+
+def _make_clip(seconds: int) -> bytes:
+    """Stereo 44.1 kHz tone, i.e. what a browser recorder typically uploads."""
+    n = seconds * SOURCE_RATE
+    frames = bytearray()
+    for i in range(n):
+        v = int(8000 * math.sin(2 * math.pi * 440 * i / SOURCE_RATE))
+        frames += struct.pack("<hh", v, v)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(SOURCE_RATE)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def _encode(wav_bytes: bytes, fmt: str) -> bytes:
+    out = io.BytesIO()
+    AudioSegment.from_file(io.BytesIO(wav_bytes), format="wav").export(out, format=fmt)
+    return out.getvalue()
+
+
+def _proc_io() -> dict:
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (line.split(": ") for line in f)}
+    except OSError:
+        return {}
+
+
+def _legacy(upload: bytes, suffix: str, workdir: Path) -> sr.AudioData:
+    """Old flow: upload saved to disk, converted to .wav next to it, read back."""
+    in_path = workdir / f"upload{suffix}"
+    in_path.write_bytes(upload)
+    wav_path = in_path.with_suffix(".wav")
+    if suffix != ".wav":
+        AudioSegment.from_file(str(in_path)).export(str(wav_path), format="wav")
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(str(wav_path)) as source:
+        return recognizer.record(source)
+
+
+def _in_memory(upload: bytes, suffix: str, workdir: Path) -> sr.AudioData:
+    chunks = (upload[i:i + 64 * 1024] for i in range(0, len(upload), 64 * 1024))
+    return voice._to_audio_data(chunks)
+
+
+def _measure(fn, upload: bytes, suffix: str) -> dict:
+    latencies, disk_bytes, written = [], [], []
+    for _ in range(REPEATS):
+        workdir = Path(tempfile.mkdtemp(prefix="voice_bench_"))
+        before = _proc_io()
+        t0 = time.perf_counter()
+        fn(upload, suffix, workdir)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        after = _proc_io()
+        written.append(after.get("write_bytes", 0) - before.get("write_bytes", 0))
+        disk_bytes.append(sum(p.stat().st_size for p in workdir.iterdir()))
+        shutil.rmtree(workdir)
+    return {
+        "p50_ms": round(statistics.median(latencies), 1),
+        "max_ms": round(max(latencies), 1),
+        "files_bytes": int(statistics.median(disk_bytes)),
+        "block_write_bytes": int(statistics.median(written)),
+    }
+
+
+def main():
+    formats = [".wav"]
+    if shutil.which(AudioSegment.converter):
+        formats.append(".mp3")
+    else:
+        print("⚠ ffmpeg not found: benchmarking WAV uploads only")
+
+    print(f"{'clip':>5} {'fmt':>5} {'path':>10} {'p50 ms':>9} {'max ms':>9} {'files B':>12} {'blk write B':>12}")
+    for seconds in (10, 60):
+        wav_clip = _make_clip(seconds)
+        for suffix in formats:
+            upload = wav_clip if suffix == ".wav" else _encode(wav_clip, suffix[1:])
+            for name, fn in (("legacy", _legacy), ("in-memory", _in_memory)):
+                r = _measure(fn, upload, suffix)
+                print(f"{seconds:>4}s {suffix:>5} {name:>10} {r['p50_ms']:>9} {r['max_ms']:>9} "
+                      f"{r['files_bytes']:>12} {r['block_write_bytes']:>12}")
+
+
+if __name__ == "__main__":
+    main()